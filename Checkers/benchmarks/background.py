@@ -0,0 +1,90 @@
+"""
+Frame pacing benchmark: searching in the main loop against in a worker.
+
+A loop standing in for the window runs at a fixed frame rate, without
+pygame, while the computer picks moves from seeded random openings two
+ways:
+
+* foreground  - AIPlayer.choose_move called from the loop, as main.py
+                did, so no frame is drawn until the search ends
+* background  - BackgroundThinker.think, with the loop polling for the
+                move every frame
+* parallel    - the same with --workers search processes, driven from a
+                thread of the loop's process
+
+For each it prints the frames delivered against the frames due, and the
+longest gap between two frames. The background thinker shares the CPU
+with the loop, so with a single core the searches get a little less of
+it.
+
+Run from the Checkers folder:
+    python -m benchmarks.background [--moves N] [--think-ms MS] [--workers N]
+"""
+
+import argparse
+import time
+from checkers.ai import AIPlayer
+from checkers.background import BackgroundThinker
+from checkers.tournament import random_opening
+
+# Frame rate of the stand-in loop
+FPS = 60
+
+def frame_loop(positions, start_move, move_ready):
+    """Run frames until every position has a move; return (frames, seconds, longest gap).
+
+    Each frame starts the next search if none is running, or else checks
+    whether the move has arrived, as main.py's polling loop does.
+    """
+    frame = 1 / FPS
+    pending = list(positions)
+    searching = False
+    frames = 0
+    longest = 0.0
+    start = last = time.perf_counter()
+    while pending or searching:
+        now = time.perf_counter()
+        longest = max(longest, now - last)
+        last = now
+        frames += 1
+        if not searching:
+            start_move(pending.pop(0))
+            searching = True
+        elif move_ready():
+            searching = False
+        time.sleep(max(0.0, frame - (time.perf_counter() - now)))
+    return frames, time.perf_counter() - start, longest
+
+def foreground(positions, think_ms):
+    """Search in the loop itself."""
+    player = AIPlayer(positions[0].turn, think_ms)
+    return frame_loop(positions, player.choose_move, lambda: True)
+
+def background(positions, think_ms, workers=1):
+    """Search in a BackgroundThinker and poll for the move every frame."""
+    with BackgroundThinker(think_ms, workers=workers) as thinker:
+        return frame_loop(positions, thinker.think,
+                          lambda: any(message.done for message in thinker.poll()))
+
+def main():
+    """Time both ways of searching and print frames delivered and the longest gap."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--moves", type=int, default=5)
+    parser.add_argument("--think-ms", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=2, help="processes of the parallel search")
+    args = parser.parse_args()
+
+    positions = [random_opening(6, seed)[0] for seed in range(args.moves)]
+    print(f"{args.moves} searches of {args.think_ms} ms, {FPS} frames/s wanted")
+    print(f"{'search':<12}{'seconds':>9}{'frames':>8}{'due':>7}{'longest gap ms':>16}")
+    runs = (
+        ("foreground", foreground),
+        ("background", background),
+        ("parallel", lambda positions, think_ms: background(positions, think_ms, args.workers)),
+    )
+    for name, run in runs:
+        frames, elapsed, longest = run(positions, args.think_ms)
+        print(f"{name:<12}{elapsed:>9.2f}{frames:>8}{int(elapsed * FPS):>7}{longest * 1000:>16.1f}")
+
+if __name__ == "__main__":
+    main()
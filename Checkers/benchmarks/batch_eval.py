@@ -0,0 +1,52 @@
+"""
+Batch evaluation benchmark: NumPy against a per-position Python loop.
+
+Positions come from seeded random games. They are scored three ways:
+
+* Python loop     - evaluate_position on every BitBoard
+* NumPy codes     - evaluate_batch on N x 32 square codes
+* NumPy words     - evaluate_words on N x 3 bitboard words
+
+The NumPy rows exclude encoding, which is timed separately.
+
+Run from the Checkers folder:  python -m benchmarks.batch_eval [--positions N]
+"""
+
+import argparse
+import time
+import numpy as np
+from benchmarks.movegen import sample_positions
+from checkers.batch_eval import encode_boards, evaluate_batch, evaluate_position
+from checkers.batch_eval import evaluate_words, words_from_boards
+
+def timed(function, *args):
+    """Run a function once; return its result and the time taken in seconds."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    """Score the same positions every way and print positions per second."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--positions", type=int, default=20000)
+    args = parser.parse_args()
+
+    boards = sample_positions(args.positions)
+    (codes, turns), encode_time = timed(encode_boards, boards)
+    (words, word_turns), words_time = timed(words_from_boards, boards)
+
+    loop_scores, loop_time = timed(lambda: [evaluate_position(board) for board in boards])
+    code_scores, code_time = timed(evaluate_batch, codes, turns)
+    word_scores, word_time = timed(evaluate_words, words, word_turns)
+    if not (np.array_equal(code_scores, loop_scores) and np.array_equal(word_scores, loop_scores)):
+        raise SystemExit("MISMATCH between the NumPy and Python scores")
+
+    print(f"{'method':<16}{'seconds':>10}{'positions/s':>14}")
+    for name, elapsed in (("Python loop", loop_time), ("NumPy codes", code_time),
+                          ("NumPy words", word_time), ("encode codes", encode_time),
+                          ("encode words", words_time)):
+        print(f"{name:<16}{elapsed:>10.4f}{len(boards) / elapsed:>14,.0f}")
+    print(f"NumPy codes speedup: {loop_time / code_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
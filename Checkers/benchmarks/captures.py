@@ -0,0 +1,144 @@
+"""
+Capture generation benchmark: jump sequences as Move tuples against a
+packed int buffer.
+
+BitBoard.generate_moves walks jump chains on an explicit stack of
+tuples and appends each finished sequence as a Move. The alternative
+measured here keeps the stack in a preallocated list of packed ints
+(captured mask, crowned flag and square in one int) and collects the
+finished sequences as packed ints, turning them into Moves at the end,
+since push/pop, the transposition table and the archive all take
+Moves. Both list every complete jump sequence, checked to be identical
+before timing.
+
+Positions are collected from seeded random games, keeping only those in
+which the side to move must capture, plus random placements of grey kings
+and men among white men with jump chains of three or more captures.
+
+Run from the Checkers folder:  python -m benchmarks.captures [--positions N]
+"""
+
+import argparse
+import random
+import time
+from checkers.bitboard import (
+    ALL_DIRECTIONS, BOTTOM_ROW, DOWN, FULL, JUMPS, TOP_ROW, UP, BitBoard, Move, iter_squares,
+)
+from checkers.constants import GREY_PIECES
+
+# Stack entries are captured << 6 | crowned << 5 | square
+_CROWNED = 32
+_PROMOTION = {UP: TOP_ROW, DOWN: BOTTOM_ROW, ALL_DIRECTIONS: 0}
+
+# JUMPS with the packed entry of each landing instead of its square
+PACKED_JUMPS = {
+    directions: tuple(
+        tuple((over, land, over << 6 | (_CROWNED if land & _PROMOTION[directions] else 0) | square)
+              for over, land, square in jumps)
+        for jumps in table
+    )
+    for directions, table in JUMPS.items()
+}
+
+# Deepest the stack can get: four jumps pushed for each of twelve captures
+_STACK_SIZE = 49
+
+def _packed_jumps(src, directions, opponent, empty, moves):
+    """Append the complete jump sequences of the piece on src, packed as ints."""
+    jumps = PACKED_JUMPS[directions]
+    stack = [src] * _STACK_SIZE
+    top = 1
+    while top:
+        top -= 1
+        entry = stack[top]
+        captured = entry >> 6
+        if entry & _CROWNED:
+            moves.append(entry)
+            continue
+        targets = opponent & ~captured
+        extended = False
+        for over, land, landing in jumps[entry & 31]:
+            if over & targets and land & empty:
+                stack[top] = captured << 6 | landing
+                top += 1
+                extended = True
+        if captured and not extended:
+            moves.append(entry)
+
+def packed_captures(board):
+    """List the side to move's jump sequences through a packed int buffer."""
+    color = board.turn
+    own, opponent = (board.grey, board.white) if color == GREY_PIECES else (board.white, board.grey)
+    empty = ~(board.grey | board.white) & FULL
+    forward = UP if color == GREY_PIECES else DOWN
+    moves = []
+    for square in iter_squares(board.jumpers(color)):
+        bit = 1 << square
+        packed = []
+        if board.kings & bit:
+            _packed_jumps(square, ALL_DIRECTIONS, opponent, empty | bit, packed)
+            packed = dict.fromkeys(packed)
+        else:
+            _packed_jumps(square, forward, opponent, empty, packed)
+        moves.extend(Move(square, entry & 31, entry >> 6) for entry in packed)
+    return moves
+
+def chain_positions(count, seed=1):
+    """Scatter a few grey kings and men among white men; keep positions with long chains."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        squares = rng.sample(range(32), 12)
+        grey = sum(1 << square for square in squares[:3])
+        white = sum(1 << square for square in squares[3:]) & ~0xF0000000
+        board = BitBoard(grey, white, kings=sum(1 << square for square in squares[:2]))
+        if grey & ~board.kings & TOP_ROW:
+            continue
+        moves = board.generate_moves()
+        if moves and max(move.captured.bit_count() for move in moves) >= 3:
+            positions.append(board)
+    return positions
+
+def capture_positions(count, seed=1):
+    """Collect positions where the side to move must capture."""
+    rng = random.Random(seed)
+    positions = chain_positions(count // 10, seed)
+    board = BitBoard()
+    while len(positions) < count:
+        moves = board.generate_moves()
+        if not moves:
+            board = BitBoard()
+            continue
+        if moves[0].captured:
+            positions.append(board.copy())
+        board.push(rng.choice(moves))
+    return positions
+
+def main():
+    """Check both layouts agree, then time them."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--positions", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    boards = capture_positions(args.positions)
+    for board in boards:
+        if board.generate_moves() != packed_captures(board):
+            raise SystemExit("MISMATCH between the generators")
+    chains = sum(len(board.generate_moves()) for board in boards)
+
+    print(f"{len(boards)} capture positions, {chains} jump sequences")
+    print(f"{'generator':<16}{'seconds':>10}{'positions/s':>14}")
+    times = {}
+    for name, generate in (("packed ints", packed_captures),
+                           ("Move tuples", BitBoard.generate_moves)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for board in boards:
+                generate(board)
+        times[name] = time.perf_counter() - start
+        print(f"{name:<16}{times[name]:>10.3f}{len(boards) * args.repeat / times[name]:>14,.0f}")
+    print(f"Move tuples speedup: {times['packed ints'] / times['Move tuples']:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Idle CPU benchmark: the polling main loop against the event-driven one.
+
+Each loop runs a game nobody is playing for a few seconds under SDL's
+dummy video driver, then a timer posts QUIT. CPU time is measured with
+time.process_time, so the share is of one core.
+
+* poll   - clock.tick(FPS), check the winner and redraw every frame
+* event  - sleep in pygame.event.wait until something happens
+
+The dummy driver cannot block on its event queue, so SDL polls it inside
+event.wait; the event loop's share on a real display is lower still.
+
+Run from the Checkers folder:  python -m benchmarks.idle [--seconds N]
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import main as checkers_main
+from checkers.constants import GREY_PIECES, HEIGHT, WHITE, WIDTH
+from checkers.game import Game
+from checkers.game_logger import GameLogger
+from checkers.render import FrameStats, Renderer
+
+def measure(win, loop, render, seconds):
+    """Run one idle game loop; return (CPU share, frames drawn)."""
+    game = Game(win, GameLogger(None))
+    if render == "dirty":
+        game.renderer = Renderer(win)
+    players = {GREY_PIECES: None, WHITE: None}
+    stats = FrameStats()
+    pygame.event.clear()
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), loops=1)
+    wall, cpu = time.perf_counter(), time.process_time()
+    if loop == "poll":
+        checkers_main.poll_loop(game, players, stats)
+    else:
+        checkers_main.event_loop(game, players, stats)
+    share = (time.process_time() - cpu) / (time.perf_counter() - wall)
+    summary = stats.summary()
+    return share, summary["frames"] - summary["skipped"]
+
+def main():
+    """Measure idle CPU use of each loop and rendering mode."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=3.0, help="idle time per run")
+    args = parser.parse_args()
+
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    print(f"{'loop':<8}{'render':<8}{'CPU %':>8}{'frames drawn':>14}")
+    for loop in ("poll", "event"):
+        for render in ("full", "dirty"):
+            share, drawn = measure(win, loop, render, args.seconds)
+            print(f"{loop:<8}{render:<8}{share:>8.1%}{drawn:>14}")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
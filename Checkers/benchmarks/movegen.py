@@ -0,0 +1,81 @@
+"""
+Microbenchmark: whole-side move generation against the per-piece loop.
+
+Positions come from seeded random games. For every position the side to
+move's moves are generated three ways:
+
+* Board loop      - Board.get_all_pieces + Board.get_valid_moves per piece
+* BitBoard loop   - BitBoard.moves_from for every piece
+* generate_moves  - BitBoard.generate_moves in one pass
+
+Run from the Checkers folder:  python -m benchmarks.movegen [--positions N]
+"""
+
+import argparse
+import random
+import time
+from checkers.bitboard import BitBoard, iter_squares
+from checkers.board import Board
+
+def sample_positions(count, seed=1):
+    """Collect positions from random games played with generate_moves."""
+    rng = random.Random(seed)
+    positions = []
+    board = BitBoard()
+    while len(positions) < count:
+        moves = board.generate_moves()
+        if not moves:
+            board = BitBoard()
+            continue
+        positions.append(board.copy())
+        board.push(rng.choice(moves))
+    return positions
+
+def board_loop(board):
+    """Generate moves the way Game.select used to, piece by piece on the Board."""
+    for piece in board.get_all_pieces(board.turn):
+        board.get_valid_moves(piece)
+
+def bitboard_loop(engine):
+    """Generate moves piece by piece on the BitBoard."""
+    for square in iter_squares(engine.pieces(engine.turn)):
+        engine.moves_from(square)
+
+def one_pass(engine):
+    """Generate moves for the whole side at once."""
+    engine.generate_moves()
+
+def time_per_position(function, positions, repeat):
+    """Best time of a function over all positions, in microseconds per position."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for position in positions:
+            function(position)
+        best = min(best, time.perf_counter() - start)
+    return best / len(positions) * 1e6
+
+def main():
+    """Time every approach and print microseconds per position."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--positions", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engines = sample_positions(args.positions)
+    boards = [Board(engine.copy()) for engine in engines]
+    for board in boards:
+        board.get_piece(0, 0)  # Build the grid outside the timed loop
+
+    results = [
+        ("Board loop", time_per_position(board_loop, boards, args.repeat)),
+        ("BitBoard loop", time_per_position(bitboard_loop, engines, args.repeat)),
+        ("generate_moves", time_per_position(one_pass, engines, args.repeat)),
+    ]
+    baseline = results[0][1]
+    print(f"{'method':<18}{'us/position':>14}{'speedup':>10}")
+    for name, micros in results:
+        print(f"{name:<18}{micros:>14.2f}{baseline / micros:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
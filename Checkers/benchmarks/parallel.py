@@ -0,0 +1,78 @@
+"""
+Parallel search benchmark: Lazy SMP workers against a single Searcher.
+
+Positions come from seeded random openings. Each is searched to a fixed
+depth, with no time limit, first by a single Searcher with its own table
+and then by a ParallelSearcher for every worker count given, with the
+shared table cleared between positions. For each worker count it reports:
+
+* speedup   - single-search time divided by parallel time to the same depth
+* overhead  - extra nodes searched by all workers together, relative to
+              the single search
+* agree     - positions where the parallel search chose the same move
+
+Worker pools are started before timing. Speedup can only exceed 1 with
+at least as many free cores as workers.
+
+Run from the Checkers folder:  python -m benchmarks.parallel [--workers 1 2 4] [--depth N]
+"""
+
+import argparse
+import os
+import time
+from checkers.ai import Searcher
+from checkers.parallel import ParallelSearcher
+from checkers.tournament import random_opening
+from checkers.transposition import TranspositionTable
+
+# Long enough that every search reaches its depth
+NO_LIMIT_MS = 10 ** 9
+
+def single_search(positions, depth, table_mb):
+    """Search every position with one Searcher; return (results, seconds)."""
+    results = []
+    start = time.perf_counter()
+    for board in positions:
+        searcher = Searcher(NO_LIMIT_MS, depth, TranspositionTable(table_mb))
+        results.append(searcher.search(board))
+    return results, time.perf_counter() - start
+
+def parallel_search(positions, depth, table_mb, workers):
+    """Search every position with a ParallelSearcher; return (results, seconds)."""
+    results = []
+    with ParallelSearcher(workers, NO_LIMIT_MS, depth, table_mb) as searcher:
+        start = time.perf_counter()
+        for board in positions:
+            searcher.clear()
+            results.append(searcher.search(board))
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+def main():
+    """Time single and parallel searches and print speedup and overhead."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4],
+                        help="worker counts to try")
+    parser.add_argument("--depth", type=int, default=10, help="search depth in plies")
+    parser.add_argument("--positions", type=int, default=6)
+    parser.add_argument("--opening-plies", type=int, default=6)
+    parser.add_argument("--hash-mb", type=float, default=16)
+    args = parser.parse_args()
+
+    positions = [random_opening(args.opening_plies, seed)[0] for seed in range(args.positions)]
+    print(f"{len(positions)} positions searched to depth {args.depth}, "
+          f"{os.cpu_count()} CPU(s)")
+    single, single_time = single_search(positions, args.depth, args.hash_mb)
+    single_nodes = sum(result.nodes for result in single)
+    print(f"{'workers':<9}{'seconds':>9}{'nodes':>10}{'speedup':>9}{'overhead':>10}{'agree':>7}")
+    print(f"{'single':<9}{single_time:>9.2f}{single_nodes:>10}{1:>9.2f}{0:>10.0%}"
+          f"{len(positions):>7}")
+    for workers in args.workers:
+        results, elapsed = parallel_search(positions, args.depth, args.hash_mb, workers)
+        nodes = sum(result.nodes for result in results)
+        agree = sum(a.move == b.move for a, b in zip(single, results))
+        print(f"{workers:<9}{elapsed:>9.2f}{nodes:>10}{single_time / elapsed:>9.2f}"
+              f"{nodes / single_nodes - 1:>10.0%}{agree:>7}")
+
+if __name__ == "__main__":
+    main()
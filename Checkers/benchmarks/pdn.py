@@ -0,0 +1,87 @@
+"""
+PDN throughput benchmark: writing, streaming and replaying game collections.
+
+Seeded random games are written to a temporary PDN file, which is then
+read back three ways:
+
+* write    - write_game for every game
+* scan     - read_games only, moves kept as the squares in the file
+* replay   - read_games and PDNGame.replay, checking every move is legal
+
+Games per second and megabytes per second are printed for each, with
+the peak memory traced while streaming, which stays flat however many
+games the file holds.
+
+Run from the Checkers folder:  python -m benchmarks.pdn [--games N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from checkers.archive import DRAW, GREY_WIN, WHITE_WIN
+from checkers.bitboard import BitBoard
+from checkers.constants import GREY_PIECES
+from checkers.pdn import read_games, write_game
+
+def random_game(rng, max_plies=150):
+    """Play random legal moves; return (moves, archive result)."""
+    board = BitBoard()
+    moves = []
+    while len(moves) < max_plies:
+        legal = board.generate_moves()
+        if not legal:
+            return moves, WHITE_WIN if board.turn == GREY_PIECES else GREY_WIN
+        moves.append(rng.choice(legal))
+        board.push(moves[-1])
+    return moves, DRAW
+
+def time_pass(path, games, replay):
+    """Read every game in a PDN file; return (seconds, games read)."""
+    start = time.perf_counter()
+    count = 0
+    with open(path) as file:
+        for game in read_games(file):
+            if replay:
+                for _ in game.replay():
+                    pass
+            count += 1
+    assert count == games
+    return time.perf_counter() - start, count
+
+def main():
+    """Time writing and reading PDN and print games per second."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    games = [random_game(rng) for _ in range(args.games)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.pdn")
+        start = time.perf_counter()
+        with open(path, "w") as file:
+            for number, (moves, result) in enumerate(games, 1):
+                write_game(file, moves, result, {"Event": "benchmark", "Round": number})
+        timings = {"write": time.perf_counter() - start}
+        megabytes = os.path.getsize(path) / 2 ** 20
+        timings["scan"], _ = time_pass(path, args.games, replay=False)
+        timings["replay"], _ = time_pass(path, args.games, replay=True)
+
+        tracemalloc.start()
+        time_pass(path, args.games, replay=True)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    plies = sum(len(moves) for moves, _ in games)
+    print(f"{args.games} games, {plies} moves, {megabytes:.1f} MB of PDN")
+    print(f"{'pass':<8}{'seconds':>9}{'games/s':>10}{'MB/s':>8}")
+    for name, elapsed in timings.items():
+        print(f"{name:<8}{elapsed:>9.2f}{args.games / elapsed:>10.0f}{megabytes / elapsed:>8.2f}")
+    print(f"peak memory while streaming: {peak / 1024:.0f} KB")
+
+if __name__ == "__main__":
+    main()
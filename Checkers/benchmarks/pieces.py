@@ -0,0 +1,124 @@
+"""
+Piece memory benchmark: slotted pieces against the dictionary-backed
+pieces they replaced.
+
+Positions are collected from seeded random games and a Board is built for
+each, with its grid of pieces created, and all of them are held in memory
+at once. tracemalloc measures the bytes allocated per board; build
+times are taken in a separate pass without tracing. The old
+pieces kept their attributes in a per-instance __dict__, including screen
+coordinates recomputed on every move, and kings were separate objects
+with their own counters.
+
+Run from the Checkers folder:  python -m benchmarks.pieces [--boards N]
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from checkers.board import Board
+from checkers.constants import COLS, ROWS, SQUARE_SIZE, WHITE
+
+class DictPiece:
+    """The original piece layout: attributes and screen position in a __dict__."""
+
+    def __init__(self, row, col, color):
+        self._row = row
+        self._col = col
+        self._color = color
+        self._king = False
+        self._x = 0
+        self._y = 0
+        self.calculate_position()
+
+    def calculate_position(self):
+        self._x = SQUARE_SIZE * self._col + SQUARE_SIZE // 2
+        self._y = SQUARE_SIZE * self._row + SQUARE_SIZE // 2
+
+class DictKing(DictPiece):
+    """The original king: a separate object with per-instance counters."""
+
+    def __init__(self, row, col, color):
+        self.grey_kings = self.white_kings = 0
+        super().__init__(row, col, color)
+        self._king = True
+        if self._color == WHITE:
+            self.white_kings += 1
+        else:
+            self.grey_kings += 1
+
+class DictBoard(Board):
+    """A Board whose grid holds the original pieces."""
+
+    def create_board(self):
+        self._board = []
+        for row in range(ROWS):
+            self._board.append([])
+            for col in range(COLS):
+                piece = self._engine.get_piece(row, col)
+                if piece == 0:
+                    self._board[row].append(0)
+                elif piece.king:
+                    self._board[row].append(DictKing(row, col, piece.color))
+                else:
+                    self._board[row].append(DictPiece(row, col, piece.color))
+
+def collect_positions(count, seed):
+    """Get engine positions from seeded random games."""
+    rng = random.Random(seed)
+    positions = []
+    board = Board()
+    while len(positions) < count:
+        moves = board.engine.generate_moves()
+        if not moves or len(board.engine.history) > 150:
+            board = Board()
+            continue
+        board.push(rng.choice(moves))
+        positions.append(board.engine.copy())
+    return positions
+
+def build(board_class, positions):
+    """Build a board with its grid of pieces for every position."""
+    boards = []
+    for engine in positions:
+        board = board_class(engine)
+        board.create_board()
+        boards.append(board)
+    return boards
+
+def measure(board_class, positions):
+    """Return (bytes per board, seconds to build them all) for a board class."""
+    start = time.perf_counter()
+    build(board_class, positions)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    boards = build(board_class, positions)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del boards
+    return used / len(positions), elapsed
+
+def main():
+    """Measure both piece layouts and print the memory used per board."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--boards", type=int, default=100_000, help="boards held in memory")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    positions = collect_positions(args.boards, args.seed)
+    pieces = sum(engine.grey_left + engine.white_left for engine in positions) / len(positions)
+    print(f"{len(positions)} boards, {pieces:.1f} pieces per board on average")
+    print(f"{'pieces':<10}{'bytes/board':>13}{'total MB':>10}{'build s':>9}")
+    results = {}
+    for name, board_class in (("dict", DictBoard), ("slots", Board)):
+        per_board, elapsed = measure(board_class, positions)
+        results[name] = per_board
+        print(f"{name:<10}{per_board:>13.0f}{per_board * len(positions) / 2**20:>10.1f}"
+              f"{elapsed:>9.2f}")
+    print(f"slotted pieces use {1 - results['slots'] / results['dict']:.0%} less memory per board")
+
+if __name__ == "__main__":
+    main()
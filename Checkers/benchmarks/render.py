@@ -0,0 +1,65 @@
+"""
+Rendering benchmark: full redraws against dirty-rectangle rendering.
+
+A seeded random game is replayed on a window under SDL's dummy video
+driver. Each move is followed by a number of idle frames, as in the real
+main loop where most frames come between moves.
+
+* full   - Game.update redraws the whole board and flips the display
+* dirty  - a Renderer redraws only changed squares and skips idle frames
+
+Run from the Checkers folder:  python -m benchmarks.render [--moves N] [--idle N]
+"""
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from checkers.constants import HEIGHT, WIDTH
+from checkers.game import Game
+from checkers.game_logger import GameLogger
+from checkers.render import FrameStats, Renderer
+
+def run(win, dirty, moves, idle, seed):
+    """Play a random game, timing every frame; return the FrameStats."""
+    rng = random.Random(seed)
+    game = Game(win, GameLogger(None))
+    if dirty:
+        game.renderer = Renderer(win)
+    stats = FrameStats()
+    for _ in range(moves):
+        legal = game.board.engine.generate_moves()
+        if not legal:
+            game.reset()
+            continue
+        game.play_move(rng.choice(legal))
+        for _ in range(idle + 1):
+            start = time.perf_counter()
+            drawn = game.update()
+            stats.record((time.perf_counter() - start) * 1000, drawn)
+    return stats
+
+def main():
+    """Time both rendering modes and print frame statistics."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--moves", type=int, default=200, help="moves to play")
+    parser.add_argument("--idle", type=int, default=30, help="idle frames after each move")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    print(f"{'mode':<8}{'frames':>8}{'skipped':>9}{'mean ms':>10}{'p99 ms':>9}{'total ms':>10}")
+    for name, dirty in (("full", False), ("dirty", True)):
+        summary = run(win, dirty, args.moves, args.idle, args.seed).summary()
+        total = summary["mean_ms"] * summary["frames"]
+        print(f"{name:<8}{summary['frames']:>8}{summary['skipped']:>9}"
+              f"{summary['mean_ms']:>10.3f}{summary['p99_ms']:>9.3f}{total:>10.1f}")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Startup-time benchmark for the headless engine and the GUI path.
+
+Each import is timed in a fresh interpreter, so the numbers include the
+interpreter start and everything the import pulls in.
+
+Run from the Checkers folder:  python -m benchmarks.startup [--runs N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Code run in each fresh interpreter, by path name
+PATHS = {
+    "python only": "pass",
+    "headless engine": (
+        "import checkers.game; from checkers.bitboard import BitBoard; "
+        "BitBoard().get_valid_moves(BitBoard().get_piece(5, 0))"
+    ),
+    "GUI (pygame + crown)": (
+        "import os; os.environ['SDL_VIDEODRIVER'] = 'dummy'; "
+        "import checkers.game; from checkers import render; render.get_crown()"
+    ),
+}
+
+def time_run(code):
+    """Time one fresh interpreter running the given code, in milliseconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    """Time every startup path and print the median and best run."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20, help="runs per path")
+    args = parser.parse_args()
+
+    print(f"{'path':<24}{'median ms':>12}{'best ms':>12}")
+    for name, code in PATHS.items():
+        times = [time_run(code) for _ in range(args.runs)]
+        print(f"{name:<24}{statistics.median(times):>12.1f}{min(times):>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Tablebase probe benchmark.
+
+Positions are sampled from every table in a folder, then each is looked
+up through Tablebase.probe, which maps the table files on first use.
+Missing tables are generated first.
+
+Run from the Checkers folder:  python -m benchmarks.tablebase [--pieces N] [--probes N]
+"""
+
+import argparse
+import random
+import time
+from checkers.bitboard import BitBoard
+from checkers.tablebase import SliceIndex, Tablebase, generate
+
+def sample_positions(tablebase, count, seed=1):
+    """Pick random positions from the tables' slices."""
+    rng = random.Random(seed)
+    signatures = sorted(tablebase.signatures)
+    positions = []
+    while len(positions) < count:
+        index = SliceIndex(rng.choice(signatures))
+        positions.append(BitBoard(*index.position(rng.randrange(index.size))))
+    return positions
+
+def main():
+    """Generate tables if needed and time lookups."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pieces", type=int, default=3, help="most pieces on the board")
+    parser.add_argument("--probes", type=int, default=100000)
+    parser.add_argument("--directory", default="tablebases")
+    args = parser.parse_args()
+
+    generate(args.directory, args.pieces)
+    with Tablebase(args.directory) as tablebase:
+        boards = sample_positions(tablebase, args.probes)
+        for board in boards[:100]:
+            tablebase.probe(board)  # Map every file before timing
+        start = time.perf_counter()
+        for board in boards:
+            tablebase.probe(board)
+        elapsed = time.perf_counter() - start
+    print(f"{args.probes} probes in {elapsed * 1000:.1f} ms "
+          f"({elapsed / args.probes * 1e6:.2f} us per probe)")
+
+if __name__ == "__main__":
+    main()
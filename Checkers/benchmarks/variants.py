@@ -0,0 +1,76 @@
+"""
+Perft benchmark for every rules variant.
+
+Each variant is searched with perft from its starting position, checking
+the counts against the known ones where there are any, and its move
+generator is timed on positions from seeded random games, which reach the
+kings and long captures perft from the start barely touches:
+
+* american (BitBoard)  - the specialised 8x8 engine, for comparison
+* american             - the same rules on a VariantBoard
+* brazilian            - 8x8 with the international rules
+* international        - 10x10
+
+Run from the Checkers folder:  python -m benchmarks.variants [--depth N] [--positions N]
+"""
+
+import argparse
+import random
+import time
+from checkers.bitboard import BitBoard
+from checkers.perft import REFERENCE_PERFT, perft
+from checkers.variants import AMERICAN, VARIANTS, VariantBoard
+
+def sample_positions(new_board, count, seed=1):
+    """Collect positions from random games, starting again after each game ends."""
+    rng = random.Random(seed)
+    positions = []
+    board = new_board()
+    while len(positions) < count:
+        moves = board.generate_moves()
+        if not moves or len(board.history) > 150:
+            board = new_board()
+            continue
+        positions.append(board.copy())
+        board.push(rng.choice(moves))
+    return positions
+
+def time_perft(board, depth):
+    """Run perft; return (nodes, seconds)."""
+    start = time.perf_counter()
+    nodes = perft(board, depth)
+    return nodes, time.perf_counter() - start
+
+def time_generation(positions, repeat):
+    """Best time to generate the moves of every position, in microseconds per position."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for position in positions:
+            position.generate_moves()
+        best = min(best, time.perf_counter() - start)
+    return best / len(positions) * 1e6
+
+def main():
+    """Run perft and time move generation for every variant."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, default=6, help="perft depth for every variant")
+    parser.add_argument("--positions", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engines = [("american (BitBoard)", AMERICAN, BitBoard)]
+    for variant in VARIANTS.values():
+        engines.append((variant.name, variant, lambda variant=variant: VariantBoard(variant)))
+
+    print(f"{'engine':<22}{'perft nodes':>13}{'seconds':>9}{'nodes/s':>11}{'us/position':>13}")
+    for name, variant, new_board in engines:
+        nodes, elapsed = time_perft(new_board(), args.depth)
+        expected = REFERENCE_PERFT.get(variant.name, ())
+        if args.depth < len(expected) and nodes != expected[args.depth]:
+            raise SystemExit(f"{name}: perft {nodes}, expected {expected[args.depth]}")
+        micros = time_generation(sample_positions(new_board, args.positions), args.repeat)
+        print(f"{name:<22}{nodes:>13}{elapsed:>9.2f}{nodes / elapsed:>11,.0f}{micros:>13.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -40,6 +40,7 @@ class AbstractGame(ABC):
 
 class AbstractPiece(ABC):
     """Abstract class for a Checkers game piece."""
+    __slots__ = ()
 
     @abstractmethod
     def draw(self, win):
@@ -0,0 +1,368 @@
+"""
+Alpha-beta search for a computer Checkers player.
+
+The search works on a BitBoard with push()/pop(), so it never touches the
+Board's grid of Piece objects or the window.
+"""
+
+import random
+import time
+from collections import namedtuple
+from .constants import GREY_PIECES
+from .tablebase import LOSS, WIN
+from .transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+# Material values
+MAN_VALUE = 100
+KING_VALUE = 150
+
+# Score of a won position; wins found sooner score higher
+WIN_SCORE = 100000
+INFINITY = WIN_SCORE + 1
+
+# Deepest search, in plies
+MAX_PLY = 64
+
+# Check the clock every this many nodes (must be a power of two)
+CLOCK_INTERVAL = 256
+
+# Scores beyond this are wins or losses found by the search
+WIN_BOUND = WIN_SCORE - MAX_PLY
+
+# Squares indexed by the history table: enough for a 10x10 board's 50
+HISTORY_SQUARES = 64
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out."""
+
+
+class SearchResult(namedtuple("SearchResult", "move score depth nodes elapsed_ms")):
+    """The outcome of a search: best move, score and search statistics."""
+    __slots__ = ()
+
+    @property
+    def nodes_per_second(self):
+        """Searched nodes per second of wall-clock time."""
+        if self.elapsed_ms <= 0:
+            return 0
+        return int(self.nodes * 1000 / self.elapsed_ms)
+
+
+def legal_moves(board):
+    """Get every legal move for the side to move on a BitBoard."""
+    return board.generate_moves(board.turn)
+
+
+def evaluate(board):
+    """Score a BitBoard by material from the side to move's point of view."""
+    kings = board.kings
+    score = (
+        MAN_VALUE * ((board.grey & ~kings).bit_count() - (board.white & ~kings).bit_count())
+        + KING_VALUE * ((board.grey & kings).bit_count() - (board.white & kings).bit_count())
+    )
+    return score if board.turn == GREY_PIECES else -score
+
+
+def _tablebase_score(entry, ply):
+    """Turn a tablebase result into a search score from the root's distance."""
+    if entry.result == WIN:
+        return WIN_SCORE - ply - entry.distance
+    if entry.result == LOSS:
+        return -WIN_SCORE + ply + entry.distance
+    return 0
+
+
+def _score_to_table(score, ply):
+    """Store win scores as distance from this node rather than from the root."""
+    if score >= WIN_BOUND:
+        return score + ply
+    if score <= -WIN_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    """Turn a stored win score back into distance from the root."""
+    if score >= WIN_BOUND:
+        return score - ply
+    if score <= -WIN_BOUND:
+        return score + ply
+    return score
+
+
+class Searcher:
+    """Negamax alpha-beta search with iterative deepening and a time limit.
+
+    Moves are ordered captures first (largest first), then killer moves,
+    then by a history score of earlier cutoffs. Positions covered by an
+    endgame Tablebase are scored from it instead of searched.
+    """
+
+    def __init__(self, time_limit_ms=1000, max_depth=MAX_PLY, table=None, tablebase=None,
+                 stop=None, progress=None):
+        """Initialize the Searcher, optionally sharing a TranspositionTable and a Tablebase.
+
+        stop is an optional function checked along with the clock; the
+        search ends early, keeping its last completed depth, once it
+        returns True. progress is an optional function called with a
+        SearchResult after every completed depth.
+        """
+        self._time_limit_ms = time_limit_ms
+        self._max_depth = min(max_depth, MAX_PLY)
+        self._table = table
+        self._tablebase = tablebase
+        self._stop = stop
+        self._progress = progress
+        self._deadline = 0.0
+        self._nodes = 0
+        self._killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self._history = [0] * (HISTORY_SQUARES * HISTORY_SQUARES)
+
+    def search(self, board, first_depth=1):
+        """Search a copy of a BitBoard and return a SearchResult.
+
+        Iterative deepening starts at first_depth, so a helper searching
+        alongside another Searcher can stay a ply ahead of it.
+        """
+        board = board.copy()
+        start = time.perf_counter()
+        self._deadline = start + self._time_limit_ms / 1000
+        self._nodes = 0
+        self._killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self._history = [value // 2 for value in self._history]
+
+        moves = legal_moves(board)
+        if not moves:
+            return SearchResult(None, -WIN_SCORE, 0, 0, 0.0)
+        best_move, best_score, completed = moves[0], 0, 0
+        if len(moves) > 1:
+            for depth in range(min(first_depth, self._max_depth), self._max_depth + 1):
+                try:
+                    best_score, best_move = self._search_root(board, moves, depth, best_move)
+                except SearchTimeout:
+                    break
+                completed = depth
+                if self._progress is not None:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    self._progress(SearchResult(best_move, best_score, depth, self._nodes, elapsed_ms))
+                if abs(best_score) >= WIN_BOUND:
+                    break
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return SearchResult(best_move, best_score, completed, self._nodes, elapsed_ms)
+
+    def _search_root(self, board, moves, depth, first):
+        """Search every root move to the given depth; return (score, move)."""
+        alpha = -INFINITY
+        best_move = first
+        for move in self._order(moves, 0, first):
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -INFINITY, -alpha, 1)
+            board.pop()
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        """Score a position with alpha-beta pruning."""
+        self._count_node()
+        tablebase = self._tablebase
+        if tablebase is not None and (board.grey | board.white).bit_count() <= tablebase.max_pieces:
+            entry = tablebase.probe(board)
+            if entry is not None:
+                return _tablebase_score(entry, ply)
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiesce(board, alpha, beta, ply)
+        table = self._table
+        table_move = None
+        if table is not None:
+            entry = table.probe(board.hash)
+            if entry is not None:
+                if entry.depth >= depth:
+                    score = _score_from_table(entry.score, ply)
+                    if entry.flag == EXACT:
+                        return score
+                    if entry.flag == LOWER and score >= beta:
+                        return score
+                    if entry.flag == UPPER and score <= alpha:
+                        return score
+                table_move = (entry.src, entry.dst)
+        moves = legal_moves(board)
+        if not moves:
+            return -WIN_SCORE + ply
+        first = None
+        if table_move is not None:
+            for move in moves:
+                if (move.src, move.dst) == table_move:
+                    first = move
+                    break
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = None
+        for move in self._order(moves, ply, first):
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not move.captured:
+                            self._record_cutoff(move, depth, ply)
+                        break
+        if table is not None:
+            if best >= beta:
+                flag = LOWER
+            elif best > original_alpha:
+                flag = EXACT
+            else:
+                flag = UPPER
+            table.store(board.hash, depth, flag, _score_to_table(best, ply), best_move)
+        return best
+
+    def _quiesce(self, board, alpha, beta, ply):
+        """Play out compulsory captures so the horizon does not hide them."""
+        turn = board.turn
+        if ply >= MAX_PLY:
+            return evaluate(board)
+        if not board.jumpers(turn):
+            # A side with no pieces has no moves either, and has lost
+            if not board.movers(turn):
+                return -WIN_SCORE + ply
+            return evaluate(board)
+        # Captures are compulsory, so there is no standing pat here
+        captures = legal_moves(board)
+        captures.sort(key=lambda move: move.captured.bit_count(), reverse=True)
+        best = -INFINITY
+        for move in captures:
+            self._count_node()
+            board.push(move)
+            score = -self._quiesce(board, -beta, -alpha, ply + 1)
+            board.pop()
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def _count_node(self):
+        """Count a node and stop the search once the time is up."""
+        self._nodes += 1
+        if self._nodes & (CLOCK_INTERVAL - 1) == 0:
+            if time.perf_counter() > self._deadline or (self._stop is not None and self._stop()):
+                raise SearchTimeout
+
+    def _order(self, moves, ply, first=None):
+        """Sort moves: previous best, captures, killers, then history."""
+        killers = self._killers[ply]
+        history = self._history
+
+        def key(move):
+            if move == first:
+                return 3 << 40
+            if move.captured:
+                return (2 << 40) + move.captured.bit_count()
+            if move in killers:
+                return 1 << 40
+            return history[move.src * HISTORY_SQUARES + move.dst]
+
+        return sorted(moves, key=key, reverse=True)
+
+    def _record_cutoff(self, move, depth, ply):
+        """Remember a quiet move that caused a beta cutoff."""
+        killers = self._killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self._history[move.src * HISTORY_SQUARES + move.dst] += depth * depth
+
+    # Getter for table
+    @property
+    def table(self):
+        return self._table
+
+    # Getter for tablebase
+    @property
+    def tablebase(self):
+        return self._tablebase
+
+    # Getter and Setter for time_limit_ms
+    @property
+    def time_limit_ms(self):
+        return self._time_limit_ms
+
+    @time_limit_ms.setter
+    def time_limit_ms(self, value):
+        self._time_limit_ms = value
+
+
+class AIPlayer:
+    """A computer player that picks moves with a Searcher."""
+
+    def __init__(self, color, time_limit_ms=1000, max_depth=MAX_PLY, table_mb=16, tablebase=None,
+                 workers=1):
+        """Initialize the AIPlayer with a transposition table of table_mb megabytes.
+
+        With more than one worker the search runs in that many processes
+        sharing the table; call close() when the player is done.
+        """
+        self._color = color
+        if workers > 1:
+            from .parallel import ParallelSearcher  # parallel.py builds on this module
+            directory = tablebase.directory if tablebase is not None else None
+            self._searcher = ParallelSearcher(workers, time_limit_ms, max_depth, table_mb or 1,
+                                              directory)
+        else:
+            table = TranspositionTable(table_mb) if table_mb else None
+            self._searcher = Searcher(time_limit_ms, max_depth, table, tablebase)
+        self._last_result = None
+
+    def choose_move(self, board):
+        """Choose a move for the side to move on a BitBoard, or None if there is none."""
+        self._last_result = self._searcher.search(board)
+        return self._last_result.move
+
+    def close(self):
+        """Stop the search's worker processes, if it has any."""
+        close = getattr(self._searcher, "close", None)
+        if close is not None:
+            close()
+
+    # Getter for color
+    @property
+    def color(self):
+        return self._color
+
+    # Getter for last_result
+    @property
+    def last_result(self):
+        return self._last_result
+
+    # Getter for searcher
+    @property
+    def searcher(self):
+        return self._searcher
+
+
+class RandomPlayer:
+    """A player that picks a random legal move, as a baseline opponent."""
+
+    def __init__(self, color, seed=None):
+        """Initialize the RandomPlayer with an optional seed."""
+        self._color = color
+        self._random = random.Random(seed)
+
+    def choose_move(self, board):
+        """Choose a random move for the side to move on a BitBoard, or None if there is none."""
+        moves = legal_moves(board)
+        return self._random.choice(moves) if moves else None
+
+    # Getter for color
+    @property
+    def color(self):
+        return self._color
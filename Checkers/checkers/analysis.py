@@ -0,0 +1,287 @@
+"""
+Position analysis service: legal moves, evaluation and best move.
+
+Positions are given as compact strings of 33 characters: the side to
+move ("G" for grey, "W" for white) followed by a 32-character board
+string (see checkers.pdn), so the starting position is
+"G" + "w" * 12 + "." * 8 + "g" * 12. FEN strings are accepted too.
+
+Answers are kept in an LRU cache keyed by Zobrist hash. The cache is
+bounded by the bytes its entries use, evicting the least recently used
+first. A batch is answered from the cache where possible; the rest are
+searched across a pool of worker processes. Hit rate and request
+latency are kept as metrics: a position's latency runs from the start of
+its batch until its answer is ready, straight from the cache or once its
+search comes back.
+
+Run from the Checkers folder:
+    python -m checkers.analysis Gwwwwwwwwwwww........gggggggggggg
+    python -m checkers.analysis --file positions.txt --workers 4 --depth 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from collections import OrderedDict, deque, namedtuple
+from .ai import Searcher, evaluate, legal_moves
+from .bitboard import BitBoard, iter_squares, row_col_of
+from .constants import GREY_PIECES, WHITE
+from .measure import deep_size, percentile
+from .pdn import PDNError, board_string, parse_board_string, parse_fen
+
+# First character of the compact position string: the side to move
+TURN_CHARS = {"G": GREY_PIECES, "W": WHITE}
+
+# Default search settings for the best move
+DEFAULT_DEPTH = 6
+DEFAULT_TIME_MS = 1000
+
+# Default cache budget, in bytes
+DEFAULT_CACHE_BYTES = 16 * 1024 * 1024
+
+# Request latencies kept for the percentiles, one per position asked about
+LATENCY_SAMPLES = 10000
+
+
+class PositionError(ValueError):
+    """Raised for a string that is not a valid compact position."""
+
+
+class Analysis(namedtuple("Analysis", "position moves evaluation best_move score depth")):
+    """What the service knows about a position."""
+    __slots__ = ()
+
+    def to_json(self):
+        """Describe the analysis as a JSON-ready dictionary, squares as [row, col]."""
+        def describe(move):
+            return {
+                "from": list(row_col_of(move.src)),
+                "to": list(row_col_of(move.dst)),
+                "captured": [list(row_col_of(square)) for square in iter_squares(move.captured)],
+            }
+        return {
+            "position": self.position,
+            "moves": [describe(move) for move in self.moves],
+            "evaluation": self.evaluation,
+            "best_move": describe(self.best_move) if self.best_move else None,
+            "score": self.score,
+            "depth": self.depth,
+        }
+
+
+def parse_position(text):
+    """Turn a compact position string, or a FEN string, into a BitBoard."""
+    text = text.strip()
+    try:
+        if ":" in text:
+            return parse_fen(text)
+        if len(text) != 33 or text[0] not in TURN_CHARS:
+            raise PositionError(f"expected a side to move and 32 squares, got {text!r}")
+        return parse_board_string(text[1:], TURN_CHARS[text[0]])
+    except PDNError as error:
+        raise PositionError(str(error)) from None
+
+
+def position_string(board):
+    """Turn a Board or BitBoard into a compact position string."""
+    engine = getattr(board, "engine", board)
+    return ("G" if engine.turn == GREY_PIECES else "W") + board_string(engine)
+
+
+def analyse(board, depth=DEFAULT_DEPTH, time_limit_ms=DEFAULT_TIME_MS):
+    """Analyse one BitBoard position without the cache."""
+    result = Searcher(time_limit_ms, depth).search(board)
+    return Analysis(position_string(board), legal_moves(board), evaluate(board),
+                    result.move, result.score, result.depth)
+
+
+def _analyse_task(task):
+    """Pool entry point: analyse one position given as its masks; return (key, Analysis)."""
+    key, grey, white, kings, turn, depth, time_limit_ms = task
+    return key, analyse(BitBoard(grey, white, kings, turn), depth, time_limit_ms)
+
+
+class AnalysisCache:
+    """An LRU cache of Analysis results keyed by position hash, bounded in bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        """Initialize an empty cache holding at most max_bytes of entries."""
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+
+    def get(self, board):
+        """Get the cached Analysis of a BitBoard, or None."""
+        entry = self._entries.get(board.hash)
+        if entry is None:
+            return None
+        analysis, _ = entry
+        # A different position that happens to share the hash is a miss
+        if analysis.position != position_string(board):
+            return None
+        self._entries.move_to_end(board.hash)
+        return analysis
+
+    def put(self, board, analysis):
+        """Cache an Analysis, evicting the least recently used entries to make room."""
+        key = board.hash
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        size = deep_size(analysis)
+        if size > self._max_bytes:
+            return
+        self._entries[key] = (analysis, size)
+        self._bytes += size
+        while self._bytes > self._max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self._evictions += 1
+
+    def clear(self):
+        """Empty the cache."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Getter for bytes: the estimated size of every cached entry
+    @property
+    def bytes(self):
+        return self._bytes
+
+    # Getter for max_bytes
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    # Getter for evictions
+    @property
+    def evictions(self):
+        return self._evictions
+
+
+class AnalysisService:
+    """Answers analysis requests from a cache, searching the misses in a pool of workers.
+
+    With workers=0 misses are searched in this process. Call close() to
+    stop the workers.
+    """
+
+    def __init__(self, workers=0, depth=DEFAULT_DEPTH, time_limit_ms=DEFAULT_TIME_MS,
+                 cache_bytes=DEFAULT_CACHE_BYTES):
+        """Initialize the AnalysisService and start its worker processes."""
+        self._depth = depth
+        self._time_limit_ms = time_limit_ms
+        self._cache = AnalysisCache(cache_bytes)
+        self._pool = multiprocessing.Pool(workers) if workers > 0 else None
+        self._hits = 0
+        self._misses = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def analyse(self, position):
+        """Analyse one position, given as a compact string or a BitBoard."""
+        return self.analyse_batch([position])[0]
+
+    def analyse_batch(self, positions):
+        """Analyse many positions, in order; each distinct miss is searched once."""
+        start = time.perf_counter()
+        boards = [parse_position(position) if isinstance(position, str) else position
+                  for position in positions]
+        results = []
+        # When each position's answer was ready
+        ready = []
+        missing = {}
+        for board in boards:
+            result = self._cache.get(board)
+            results.append(result)
+            ready.append(time.perf_counter())
+            if result is None:
+                missing.setdefault(board.hash, board)
+                self._misses += 1
+            else:
+                self._hits += 1
+        tasks = [(key, board.grey, board.white, board.kings, board.turn, self._depth,
+                  self._time_limit_ms) for key, board in missing.items()]
+        if self._pool:
+            found = self._pool.imap_unordered(_analyse_task, tasks)
+        else:
+            found = map(_analyse_task, tasks)
+        answers = {}
+        for key, analysis in found:
+            answers[key] = analysis, time.perf_counter()
+            self._cache.put(missing[key], analysis)
+        for index, board in enumerate(boards):
+            if results[index] is None:
+                results[index], ready[index] = answers[board.hash]
+            self._latencies.append((ready[index] - start) * 1000)
+        return results
+
+    def metrics(self):
+        """Get the cache counters and percentiles of recent request latencies as a dictionary."""
+        requests = self._hits + self._misses
+        latencies = list(self._latencies)
+        return {
+            "requests": requests,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / requests if requests else 0.0,
+            "cached": len(self._cache),
+            "cache_bytes": self._cache.bytes,
+            "evictions": self._cache.evictions,
+            "p50_ms": percentile(latencies, 0.50),
+            "p99_ms": percentile(latencies, 0.99),
+        }
+
+    def close(self):
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Getter for cache
+    @property
+    def cache(self):
+        return self._cache
+
+
+def main():
+    """Analyse positions from the command line, printing one JSON line each."""
+    parser = argparse.ArgumentParser(description="Analyse Checkers positions.")
+    parser.add_argument("positions", nargs="*", help="compact position or FEN strings")
+    parser.add_argument("--file", help="file of positions, one per line ('-' for stdin)")
+    parser.add_argument("--workers", type=int, default=0, help="search worker processes")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="search depth in plies")
+    parser.add_argument("--ms", type=float, default=DEFAULT_TIME_MS, help="search time limit")
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_CACHE_BYTES / 2 ** 20)
+    parser.add_argument("--metrics", action="store_true", help="print the metrics at the end")
+    args = parser.parse_args()
+
+    positions = list(args.positions)
+    if args.file == "-":
+        positions += [line.strip() for line in sys.stdin if line.strip()]
+    elif args.file:
+        with open(args.file) as file:
+            positions += [line.strip() for line in file if line.strip()]
+    with AnalysisService(args.workers, args.depth, args.ms, int(args.cache_mb * 2 ** 20)) as service:
+        try:
+            results = service.analyse_batch(positions)
+        except PositionError as error:
+            parser.error(str(error))
+        for analysis in results:
+            print(json.dumps(analysis.to_json()))
+        if args.metrics:
+            print(json.dumps(service.metrics()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
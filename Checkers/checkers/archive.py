@@ -0,0 +1,292 @@
+"""
+Compact binary archive of finished Checkers games.
+
+Layout (all integers little-endian):
+
+    file header   "CKRA", version (1 byte), 3 reserved bytes
+    game          move count (2 bytes), result (1 byte), flags (1 byte),
+                  then 2 bytes per move: from-square (5 bits),
+                  to-square (5 bits) and capture count (4 bits),
+                  followed by the captured squares as a 4-byte mask
+                  when the move captures more than one piece
+    ...
+    index         the file offset of every game (8 bytes each)
+    footer        index offset (8 bytes), game count (4 bytes), "CKRI"
+
+Squares are BitBoard square numbers (0-31). Every game starts from the
+standard position, so replaying the moves rebuilds each position. A
+single jump's captured piece is the square it jumps over; a multi-jump
+keeps its mask, as two jump sequences can share both ends and the number
+of pieces taken.
+
+Run from the Checkers folder:
+    python -m checkers.archive to-binary game_log.txt games.ckr
+    python -m checkers.archive to-text games.ckr game_log.txt
+    python -m checkers.archive info games.ckr
+"""
+
+import argparse
+import json
+import mmap
+import re
+import struct
+from .bitboard import BitBoard, iter_squares, row_col_of, square_of
+from .constants import GREY_PIECES
+
+MAGIC = b"CKRA"
+INDEX_MAGIC = b"CKRI"
+VERSION = 2
+
+_FILE_HEADER = struct.Struct("<4sB3x")
+_GAME_HEADER = struct.Struct("<HBB")
+_FOOTER = struct.Struct("<QI4s")
+_MOVE = struct.Struct("<H")
+_MASK = struct.Struct("<I")
+
+# Game results
+UNKNOWN, GREY_WIN, WHITE_WIN, DRAW = range(4)
+RESULT_NAMES = {UNKNOWN: None, GREY_WIN: "GREY", WHITE_WIN: "WHITE", DRAW: "DRAW"}
+RESULTS = {name: code for code, name in RESULT_NAMES.items()}
+
+_MOVE_LINE = re.compile(r"Move: (\w+) from \((\d+), (\d+)\) to \((\d+), (\d+)\)")
+_REMOVED_LINE = re.compile(r"Removed: (\w+) at \((\d+), (\d+)\)")
+
+
+class ArchiveError(Exception):
+    """Raised for malformed archives or moves that cannot be replayed."""
+
+
+def pack_move(src, dst, captured):
+    """Pack a move given its captured mask: 2 bytes, then the mask after a multi-jump."""
+    captures = captured.bit_count()
+    packed = _MOVE.pack(src | dst << 5 | captures << 10)
+    return packed + _MASK.pack(captured) if captures > 1 else packed
+
+
+def _jumped_square(src, dst):
+    """Get the square a single jump passes over."""
+    row, col = row_col_of(src)
+    to_row, to_col = row_col_of(dst)
+    return square_of((row + to_row) // 2, (col + to_col) // 2)
+
+
+def unpack_moves(buffer, offset, count):
+    """Unpack count moves starting at offset into (from-square, to-square, captured mask) triples."""
+    moves = []
+    for _ in range(count):
+        packed = _MOVE.unpack_from(buffer, offset)[0]
+        offset += _MOVE.size
+        src, dst, captures = packed & 31, packed >> 5 & 31, packed >> 10
+        if captures > 1:
+            captured = _MASK.unpack_from(buffer, offset)[0]
+            offset += _MASK.size
+        elif captures:
+            captured = 1 << _jumped_square(src, dst)
+        else:
+            captured = 0
+        moves.append((src, dst, captured))
+    return moves
+
+
+def resolve_move(engine, src, dst, captured):
+    """Find the BitBoard Move matching an archived move's squares and captured mask."""
+    for move in engine.moves_from(src):
+        if move.dst == dst and move.captured == captured:
+            return move
+    raise ArchiveError(f"no move from {row_col_of(src)} to {row_col_of(dst)} capturing "
+                       f"{[row_col_of(square) for square in iter_squares(captured)]}")
+
+
+def replay(moves, board=None):
+    """Replay archived moves, yielding the board and the Move after each one.
+
+    board may be a BitBoard (the default, starting position) or a Board;
+    moves are made through their move() and remove() methods.
+    """
+    board = board if board is not None else BitBoard()
+    engine = getattr(board, "engine", board)
+    for src, dst, captured in moves:
+        move = resolve_move(engine, src, dst, captured)
+        board.move(board.get_piece(*row_col_of(src)), *row_col_of(dst))
+        if move.captured:
+            board.remove([board.get_piece(*row_col_of(square))
+                          for square in iter_squares(move.captured)])
+        board.change_turn()
+        yield board, move
+
+
+class ArchiveWriter:
+    """Writes games to a new archive file; use as a context manager."""
+
+    def __init__(self, path):
+        """Create the archive file and write its header."""
+        self._file = open(path, "wb")
+        self._file.write(_FILE_HEADER.pack(MAGIC, VERSION))
+        self._offsets = []
+
+    def add_game(self, moves, result=UNKNOWN):
+        """Append a game given as (from-square, to-square, captured mask) triples or Moves."""
+        moves = list(moves)
+        self._offsets.append(self._file.tell())
+        self._file.write(_GAME_HEADER.pack(len(moves), result, 0))
+        self._file.write(b"".join(pack_move(*move) for move in moves))
+
+    def close(self):
+        """Write the index and footer and close the file."""
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        self._file.write(struct.pack(f"<{len(self._offsets)}Q", *self._offsets))
+        self._file.write(_FOOTER.pack(index_offset, len(self._offsets), INDEX_MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ArchiveReader:
+    """Reads games from a memory-mapped archive without loading it all."""
+
+    def __init__(self, path):
+        """Map the archive and read its index."""
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _FILE_HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ArchiveError(f"{path} is not a version {VERSION} game archive")
+        index_offset, count, index_magic = _FOOTER.unpack_from(
+            self._map, len(self._map) - _FOOTER.size
+        )
+        if index_magic != INDEX_MAGIC:
+            raise ArchiveError(f"{path} has no index; was it closed properly?")
+        self._index_offset = index_offset
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, number):
+        """File offset of a game, read from the index."""
+        if not 0 <= number < self._count:
+            raise IndexError(number)
+        return struct.unpack_from("<Q", self._map, self._index_offset + 8 * number)[0]
+
+    def result(self, number):
+        """Get the result code of a game."""
+        return _GAME_HEADER.unpack_from(self._map, self._offset(number))[1]
+
+    def moves(self, number):
+        """Get a game's moves as (from-square, to-square, captured mask) triples."""
+        offset = self._offset(number)
+        count = _GAME_HEADER.unpack_from(self._map, offset)[0]
+        return unpack_moves(self._map, offset + _GAME_HEADER.size, count)
+
+    def games(self):
+        """Yield (result, moves) for every game in order."""
+        for number in range(self._count):
+            yield self.result(number), self.moves(number)
+
+    def positions(self):
+        """Yield (game number, BitBoard) for every position after every move.
+
+        The same BitBoard is updated in place for each game; copy() it to keep it.
+        """
+        for number in range(self._count):
+            for board, _ in replay(self.moves(number)):
+                yield number, board
+
+    def close(self):
+        """Unmap and close the archive."""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_log(path):
+    """Read the games in a text or JSON Lines game log as (result, moves) pairs.
+
+    JSON Lines logs end each game with a record of its result; text logs
+    keep none, so their games are UNKNOWN.
+    """
+    games = []
+    results = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith("{"):
+                record = json.loads(line)
+                event = record["event"]
+                if event == "start":
+                    games.append([])
+                    results.append(UNKNOWN)
+                elif event == "move":
+                    games[-1].append([square_of(*record["from"]), square_of(*record["to"]), 0])
+                elif event == "remove":
+                    games[-1][-1][2] |= 1 << square_of(*record["at"])
+                elif event == "end":
+                    results[-1] = RESULTS.get(record.get("result"), UNKNOWN)
+            elif line == "Game Log":
+                games.append([])
+                results.append(UNKNOWN)
+            elif line.startswith("Move:"):
+                _, *squares = _MOVE_LINE.match(line).groups()
+                row, col, to_row, to_col = map(int, squares)
+                games[-1].append([square_of(row, col), square_of(to_row, to_col), 0])
+            elif line.startswith("Removed:"):
+                _, row, col = _REMOVED_LINE.match(line).groups()
+                games[-1][-1][2] |= 1 << square_of(int(row), int(col))
+    return [(result, [tuple(move) for move in game]) for result, game in zip(results, games)]
+
+
+def write_text_log(games, file):
+    """Write games of archived moves in the original text log format."""
+    for moves in games:
+        file.write("Game Log\n=========\n")
+        for board, move in replay(moves):
+            mover = board.color_at(move.dst)
+            mover_name = "GREY" if mover == GREY_PIECES else "WHITE"
+            captured_name = "WHITE" if mover == GREY_PIECES else "GREY"
+            file.write(f"Move: {mover_name} from {row_col_of(move.src)} to {row_col_of(move.dst)}\n")
+            for square in iter_squares(move.captured):
+                file.write(f"Removed: {captured_name} at {row_col_of(square)}\n")
+
+
+def main():
+    """Convert between text logs and binary archives from the command line."""
+    parser = argparse.ArgumentParser(description="Convert Checkers game logs and archives.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    to_binary = commands.add_parser("to-binary", help="text or JSON Lines log to archive")
+    to_binary.add_argument("log")
+    to_binary.add_argument("archive")
+    to_text = commands.add_parser("to-text", help="archive to text log")
+    to_text.add_argument("archive")
+    to_text.add_argument("log")
+    info = commands.add_parser("info", help="summarize an archive")
+    info.add_argument("archive")
+    args = parser.parse_args()
+
+    if args.command == "to-binary":
+        games = read_log(args.log)
+        with ArchiveWriter(args.archive) as writer:
+            for result, moves in games:
+                writer.add_game(moves, result)
+        print(f"wrote {len(games)} game(s) to {args.archive}")
+    elif args.command == "to-text":
+        with ArchiveReader(args.archive) as reader, open(args.log, "w") as file:
+            write_text_log((moves for _, moves in reader.games()), file)
+    else:
+        with ArchiveReader(args.archive) as reader:
+            moves = sum(len(reader.moves(number)) for number in range(len(reader)))
+            print(f"{len(reader)} game(s), {moves} move(s)")
+
+
+if __name__ == "__main__":
+    main()
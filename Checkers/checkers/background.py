@@ -0,0 +1,236 @@
+"""
+Background thinking: a computer player's search in a worker process.
+
+A search run in the main loop stops the window handling events and
+redrawing until it finishes. A BackgroundThinker runs the Searcher in a
+process of its own instead. think() hands it a position and returns at
+once; the worker sends a Progress message after every completed depth
+(depth, best move, score, nodes per second) and a last one, with done
+set, holding the move to play. The main loop collects them with poll(),
+and a notify function, called from a listener thread for every message,
+can wake it up (main.py posts a pygame event).
+
+With pondering on, the worker goes on searching once it has sent its
+move: it plays the move on its own copy and searches the opponent's
+position with no time limit, filling its transposition table while the
+opponent thinks, until the next request arrives.
+
+cancel() stops a search at once. The worker checks a shared request
+number every few hundred nodes and gives up as soon as it is no longer
+the one it is searching; anything still on its way about a cancelled
+request is dropped. Game.reset and Game.close cancel the game's thinkers.
+
+With more than one worker, each search runs on a ParallelSearcher's pool
+of processes. A daemon process cannot start processes of its own, so a
+thread in the main process drives the pool instead; it spends its time
+waiting, and the window keeps running all the same.
+
+Run from the Checkers folder:
+    python main.py --grey ai --ponder --ai-workers 4
+"""
+
+import multiprocessing
+import queue
+import threading
+from collections import namedtuple
+from .ai import MAX_PLY, Searcher
+from .bitboard import BitBoard
+from .parallel import ParallelSearcher
+from .tablebase import Tablebase
+from .transposition import TranspositionTable
+from .variants import VariantBoard
+
+# Time limit of a ponder search, which only ends when it is stopped
+PONDER_MS = 10 ** 9
+
+# Request number meaning that no search is wanted
+NO_REQUEST = 0
+
+
+class Progress(namedtuple("Progress", "request depth move score nodes nodes_per_second done")):
+    """A report from the worker: the best move so far, or the final one once done."""
+    __slots__ = ()
+
+
+def _board_from_request(variant, grey, white, kings, turn):
+    """Rebuild the engine a request was made from."""
+    if variant is None:
+        return BitBoard(grey, white, kings, turn)
+    return VariantBoard(variant, grey, white, kings, turn)
+
+
+def _think(requests, messages, current, time_limit_ms, max_depth, table_mb, tablebase_dir, ponder,
+           workers):
+    """Worker: search every request still wanted until told to quit."""
+    if workers > 1:
+        parallel = ParallelSearcher(workers, time_limit_ms, max_depth, table_mb or 1, tablebase_dir)
+    else:
+        parallel = None
+        table = TranspositionTable(table_mb) if table_mb else None
+        tablebase = Tablebase(tablebase_dir) if tablebase_dir else None
+
+    def search(board, limit_ms, stop, progress=None):
+        if parallel is None:
+            return Searcher(limit_ms, max_depth, table, tablebase, stop, progress).search(board)
+        parallel.time_limit_ms = limit_ms
+        return parallel.search(board, stop, progress)
+
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            number, variant, grey, white, kings, turn = request
+            if current.value != number:
+                # Cancelled or replaced before it started
+                continue
+
+            def stopped(number=number):
+                return current.value != number
+
+            def report(result, number=number, done=False):
+                messages.put(Progress(number, result.depth, result.move, result.score,
+                                      result.nodes, result.nodes_per_second, done))
+
+            board = _board_from_request(variant, grey, white, kings, turn)
+            result = search(board, time_limit_ms, stopped, report)
+            if stopped():
+                continue
+            report(result, done=True)
+            if ponder and result.move is not None:
+                board.push(result.move)
+                search(board, PONDER_MS, stopped)
+    finally:
+        if parallel is not None:
+            parallel.close()
+    messages.put(None)
+
+
+class BackgroundThinker:
+    """Searches for a computer player's moves in a worker process, or in several.
+
+    Call close() when done to stop the worker.
+    """
+
+    def __init__(self, time_limit_ms=1000, max_depth=MAX_PLY, table_mb=16, tablebase_dir=None,
+                 ponder=False, notify=None, workers=1):
+        """Start the worker; notify, if given, is called with every Progress message.
+
+        With more than one worker, searches run on a ParallelSearcher with
+        that many processes sharing the table, driven from a thread.
+        """
+        self._current = multiprocessing.RawValue("q", NO_REQUEST)
+        self._requests = multiprocessing.Queue()
+        self._messages = multiprocessing.Queue()
+        worker = threading.Thread if workers > 1 else multiprocessing.Process
+        self._process = worker(
+            target=_think,
+            args=(self._requests, self._messages, self._current, time_limit_ms, max_depth,
+                  table_mb, tablebase_dir, ponder, workers),
+            daemon=True,
+        )
+        self._process.start()
+        self._workers = workers
+        self._inbox = queue.Queue()
+        self._notify = notify
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+        self._ponder = ponder
+        self._number = NO_REQUEST
+        self._active = None
+        self._last_result = None
+
+    def _listen(self):
+        """Listener thread: pass the worker's messages on to poll() and notify."""
+        while True:
+            message = self._messages.get()
+            if message is None:
+                return
+            self._inbox.put(message)
+            if self._notify is not None:
+                self._notify(message)
+
+    def think(self, board):
+        """Start searching a BitBoard or VariantBoard for its side to move; return at once.
+
+        Whatever the worker was searching, or pondering, is stopped.
+        """
+        self._number += 1
+        self._active = self._number
+        self._current.value = self._number
+        self._requests.put((self._number, getattr(board, "variant", None),
+                            board.grey, board.white, board.kings, board.turn))
+        return self._number
+
+    def cancel(self):
+        """Stop the current search, or pondering, at once and forget its results."""
+        self._current.value = NO_REQUEST
+        self._active = None
+
+    def poll(self):
+        """Get the Progress messages about the current search that have arrived, oldest first."""
+        messages = []
+        while True:
+            try:
+                message = self._inbox.get_nowait()
+            except queue.Empty:
+                return messages
+            self._accept(message, messages)
+
+    def wait(self, timeout=None):
+        """Wait for the next Progress message about the current search; None on timeout."""
+        while True:
+            try:
+                message = self._inbox.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            messages = []
+            self._accept(message, messages)
+            if messages:
+                return messages[0]
+
+    def _accept(self, message, messages):
+        """Keep a message if it is about the current search."""
+        if message.request != self._active:
+            return
+        if message.done:
+            self._active = None
+            self._last_result = message
+        messages.append(message)
+
+    def close(self):
+        """Stop the search and the worker process."""
+        self.cancel()
+        if self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=5)
+            if self._process.is_alive() and self._workers == 1:
+                self._process.terminate()
+                self._messages.put(None)
+        self._listener.join(timeout=5)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Getter for thinking: True from think() until the move arrives or the search is cancelled
+    @property
+    def thinking(self):
+        return self._active is not None
+
+    # Getter for ponder
+    @property
+    def ponder(self):
+        return self._ponder
+
+    # Getter for workers
+    @property
+    def workers(self):
+        return self._workers
+
+    # Getter for last_result: the final Progress message of the last search
+    @property
+    def last_result(self):
+        return self._last_result
@@ -0,0 +1,180 @@
+"""
+Vectorized evaluation of many positions at once with NumPy.
+
+Positions are encoded either as an N x 32 array of square codes (EMPTY,
+GREY_MAN, GREY_KING, WHITE_MAN, WHITE_KING, one per dark square) or as
+an N x 3 array of bitboard words (grey, white, kings), plus an array of
+the side to move (+1 for grey, -1 for white). Every evaluation term is
+computed for the whole batch with array operations:
+
+    material      men
+    kings         kings
+    advancement   rows each man has moved towards its crowning row
+    center        pieces on the eight central squares
+    back_row      men still guarding their own back row
+    mobility      simple (non-capturing) moves available
+
+Each term is grey's count minus white's; the weighted sum is returned
+from the side to move's point of view, like ai.evaluate.
+
+Apart from the tablebase generator, this is the only module that needs NumPy.
+"""
+
+from collections import namedtuple
+import numpy as np
+from .bitboard import ALL_DIRECTIONS, NEIGHBOURS, UP, DOWN, iter_squares
+from .constants import GREY_PIECES
+
+# Square codes
+EMPTY, GREY_MAN, GREY_KING, WHITE_MAN, WHITE_KING = range(5)
+
+FEATURES = ("material", "kings", "advancement", "center", "back_row", "mobility")
+
+Weights = namedtuple("Weights", FEATURES)
+
+# Material matches ai.MAN_VALUE and ai.KING_VALUE
+DEFAULT_WEIGHTS = Weights(
+    material=100, kings=150, advancement=2, center=5, back_row=8, mobility=3,
+)
+
+# Row of every square
+ROW = np.arange(32) // 4
+
+# The two middle dark squares of rows 2 to 5
+CENTER_SQUARES = (9, 10, 13, 14, 17, 18, 21, 22)
+
+# Back rows: grey starts at the bottom, white at the top
+GREY_BACK_ROW = (28, 29, 30, 31)
+WHITE_BACK_ROW = (0, 1, 2, 3)
+
+# Neighbour of every square in every direction; off-board points at
+# column 32, which the padded arrays below keep occupied
+_NEIGHBOURS = np.array(
+    [[square if square >= 0 else 32 for square in NEIGHBOURS[direction]]
+     for direction in ALL_DIRECTIONS]
+)
+
+_BITS = np.uint32(1) << np.arange(32, dtype=np.uint32)
+
+
+def codes_from_board(board):
+    """Encode a Board or BitBoard as 32 square codes."""
+    engine = getattr(board, "engine", board)
+    codes = [EMPTY] * 32
+    kings = engine.kings
+    for square in iter_squares(engine.grey):
+        codes[square] = GREY_KING if kings >> square & 1 else GREY_MAN
+    for square in iter_squares(engine.white):
+        codes[square] = WHITE_KING if kings >> square & 1 else WHITE_MAN
+    return codes
+
+
+def encode_boards(boards):
+    """Encode Boards or BitBoards as (N x 32 square codes, N sides to move)."""
+    codes = np.array([codes_from_board(board) for board in boards], dtype=np.int8).reshape(-1, 32)
+    turns = np.array([1 if board.turn == GREY_PIECES else -1 for board in boards], dtype=np.int8)
+    return codes, turns
+
+
+def words_from_boards(boards):
+    """Encode Boards or BitBoards as (N x 3 bitboard words, N sides to move)."""
+    engines = [getattr(board, "engine", board) for board in boards]
+    words = np.array([(engine.grey, engine.white, engine.kings) for engine in engines],
+                     dtype=np.uint32).reshape(-1, 3)
+    turns = np.array([1 if engine.turn == GREY_PIECES else -1 for engine in engines], dtype=np.int8)
+    return words, turns
+
+
+def codes_from_words(words):
+    """Turn N x 3 bitboard words (grey, white, kings) into N x 32 square codes."""
+    grey, white, kings = ((words[:, column, None] & _BITS) != 0 for column in range(3))
+    codes = np.zeros(grey.shape, dtype=np.int8)
+    codes[grey] = GREY_MAN
+    codes[white] = WHITE_MAN
+    codes[kings & grey] = GREY_KING
+    codes[kings & white] = WHITE_KING
+    return codes
+
+
+def words_from_codes(codes):
+    """Turn N x 32 square codes into N x 3 bitboard words (grey, white, kings)."""
+    grey = np.isin(codes, (GREY_MAN, GREY_KING))
+    white = np.isin(codes, (WHITE_MAN, WHITE_KING))
+    kings = np.isin(codes, (GREY_KING, WHITE_KING))
+    return np.stack([(mask * _BITS).sum(axis=1, dtype=np.uint32) for mask in (grey, white, kings)],
+                    axis=1)
+
+
+def _mobility(men, kings, empty, forward):
+    """Count the simple moves of one side's men and kings in every position."""
+    moves = np.zeros(len(men), dtype=np.int32)
+    for direction in ALL_DIRECTIONS:
+        target_empty = empty[:, _NEIGHBOURS[direction]]
+        movers = kings | men if direction in forward else kings
+        moves += (movers & target_empty).sum(axis=1)
+    return moves
+
+
+def features(codes):
+    """Compute every evaluation term, grey minus white, as an N x 6 array."""
+    codes = np.asarray(codes)
+    grey_men = codes == GREY_MAN
+    grey_kings = codes == GREY_KING
+    white_men = codes == WHITE_MAN
+    white_kings = codes == WHITE_KING
+    grey = grey_men | grey_kings
+    white = white_men | white_kings
+
+    # Pad with an always-occupied column for moves off the board
+    empty = np.pad(codes == EMPTY, ((0, 0), (0, 1)))
+
+    center = list(CENTER_SQUARES)
+    result = np.empty((len(codes), len(FEATURES)), dtype=np.int32)
+    result[:, 0] = grey_men.sum(axis=1) - white_men.sum(axis=1)
+    result[:, 1] = grey_kings.sum(axis=1) - white_kings.sum(axis=1)
+    result[:, 2] = (grey_men * (7 - ROW)).sum(axis=1) - (white_men * ROW).sum(axis=1)
+    result[:, 3] = grey[:, center].sum(axis=1) - white[:, center].sum(axis=1)
+    result[:, 4] = (grey_men[:, list(GREY_BACK_ROW)].sum(axis=1)
+                    - white_men[:, list(WHITE_BACK_ROW)].sum(axis=1))
+    result[:, 5] = (_mobility(grey_men, grey_kings, empty, UP)
+                    - _mobility(white_men, white_kings, empty, DOWN))
+    return result
+
+
+def evaluate_batch(codes, turns, weights=DEFAULT_WEIGHTS):
+    """Score N positions from the side to move's point of view."""
+    scores = features(codes) @ np.asarray(weights, dtype=np.int32)
+    return scores * np.asarray(turns, dtype=np.int32)
+
+
+def evaluate_words(words, turns, weights=DEFAULT_WEIGHTS):
+    """Score N positions given as bitboard words."""
+    return evaluate_batch(codes_from_words(np.asarray(words, dtype=np.uint32)), turns, weights)
+
+
+def evaluate_position(board, weights=DEFAULT_WEIGHTS):
+    """Score one Board or BitBoard square by square, as a plain Python reference."""
+    codes = codes_from_board(board)
+    terms = [0] * len(FEATURES)
+    for square, code in enumerate(codes):
+        if code == EMPTY:
+            continue
+        sign = 1 if code in (GREY_MAN, GREY_KING) else -1
+        king = code in (GREY_KING, WHITE_KING)
+        row = square // 4
+        if king:
+            terms[1] += sign
+        else:
+            terms[0] += sign
+            terms[2] += sign * (7 - row if sign > 0 else row)
+            if square in (GREY_BACK_ROW if sign > 0 else WHITE_BACK_ROW):
+                terms[4] += sign
+        if square in CENTER_SQUARES:
+            terms[3] += sign
+        directions = ALL_DIRECTIONS if king else (UP if sign > 0 else DOWN)
+        for direction in directions:
+            target = NEIGHBOURS[direction][square]
+            if target >= 0 and codes[target] == EMPTY:
+                terms[5] += sign
+    score = sum(weight * term for weight, term in zip(weights, terms))
+    return score if board.turn == GREY_PIECES else -score
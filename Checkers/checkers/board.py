@@ -2,204 +2,230 @@
 Board class for managing the Checkers game board.
 """
 
-import pygame
-from .constants import BLACK, ROWS, GREY_PIECES, SQUARE_SIZE, COLS, WHITE
-from .piece import Piece, King
+from .constants import ROWS, COLS, GREY_PIECES, WHITE
+from .piece import Piece
+from .bitboard import BitBoard, iter_squares, row_col_of, square_of
 from .abstract_classes import AbstractBoard
+from .pdn import board_string, format_fen, parse_board_string, parse_fen
+
+# The game is drawn when a position occurs this many times
+REPETITIONS = 3
+
+# ... or after this many plies in a row with no capture and no man moved
+DRAW_PLIES = 80
 
 class Board(AbstractBoard):
-    """Represents the Checkers game board."""
-    _instance = None
-
-    def __new__(cls, *args, **kwargs):
-        """Ensure only one instance of the Game class is created (Singleton pattern)."""
-        if cls._instance is None:
-            cls._instance = super(Board, cls).__new__(cls)
-        return cls._instance
-
-    def __init__(self):
-        """Initialize the Board."""
-        if not hasattr(self, "_initialized"):
-            self._board = []
-            self._selected_piece = None
-            self._grey_left = 12
-            self._white_left = 12
-            self.create_board()
-            self._winner_declared = False
-            self._initialized = True
+    """Represents the Checkers game board.
+
+    The position itself lives in a BitBoard engine; the Board keeps a grid
+    of Piece objects in step with it for rendering and piece selection.
+
+    The result of the game is worked out once per ply, when the turn
+    passes, and kept until the next ply, so winner() never searches for
+    moves. The plies since the last capture or man move and the positions
+    seen since then are counted for the draw rules.
+
+    The grid and the square numbers are 8x8, so the engine must be a
+    BitBoard or an 8x8 VariantBoard.
+    """
+    def __init__(self, engine=None):
+        """Initialize the Board, by default with the starting position."""
+        variant = getattr(engine, "variant", None)
+        if variant is not None and variant.size != ROWS:
+            raise ValueError(f"a Board holds 8x8 positions, not {variant.size}x{variant.size}")
+        self._engine = engine if engine is not None else BitBoard()
+        self._board = None
+        self._selected_piece = None
+        self._quiet_plies = 0
+        self._positions = {self._engine.hash: 1}
+        self._irreversible = False
+        self._undo = []
+        self._update_result()
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Create a Board from a FEN string."""
+        return cls(parse_fen(fen))
+
+    @classmethod
+    def from_string(cls, text, turn=GREY_PIECES):
+        """Create a Board from a compact 32-character string and the side to move."""
+        return cls(parse_board_string(text, turn))
+
+    def to_fen(self):
+        """Get the position, with the side to move, as a FEN string."""
+        return format_fen(self._engine)
+
+    def to_string(self):
+        """Get the pieces as a compact 32-character string."""
+        return board_string(self._engine)
+
+    def copy(self):
+        """Return an independent copy of the board.
+
+        Only the engine's masks and the draw rule counts are copied; the
+        grid of pieces is rebuilt from them the first time the copy is
+        drawn or queried.
+        """
+        board = Board(self._engine.copy())
+        board._quiet_plies = self._quiet_plies
+        board._positions = dict(self._positions)
+        board._update_result()
+        return board
+
+    def _update_result(self):
+        """Work out whether the side to move has lost or the game is drawn."""
+        engine = self._engine
+        turn = engine.turn
+        other = WHITE if turn == GREY_PIECES else GREY_PIECES
+        self._winner, self._reason = None, None
+        if not engine.pieces(turn):
+            self._winner, self._reason = other, "no pieces"
+        elif not (engine.movers(turn) or engine.jumpers(turn)):
+            self._winner, self._reason = other, "no moves"
+        elif self._positions.get(engine.hash, 0) >= REPETITIONS:
+            self._reason = "repetition"
+        elif self._quiet_plies >= DRAW_PLIES:
+            self._reason = "move rule"
+
+    def _record_ply(self, irreversible):
+        """Count the position reached by a ply and update the result."""
+        if irreversible:
+            # Earlier positions can never occur again
+            self._quiet_plies = 0
+            self._positions = {}
+        else:
+            self._quiet_plies += 1
+        key = self._engine.hash
+        self._positions[key] = self._positions.get(key, 0) + 1
+        self._update_result()
+
+    def push(self, move):
+        """Make an engine move in place; pop() undoes it."""
+        irreversible = bool(move.captured) or not self._engine.kings >> move.src & 1
+        self._undo.append((self._quiet_plies, self._positions if irreversible else None))
+        self._engine.push(move)
+        self._board = None
+        self._record_ply(irreversible)
+
+    def pop(self):
+        """Undo the last move made with push()."""
+        self._quiet_plies, positions = self._undo.pop()
+        if positions is None:
+            key = self._engine.hash
+            self._positions[key] -= 1
+            if not self._positions[key]:
+                del self._positions[key]
+        else:
+            self._positions = positions
+        self._engine.pop()
+        self._board = None
+        self._update_result()
+
+    def change_turn(self):
+        """Pass the move to the other side, ending the ply."""
+        self._engine.change_turn()
+        self._record_ply(self._irreversible)
+        self._irreversible = False
 
     def get_all_pieces(self, color):
         """Get all pieces of a specific color on the board."""
-        pieces = []
-        for row in self._board:
-            for piece in row:
-                if piece != 0 and piece.color == color:
-                    pieces.append(piece)
-        return pieces
+        grid = self.board
+        return [
+            grid[row][col]
+            for row, col in map(row_col_of, iter_squares(self._engine.pieces(color)))
+        ]
 
     def draw_squares(self, win):
         """Draw the squares of the board."""
-        win.fill(BLACK)
-        for row in range(ROWS):
-            for col in range(row % 2, COLS, 2):
-                pygame.draw.rect(
-                    win, 
-                    WHITE, 
-                    (row * SQUARE_SIZE, col * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
-                )
+        from . import render  # Imported lazily so the engine never loads pygame
+        render.draw_squares(win)
 
     def move(self, piece, row, col):
         """Move a piece to a new position."""
-        self._board[piece.row][piece.col], self._board[row][col] = (
-            self._board[row][col], 
-            self._board[piece.row][piece.col]
+        grid = self.board
+        self._irreversible |= not piece.king
+        self._engine.move(piece, row, col)
+        grid[piece.row][piece.col], grid[row][col] = (
+            grid[row][col],
+            grid[piece.row][piece.col]
         )
         piece.move(row, col)
-        if row == ROWS - 1 or row == 0:
-            self.board[row][col] = King(row, col, piece.color)
-            
+        if self._engine.get_piece(row, col).king and not piece.king:
+            piece.promote()
 
     def get_piece(self, row, col):
         """Get the piece at a specific position."""
-        return self._board[row][col]
+        return self.board[row][col]
 
     def create_board(self):
-        """Create the initial board setup."""
+        """Create the grid of pieces for the engine's position."""
+        self._board = []
         for row in range(ROWS):
             self._board.append([])
             for col in range(COLS):
-                if col % 2 == ((row + 1) % 2):
-                    if row < 3:
-                        self._board[row].append(Piece(row, col, WHITE))
-                    elif row > 4:
-                        self._board[row].append(Piece(row, col, GREY_PIECES))
-                    else:
-                        self._board[row].append(0)
-                else:
+                piece = self._engine.get_piece(row, col)
+                if piece == 0:
                     self._board[row].append(0)
+                else:
+                    self._board[row].append(Piece(row, col, piece.color, piece.king))
 
     def draw(self, win):
         """Draw the board and all pieces."""
         self.draw_squares(win)
         for row in range(ROWS):
             for col in range(COLS):
-                piece = self._board[row][col]
+                piece = self.board[row][col]
                 if piece != 0:
                     piece.draw(win)
 
     def remove(self, pieces):
         """Remove pieces from the board."""
+        grid = self.board
+        self._irreversible |= bool(pieces)
+        self._engine.remove(pieces)
         for piece in pieces:
-            self._board[piece.row][piece.col] = 0
-            if piece != 0:
-                if piece.color == GREY_PIECES:
-                    self._grey_left -= 1
-                else:
-                    self._white_left -= 1
+            grid[piece.row][piece.col] = 0
 
     def winner(self):
-        """Determine the winner of the game."""
-        if self.winner_declared:
-            return None
-        if self.grey_left <= 0:
-            self.winner_declared = True
-            return print("WHITE")
-        elif self.white_left <= 0:
-            self.winner_declared = True
-            return print("GREY")
-
-        return None
+        """Get the color that has won, or None while the game goes on or is drawn."""
+        return self._winner
 
-    def get_valid_moves(self, piece):
-        """Get all valid moves for a given piece."""
-        moves = {}
-        left = piece.col - 1
-        right = piece.col + 1
-        row = piece.row
-        
-        if piece.color == GREY_PIECES or piece.king:
-            moves.update(self._traverse_left(row - 1, max(row - 3, -1), -1, piece.color, left))
-            moves.update(self._traverse_right(row - 1, max(row - 3, -1), -1, piece.color, right))
-
-        if piece.color == WHITE or piece.king:
-            moves.update(self._traverse_left(row + 1, min(row + 3, ROWS), 1, piece.color, left))
-            moves.update(self._traverse_right(row + 1, min(row + 3, ROWS), 1, piece.color, right))
+    def get_legal_moves(self, piece):
+        """Get the moves a piece may make under the full rules.
 
-        return moves
-        
-    def _traverse_left(self, start, stop, step, color, left, skipped=[]):
-        """Helper function to check left diagonals for valid moves."""
+        Unlike get_valid_moves, captures are compulsory for the whole side
+        and a jump sequence must be completed.
+        """
+        grid = self.board
         moves = {}
-        last = []
-        for r in range(start, stop, step):
-            if left < 0: # Stop if out of bounds
-                break
-
-            current = self._board[r][left]
-            if current == 0: # Empty square
-                if skipped and not last: # If there are skipped pieces but no piece to jump over
-                    break
-                elif skipped: # Valid jump
-                    moves[(r, left)] = last + skipped
-                else: # Regular move
-                    moves[(r, left)] = last
-
-                if last: # Continue checking for further jumps
-                    row = -1 if step == -1 else ROWS
-                    moves.update(self._traverse_left(r + step, row, step, color, left - 1, skipped=last))
-                    moves.update(self._traverse_right(r + step, row, step, color, left + 1, skipped=last))
-                break
-
-            elif current.color == color: # Same color, stop
-                break
-            else: # Opponent's piece
-                last = [current]
-
-            left -= 1
-
+        square = square_of(piece.row, piece.col)
+        for move in self._engine.generate_moves(piece.color):
+            if move.src == square:
+                moves[row_col_of(move.dst)] = [
+                    grid[row][col] for row, col in map(row_col_of, iter_squares(move.captured))
+                ]
         return moves
 
-
-    def _traverse_right(self, start, stop, step, color, right, skipped=[]):
-        """Helper function to check right diagonals for valid moves."""
+    def get_valid_moves(self, piece):
+        """Get all valid moves for a given piece."""
         moves = {}
-        last = []
-        for r in range(start, stop, step):
-            if right >= COLS: # Stop if out of bounds
-                break
-
-            current = self._board[r][right]
-            if current == 0: # Empty square
-                if skipped and not last: # If there are skipped pieces but no piece to jump over
-                    break
-                elif skipped: # Valid jump
-                    moves[(r, right)] = last + skipped
-                else: # Regular move
-                    moves[(r, right)] = last
-
-                if last:
-                    if step == -1:
-                        row = max(r - 3, 0)
-                    else:
-                        row = min(r + 3, ROWS)
-                    moves.update(self._traverse_left(r + step, row, step, color, right - 1, skipped=last))
-                    moves.update(self._traverse_right(r + step, row, step, color, right + 1, skipped=last))
-                break
-
-            elif current.color == color: # Same color, stop
-                break
-            else: # Opponent's piece
-                last = [current]
-
-            right += 1
-
+        for square, captured in self._engine.get_valid_moves(piece).items():
+            moves[square] = [self.board[p.row][p.col] for p in captured]
         return moves
-    
-    # Getter for board
+
+    # Getter for board, building the grid on first use
     @property
     def board(self):
+        if self._board is None:
+            self.create_board()
         return self._board
 
+    # Getter for engine
+    @property
+    def engine(self):
+        return self._engine
+
     # Getter and Setter for selected_piece
     @property
     def selected_piece(self):
@@ -212,18 +238,35 @@ class Board(AbstractBoard):
     # Getter for grey_left
     @property
     def grey_left(self):
-        return self._grey_left
+        return self._engine.grey_left
 
     # Getter for white_left
     @property
     def white_left(self):
-        return self._white_left
+        return self._engine.white_left
 
-    # Getter and Setter for winner_declared
+    # Getter and Setter for turn
     @property
-    def winner_declared(self):
-        return self._winner_declared
+    def turn(self):
+        return self._engine.turn
 
-    @winner_declared.setter
-    def winner_declared(self, value):
-        self._winner_declared = value
\ No newline at end of file
+    @turn.setter
+    def turn(self, turn):
+        self._engine.turn = turn
+        self._update_result()
+
+    # Getter for game_over: True once the game is won or drawn
+    @property
+    def game_over(self):
+        return self._reason is not None
+
+    # Getter for reason: why the game ended ("no pieces", "no moves",
+    # "repetition" or "move rule"), or None while it goes on
+    @property
+    def reason(self):
+        return self._reason
+
+    # Getter for quiet_plies: plies since the last capture or man move
+    @property
+    def quiet_plies(self):
+        return self._quiet_plies
\ No newline at end of file
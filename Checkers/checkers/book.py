@@ -0,0 +1,246 @@
+"""
+Opening book: moves played from known positions, with their results.
+
+A book is built from game archives, game logs and self-play games. Every
+position in a game's first plies is keyed by its Zobrist hash, and every
+move played from it counts the games and how they ended for the player
+who made it.
+
+Layout (all integers little-endian), entries sorted by key:
+
+    header   "CKBK", version (1 byte), 3 reserved bytes, entry count (4 bytes)
+    entry    key (8 bytes), from-square (1), to-square (1), 2 reserved bytes,
+             captured mask (4), games (4), wins (4), draws (4), losses (4)
+
+The file is memory-mapped and searched by bisection, so a lookup reads
+O(log n) entries and the book is never loaded whole.
+
+Run from the Checkers folder:
+    python -m checkers.book build book.ckb --archive games.ckr --log game_log.txt
+    python -m checkers.book build book.ckb --self-play 50 --player ai:ms=20
+    python -m checkers.book show book.ckb
+"""
+
+import argparse
+import mmap
+import random
+import struct
+from collections import namedtuple
+from .archive import ArchiveReader, GREY_WIN, WHITE_WIN, DRAW, UNKNOWN, read_log, replay
+from .bitboard import BitBoard, Move, row_col_of
+from .constants import GREY_PIECES, WHITE
+
+MAGIC = b"CKBK"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sB3xI")
+_ENTRY = struct.Struct("<QBB2xIIIII")
+_KEY = struct.Struct("<Q")
+
+# Plies of each game added to the book
+DEFAULT_PLIES = 24
+
+
+class BookMove(namedtuple("BookMove", "move games wins draws losses")):
+    """A book move with the results of the games it was played in."""
+    __slots__ = ()
+
+    @property
+    def win_rate(self):
+        """Score of the player making the move (a draw counts half), or None if unknown."""
+        decided = self.wins + self.draws + self.losses
+        if not decided:
+            return None
+        return (self.wins + self.draws / 2) / decided
+
+    @property
+    def weight(self):
+        """How strongly to prefer the move: games played, scaled by the win rate."""
+        win_rate = self.win_rate
+        return self.games * (0.5 if win_rate is None else win_rate)
+
+
+class BookError(Exception):
+    """Raised for a file that is not an opening book."""
+
+
+class BookBuilder:
+    """Counts the moves and results of games and writes them as a book."""
+
+    def __init__(self, plies=DEFAULT_PLIES):
+        """Initialize an empty BookBuilder that keeps each game's first plies."""
+        self._plies = plies
+        self._positions = {}
+        self._games = 0
+
+    def add_game(self, moves, result=UNKNOWN):
+        """Add a game given as archived (from-square, to-square, captured mask) triples."""
+        self._games += 1
+        key = BitBoard().hash
+        for board, move in replay(moves[:self._plies]):
+            mover = WHITE if board.turn == GREY_PIECES else GREY_PIECES
+            counts = self._positions.setdefault(key, {}).setdefault(move, [0, 0, 0, 0])
+            counts[0] += 1
+            if result == DRAW:
+                counts[2] += 1
+            elif result in (GREY_WIN, WHITE_WIN):
+                won = (result == GREY_WIN) == (mover == GREY_PIECES)
+                counts[1 if won else 3] += 1
+            key = board.hash
+
+    def add_archive(self, path):
+        """Add every game in a binary archive."""
+        with ArchiveReader(path) as reader:
+            for result, moves in reader.games():
+                self.add_game(moves, result)
+
+    def add_log(self, path):
+        """Add every game in a text or JSON Lines game log, with the results it records."""
+        for result, moves in read_log(path):
+            self.add_game(moves, result)
+
+    def write(self, path, min_games=1):
+        """Write the moves played in at least min_games games; return the entry count."""
+        entries = []
+        for key, moves in self._positions.items():
+            for move, (games, wins, draws, losses) in moves.items():
+                if games >= min_games:
+                    entries.append((key, move.src, move.dst, move.captured,
+                                    games, wins, draws, losses))
+        entries.sort(key=lambda entry: (entry[0], -entry[4]))
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(MAGIC, VERSION, len(entries)))
+            for entry in entries:
+                file.write(_ENTRY.pack(*entry))
+        return len(entries)
+
+    # Getter for games
+    @property
+    def games(self):
+        return self._games
+
+    # Getter for positions
+    @property
+    def positions(self):
+        return len(self._positions)
+
+
+class OpeningBook:
+    """Looks moves up in a memory-mapped book file; use as a context manager."""
+
+    def __init__(self, path, seed=None):
+        """Map the book file; seed makes the choice between book moves repeatable."""
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise BookError(f"{path} is not a version {VERSION} opening book")
+        self._count = count
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self._count
+
+    def _key(self, number):
+        """Key of the entry at a position in the file."""
+        return _KEY.unpack_from(self._map, _HEADER.size + number * _ENTRY.size)[0]
+
+    def lookup(self, board):
+        """Get the book's legal moves for a BitBoard position, most played first."""
+        key = board.hash
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        legal = set(board.generate_moves())
+        moves = []
+        for number in range(low, self._count):
+            entry_key, src, dst, captured, *results = _ENTRY.unpack_from(
+                self._map, _HEADER.size + number * _ENTRY.size
+            )
+            if entry_key != key:
+                break
+            move = Move(src, dst, captured)
+            # Skip the moves of another position that happens to share the hash
+            if move in legal:
+                moves.append(BookMove(move, *results))
+        return moves
+
+    def choose_move(self, board):
+        """Pick a book move at random, weighted by games and win rate; None if out of book."""
+        moves = self.lookup(board)
+        if not moves:
+            return None
+        weights = [book_move.weight for book_move in moves]
+        if not any(weights):
+            return moves[0].move
+        return self._random.choices(moves, weights)[0].move
+
+    def close(self):
+        """Unmap and close the book."""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def self_play(builder, games, player, workers=0, opening_plies=2, seed=1):
+    """Add self-play games between two copies of a player spec to a builder."""
+    from .tournament import parse_args, run_tournament
+    args = parse_args([
+        "--games", str(games), "--workers", str(workers),
+        "--player-a", player, "--player-b", player,
+        "--opening-plies", str(opening_plies), "--seed", str(seed),
+    ])
+    return run_tournament(args, archive=builder)
+
+
+def main():
+    """Build or show an opening book from the command line."""
+    parser = argparse.ArgumentParser(description="Build and inspect Checkers opening books.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a book from games")
+    build.add_argument("book")
+    build.add_argument("--archive", action="append", default=[], help="binary game archive")
+    build.add_argument("--log", action="append", default=[], help="text or JSON Lines game log")
+    build.add_argument("--self-play", type=int, default=0, metavar="GAMES",
+                       help="self-play games to add")
+    build.add_argument("--player", default="ai:ms=20", help="player spec for self-play")
+    build.add_argument("--workers", type=int, default=0, help="self-play worker processes")
+    build.add_argument("--plies", type=int, default=DEFAULT_PLIES, help="plies of each game to keep")
+    build.add_argument("--min-games", type=int, default=1,
+                       help="leave out moves played in fewer games")
+    show = commands.add_parser("show", help="list the book moves from the starting position")
+    show.add_argument("book")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        builder = BookBuilder(args.plies)
+        for path in args.archive:
+            builder.add_archive(path)
+        for path in args.log:
+            builder.add_log(path)
+        if args.self_play:
+            self_play(builder, args.self_play, args.player, args.workers)
+        entries = builder.write(args.book, args.min_games)
+        print(f"{builder.games} game(s), {builder.positions} position(s), "
+              f"{entries} book move(s) written to {args.book}")
+    else:
+        with OpeningBook(args.book) as book:
+            print(f"{len(book)} book move(s)")
+            for book_move in book.lookup(BitBoard()):
+                move = book_move.move
+                win_rate = book_move.win_rate
+                print(f"{row_col_of(move.src)}-{row_col_of(move.dst)}  {book_move.games} game(s)"
+                      + ("" if win_rate is None else f", scores {win_rate:.0%}"))
+
+
+if __name__ == "__main__":
+    main()
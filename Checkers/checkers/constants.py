@@ -2,8 +2,6 @@
 Constants for the Checkers game.
 """
 
-import pygame
-
 # Window dimensions
 WIDTH = 800
 HEIGHT = 800
@@ -18,7 +16,9 @@ BLACK=(0, 0, 0)
 BLUE=(0, 0, 255)
 GREY_BORDER=(128, 128, 128)
 
-# Crown image for kings
-CROWN=pygame.transform.scale(
-    pygame.image.load('checkers/assets/crown.png'), (62, 50)
-)
\ No newline at end of file
+def __getattr__(name):
+    """Load the crown image for kings only when it is first used."""
+    if name == "CROWN":
+        from .render import get_crown
+        return get_crown()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,41 +1,76 @@
 """Game class for managing the Checkers game logic."""
 
-import pygame
-from .constants import WHITE, GREY_PIECES, BLUE, SQUARE_SIZE
+from .constants import ROWS, WHITE, GREY_PIECES
 from .board import Board
+from .bitboard import iter_squares, row_col_of
+from .game_logger import GameLogger
 from .abstract_classes import AbstractGame
+from .variants import AMERICAN, VariantBoard, new_board
 
 class Game(AbstractGame):
     """Manages the Checkers game logic, including moves, turns, and logging."""
-    _instance = None  # Class-level attribute to hold the single instance
-
-    def __new__(cls, *args, **kwargs):
-        """Ensure only one instance of the Game class is created (Singleton pattern)."""
-        if cls._instance is None:
-            cls._instance = super(Game, cls).__new__(cls)
-        return cls._instance
-
-    def __init__(self, win):
-        """Initialize the Game instance."""
-        if not hasattr(self, "_initialized"):
-            self._init()
-            self._win = win
-            self._log_file = "game_log.txt"
-            self._clear_log()
-            self._initialized = True
+    def __init__(self, win, logger=None, variant=AMERICAN):
+        """Initialize the Game instance.
+
+        Moves are recorded by logger, by default a GameLogger appending JSON
+        Lines to game_log.jsonl; pass GameLogger(None) to turn logging off.
+        The rules are the variant's; only 8x8 variants can be played, as the
+        board and the window are 8x8, and ValueError is raised for others.
+        """
+        if variant.size != ROWS:
+            raise ValueError(f"{variant.name} is played on a {variant.size}x{variant.size} board; "
+                             f"games need an {ROWS}x{ROWS} variant")
+        self._variant = variant
+        self._init()
+        self._win = win
+        self._renderer = None
+        self._book = None
+        self._thinkers = ()
+        self._logger = logger if logger is not None else GameLogger()
+        self._logger.start_game()
 
     def _init(self): # Needed when resetting only certain attributes
         """Initialize the game state."""
         self._selected_piece = None
-        self._board = Board()
-        self._turn = GREY_PIECES
+        self._board = Board(new_board(self._variant))
         self.valid_moves = {}
+        self._in_book = True
+
+    def copy(self):
+        """Return an independent copy of the game sharing only the window.
 
-    def _clear_log(self):
-        """Clear the log file at the start of the game."""
-        with open(self._log_file, "w") as file:
-            file.write("Game Log\n")
-            file.write("=========\n")
+        The copy does not log its moves, so simulating moves on it leaves
+        the original game's log untouched.
+        """
+        game = Game.__new__(Game)
+        game._win = self._win
+        game._variant = self._variant
+        game._renderer = None
+        game._thinkers = ()
+        game._book = self._book
+        game._in_book = self._in_book
+        game._logger = GameLogger(None)
+        game._board = self._board.copy()
+        game._selected_piece = None
+        game.valid_moves = {}
+        if self._selected_piece:
+            game.select(self._selected_piece.row, self._selected_piece.col)
+        return game
+
+    def load_fen(self, fen):
+        """Set up the position and side to move from a FEN string."""
+        self._board = Board.from_fen(fen)
+        if self._variant != AMERICAN:
+            engine = self._board.engine
+            self._board = Board(VariantBoard(self._variant, engine.grey, engine.white,
+                                             engine.kings, engine.turn))
+        self._selected_piece = None
+        self.valid_moves = {}
+        self._in_book = False
+
+    def to_fen(self):
+        """Get the position and side to move as a FEN string."""
+        return self._board.to_fen()
 
     def _get_color_name(self, color):
         """Map RGB color to its name."""
@@ -46,43 +81,80 @@ class Game(AbstractGame):
         return "UNKNOWN"
 
     def _log_move(self, piece, start_pos, end_pos):
-        """Log a move to the file."""
-        color_name = self._get_color_name(piece.color)
-        with open(self._log_file, "a") as file:
-            file.write(f"Move: {color_name} from {start_pos} to {end_pos}\n")
+        """Log a move."""
+        self._logger.log_move(self._get_color_name(piece.color), start_pos, end_pos)
 
     def _log_removed_pieces(self, removed_pieces):
-        """Log removed pieces to the file."""
-        with open(self._log_file, "a") as file:
-            for piece in removed_pieces:
-                color_name = self._get_color_name(piece.color)
-                file.write(f"Removed: {color_name} at ({piece.row}, {piece.col})\n")
+        """Log removed pieces."""
+        for piece in removed_pieces:
+            self._logger.log_removed(self._get_color_name(piece.color), (piece.row, piece.col))
 
     def update(self):
-        """Update the game state and redraw the board."""
+        """Update the game state and redraw the board.
+
+        With a renderer set, only changed squares are redrawn and an
+        unchanged frame is skipped; returns whether anything was drawn.
+        """
+        if self._renderer is not None:
+            return bool(self._renderer.render(self._board.engine, self.valid_moves))
+        from . import render  # Imported lazily so the engine never loads pygame
         self._board.draw(self._win)
         self.draw_valid_moves(self.valid_moves)
-        pygame.display.update()
+        render.update_display()
+        return True
 
     def winner(self):
-        """Determine the winner of the game."""
+        """Determine the winner of the game, or None while it goes on or is drawn."""
         return self._board.winner()
 
+    def result(self):
+        """Describe how the game ended, e.g. "WHITE (no moves)", or None while it goes on."""
+        if not self._board.game_over:
+            return None
+        winner = self._board.winner()
+        name = self._get_color_name(winner) if winner else "DRAW"
+        return f"{name} ({self._board.reason})"
+
     def reset(self):
-        """Reset the game state to its initial configuration."""
+        """Reset the game state to its initial configuration, cancelling any search."""
+        self._cancel_thinking()
+        self._end_log()
         self._init()
+        self._logger.start_game()
+
+    def close(self):
+        """Cancel any search, end the game in the log and flush it."""
+        self._cancel_thinking()
+        self._end_log()
+        self._logger.close()
+
+    def _end_log(self):
+        """End the game in the log with its winner, DRAW, or None if it was not finished."""
+        winner = self._board.winner()
+        if winner:
+            result = self._get_color_name(winner)
+        else:
+            result = "DRAW" if self._board.game_over else None
+        self._logger.end_game(result)
+
+    def _cancel_thinking(self):
+        """Stop the background searches of the game's computer players."""
+        for thinker in self._thinkers:
+            thinker.cancel()
 
     def select(self, row, col):
-        """Select a piece."""
+        """Select a piece; nothing can be selected once the game is over."""
+        if self._board.game_over:
+            return False
         if self._selected_piece:
             result = self._move(row, col)
             if not result:
                 self._selected_piece = None
                 self.select(row, col)
         piece = self._board.get_piece(row, col)
-        if piece != 0 and piece.color == self._turn:
+        if piece != 0 and piece.color == self.turn:
             self._selected_piece = piece
-            self.valid_moves = self._board.get_valid_moves(piece)
+            self.valid_moves = self._board.get_legal_moves(piece)
             return True
         return False
 
@@ -90,32 +162,96 @@ class Game(AbstractGame):
         """Move a piece to a new position."""
         piece = self._board.get_piece(row, col)
         if self._selected_piece and piece == 0 and (row, col) in self.valid_moves:
-            start_pos = (self._selected_piece.row, self._selected_piece.col)
-            self._board.move(self._selected_piece, row, col)
-            end_pos = (row, col)
-            self._log_move(self._selected_piece, start_pos, end_pos)
-            skipped = self.valid_moves[(row, col)]
-            if skipped:
-                self._board.remove(skipped)
-                self._log_removed_pieces(skipped)
-            self.change_turn()
+            self._play(self._selected_piece, row, col, self.valid_moves[(row, col)])
         else:
             return False
         return True
+
+    def _play(self, piece, row, col, skipped):
+        """Move a piece, remove the pieces it jumped and pass the turn."""
+        start_pos = (piece.row, piece.col)
+        self._board.move(piece, row, col)
+        end_pos = (row, col)
+        self._log_move(piece, start_pos, end_pos)
+        if skipped:
+            self._board.remove(skipped)
+            self._log_removed_pieces(skipped)
+        self.change_turn()
+
+    def play_move(self, move):
+        """Play an engine Move (e.g. chosen by an AIPlayer) for the side to move."""
+        piece = self._board.get_piece(*row_col_of(move.src))
+        skipped = [
+            self._board.get_piece(*row_col_of(square))
+            for square in iter_squares(move.captured)
+        ]
+        self._selected_piece = None
+        self._play(piece, *row_col_of(move.dst), skipped)
             
+    def play_book_move(self):
+        """Play the opening book's move for the side to move; return False once out of book."""
+        # Opening books are built from american games
+        if self._book is None or not self._in_book or self._variant != AMERICAN:
+            return False
+        move = self._book.choose_move(self._board.engine)
+        if move is None:
+            self._in_book = False
+            return False
+        self.play_move(move)
+        return True
+
     def draw_valid_moves(self, moves):
         """Draw valid moves on the board."""
-        for move in moves:
-            row, col = move
-            pygame.draw.circle(self._win, BLUE, (col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2), 15)
+        from . import render
+        render.draw_valid_moves(self._win, moves)
 
     def change_turn(self):
         """Change the current player's turn."""
         self.valid_moves = {}
-        if self._turn == GREY_PIECES:
-            self._turn = WHITE
-        else:
-            self._turn = GREY_PIECES
+        self._board.change_turn()
+
+    # Getter for variant
+    @property
+    def variant(self):
+        return self._variant
+
+    # Getter for logger
+    @property
+    def logger(self):
+        return self._logger
+
+    # Getter and Setter for renderer
+    @property
+    def renderer(self):
+        return self._renderer
+
+    @renderer.setter
+    def renderer(self, renderer):
+        self._renderer = renderer
+
+    # Getter and Setter for thinkers: BackgroundThinkers to cancel on reset and close
+    @property
+    def thinkers(self):
+        return self._thinkers
+
+    @thinkers.setter
+    def thinkers(self, thinkers):
+        self._thinkers = tuple(thinkers)
+
+    # Getter and Setter for book
+    @property
+    def book(self):
+        return self._book
+
+    @book.setter
+    def book(self, book):
+        self._book = book
+        self._in_book = True
+
+    # Getter for in_book: False once the book has no move for a position
+    @property
+    def in_book(self):
+        return self._in_book
 
     # Getter for win
     @property
@@ -145,11 +281,16 @@ class Game(AbstractGame):
     def board(self, board):
         self._board = board
 
-    # Getter and Setter for _turn
+    # Getter for game_over, kept by the board
+    @property
+    def game_over(self):
+        return self._board.game_over
+
+    # Getter and Setter for turn, kept by the board
     @property
     def turn(self):
-        return self._turn
+        return self._board.turn
 
     @turn.setter
     def turn(self, turn):
-        self._turn = turn
\ No newline at end of file
+        self._board.turn = turn
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+GameLogger class for recording Checkers games.
+
+The logger keeps one file handle open and buffers records in memory,
+writing them out when the buffer fills, when enough time has passed, when
+a game ends or when the logger is closed. Time is checked as records
+arrive and whenever tick() is called, so a main loop calls tick() while
+it waits to flush a buffer that has gone quiet.
+"""
+
+import atexit
+import json
+import time
+import uuid
+
+# Record formats
+JSONL = "jsonl"  # One JSON object per line, with game IDs and timestamps
+TEXT = "text"    # The original free-text "Move: GREY from (5, 4) to (4, 5)" log
+FORMATS = (JSONL, TEXT)
+
+DEFAULT_LOG_FILE = "game_log.jsonl"
+
+
+class GameLogger:
+    """Buffers game events and writes them to a single open file."""
+
+    def __init__(self, target=DEFAULT_LOG_FILE, fmt=JSONL, buffer_size=64,
+                 flush_interval=1.0, mode="a"):
+        """Initialize the logger.
+
+        target is a path, an open text stream to redirect records to, or
+        None to turn logging off. A path is appended to by default, so
+        earlier games are kept; pass mode="w" to start the file afresh.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown log format: {fmt!r}")
+        self._format = fmt
+        self._buffer = []
+        self._buffer_size = buffer_size
+        self._flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._game_id = None
+        self._owns_file = False
+        if target is None:
+            self._file = None
+        elif hasattr(target, "write"):
+            self._file = target
+        else:
+            self._file = open(target, mode)
+            self._owns_file = True
+            atexit.register(self.close)
+
+    def start_game(self, game_id=None):
+        """Start recording a new game and return its ID."""
+        self._game_id = game_id or uuid.uuid4().hex[:12]
+        if self._format == TEXT:
+            self._write("Game Log\n=========\n")
+        else:
+            self._record({"event": "start"})
+        return self._game_id
+
+    def log_move(self, color, start_pos, end_pos):
+        """Record a move by the named color from one (row, col) to another."""
+        if self._format == TEXT:
+            self._write(f"Move: {color} from {tuple(start_pos)} to {tuple(end_pos)}\n")
+        else:
+            self._record({"event": "move", "color": color,
+                          "from": list(start_pos), "to": list(end_pos)})
+
+    def log_removed(self, color, pos):
+        """Record that a piece of the named color was captured at (row, col)."""
+        if self._format == TEXT:
+            self._write(f"Removed: {color} at {tuple(pos)}\n")
+        else:
+            self._record({"event": "remove", "color": color, "at": list(pos)})
+
+    def end_game(self, result=None):
+        """Record the end of the current game and flush it to the file."""
+        if self._game_id is None:
+            return
+        if self._format == JSONL:
+            self._record({"event": "end", "result": result})
+        self._game_id = None
+        self.flush()
+
+    def _record(self, record):
+        """Stamp a record with the game ID and time and buffer it as JSON."""
+        if self._file is None:
+            return
+        record["game"] = self._game_id
+        record["time"] = round(time.time(), 3)
+        self._write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def _write(self, line):
+        """Buffer a line, flushing once the size or time threshold is reached."""
+        if self._file is None:
+            return
+        self._buffer.append(line)
+        if (len(self._buffer) >= self._buffer_size
+                or time.monotonic() - self._last_flush >= self._flush_interval):
+            self.flush()
+
+    def tick(self):
+        """Flush the buffer if flush_interval has passed since the last flush."""
+        if self._buffer and time.monotonic() - self._last_flush >= self._flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered records to the file."""
+        if self._buffer and self._file is not None:
+            self._file.write("".join(self._buffer))
+            self._file.flush()
+            self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush the buffer and close the file if the logger opened it."""
+        self.flush()
+        if self._owns_file and not self._file.closed:
+            self._file.close()
+            atexit.unregister(self.close)
+
+    # Getter for enabled
+    @property
+    def enabled(self):
+        return self._file is not None
+
+    # Getter for game_id
+    @property
+    def game_id(self):
+        return self._game_id
+
+    # Getter for format
+    @property
+    def format(self):
+        return self._format
@@ -0,0 +1,236 @@
+"""
+Optional instrumentation of the game's hot paths.
+
+A Profiler replaces the functions listed in TARGETS with timing wrappers
+when it is enabled and puts the originals back when it is disabled, so
+nothing is measured, and nothing costs anything, unless profiling was
+asked for. For every function it counts calls and keeps the total time
+(outermost calls only, so recursion is not counted twice) and every
+call's duration for the p50 and p99. With memory tracing on, tracemalloc
+runs while the profiler is enabled and the report lists the peak traced
+memory and the lines holding the most memory when it is disabled,
+leaving out the profiler's own bookkeeping.
+
+Time spent in each chain of instrumented calls is kept as folded stacks,
+one line per stack such as "Game.update;Board.draw 1234" (microseconds
+of self time), the input format of flamegraph.pl, inferno and speedscope.
+
+The rules engine replaced the original recursive _traverse_left and
+_traverse_right helpers, so the jump generator bitboard._jump_moves is
+measured in their place.
+
+Run from the Checkers folder:
+    python main.py --profile --profile-folded game.folded
+    python -m checkers.tournament --games 4 --profile --profile-memory
+    python -m checkers.perft --depth 6 --profile
+"""
+
+import atexit
+import functools
+import importlib
+import sys
+import time
+import tracemalloc
+from array import array
+from collections import defaultdict
+from .measure import percentile
+
+# (module, class or None for a module function, function name)
+TARGETS = (
+    ("checkers.board", "Board", "get_valid_moves"),
+    ("checkers.board", "Board", "get_legal_moves"),
+    ("checkers.board", "Board", "move"),
+    ("checkers.board", "Board", "remove"),
+    ("checkers.board", "Board", "change_turn"),
+    ("checkers.board", "Board", "draw"),
+    ("checkers.game", "Game", "update"),
+    ("checkers.game", "Game", "select"),
+    ("checkers.game", "Game", "play_move"),
+    ("checkers.bitboard", "BitBoard", "generate_moves"),
+    ("checkers.bitboard", "BitBoard", "moves_from"),
+    ("checkers.bitboard", "BitBoard", "push"),
+    ("checkers.bitboard", "BitBoard", "pop"),
+    ("checkers.bitboard", None, "_jump_moves"),
+    ("checkers.ai", "Searcher", "search"),
+    ("checkers.ai", "Searcher", "_negamax"),
+    ("checkers.ai", "Searcher", "_quiesce"),
+    ("checkers.ai", None, "evaluate"),
+    ("checkers.render", "Renderer", "render"),
+)
+
+# Modules only instrumented if something else has loaded them
+_OPTIONAL_MODULES = ("checkers.render",)
+
+# Allocation sites listed in the report
+TOP_ALLOCATIONS = 10
+
+
+class FunctionStats:
+    """Calls and time of one instrumented function."""
+
+    def __init__(self, name):
+        """Initialize empty FunctionStats."""
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.active = 0
+        self.samples = array("d")
+
+    def percentile(self, fraction):
+        """Get a percentile of the call durations, in seconds."""
+        return percentile(self.samples, fraction)
+
+
+class Profiler:
+    """Wraps the TARGETS functions with timers while enabled."""
+
+    def __init__(self, trace_memory=False):
+        """Initialize a disabled Profiler; trace_memory turns on tracemalloc while enabled."""
+        self._trace_memory = trace_memory
+        self._started_tracing = False
+        self._stats = {}
+        self._folded = defaultdict(float)
+        self._stack = []
+        self._patched = []
+        self._allocations = []
+        self._peak_memory = 0
+
+    def enable(self, targets=TARGETS):
+        """Replace every target that can be found with a timing wrapper."""
+        if self._patched:
+            return
+        if self._trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        for module_name, class_name, name in targets:
+            if module_name in _OPTIONAL_MODULES and module_name not in sys.modules:
+                continue
+            module = importlib.import_module(module_name)
+            owner = getattr(module, class_name) if class_name else module
+            # A method may be inherited, e.g. BitBoard.push from BitBoardBase
+            inherited = name not in owner.__dict__
+            original = getattr(owner, name) if inherited else owner.__dict__[name]
+            label = f"{class_name}.{name}" if class_name else f"{module_name.rsplit('.', 1)[-1]}.{name}"
+            setattr(owner, name, self._wrap(label, original))
+            self._patched.append((owner, name, None if inherited else original))
+
+    def disable(self):
+        """Put the original functions back and stop tracing memory."""
+        for owner, name, original in reversed(self._patched):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patched = []
+        if self._started_tracing:
+            self._peak_memory = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ))
+            self._allocations = snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _wrap(self, label, function):
+        """Build the timing wrapper for one function."""
+        stats = self._stats.setdefault(label, FunctionStats(label))
+        stack = self._stack
+        folded = self._folded
+        clock = time.perf_counter
+        record = stats.samples.append
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            # A frame is (stack of labels, time spent in instrumented callees)
+            frame = ((stack[-1][0] if stack else ()) + (label,), [0.0])
+            stack.append(frame)
+            stats.active += 1
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stack.pop()
+                stats.active -= 1
+                stats.calls += 1
+                record(elapsed)
+                if not stats.active:
+                    stats.total += elapsed
+                if stack:
+                    stack[-1][1][0] += elapsed
+                folded[frame[0]] += elapsed - frame[1][0]
+
+        return wrapper
+
+    def report(self):
+        """Describe the measurements as a table, slowest function first."""
+        self_time = defaultdict(float)
+        for path, seconds in self._folded.items():
+            self_time[path[-1]] += seconds
+        lines = [f"{'function':<26}{'calls':>10}{'total ms':>11}{'self ms':>10}"
+                 f"{'p50 us':>9}{'p99 us':>10}"]
+        for stats in sorted(self._stats.values(), key=lambda stats: stats.total, reverse=True):
+            if not stats.calls:
+                continue
+            lines.append(
+                f"{stats.name:<26}{stats.calls:>10}{stats.total * 1000:>11.1f}"
+                f"{self_time[stats.name] * 1000:>10.1f}{stats.percentile(0.50) * 1e6:>9.1f}"
+                f"{stats.percentile(0.99) * 1e6:>10.1f}"
+            )
+        if self._peak_memory:
+            lines.append("")
+            lines.append(f"peak traced memory: {self._peak_memory / 1024:.1f} KB; "
+                         "largest allocations still held:")
+            for statistic in self._allocations:
+                frame = statistic.traceback[0]
+                lines.append(f"  {statistic.size / 1024:>9.1f} KB  {statistic.count:>7} blocks  "
+                             f"{frame.filename}:{frame.lineno}")
+        return "\n".join(lines)
+
+    def write_folded(self, path):
+        """Write the folded stacks, self time in microseconds, for flame-graph tools."""
+        with open(path, "w") as file:
+            for stack, seconds in sorted(self._folded.items()):
+                microseconds = round(seconds * 1e6)
+                if microseconds:
+                    file.write(f"{';'.join(stack)} {microseconds}\n")
+
+    # Getter for stats: FunctionStats by function label
+    @property
+    def stats(self):
+        return self._stats
+
+    # Getter for enabled
+    @property
+    def enabled(self):
+        return bool(self._patched)
+
+
+def add_arguments(parser):
+    """Add the profiling options to a command line parser."""
+    parser.add_argument("--profile", action="store_true",
+                        help="time the game's hot paths and print a report at exit")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="also trace allocations with tracemalloc (implies --profile)")
+    parser.add_argument("--profile-folded", metavar="FILE",
+                        help="write folded stacks for flame-graph tools (implies --profile)")
+
+
+def start_from_args(args, out=None):
+    """Enable a Profiler if the options ask for one; report at exit. Returns it or None."""
+    if not (args.profile or args.profile_memory or args.profile_folded):
+        return None
+    profiler = Profiler(trace_memory=args.profile_memory)
+    profiler.enable()
+
+    def finish():
+        profiler.disable()
+        print(profiler.report(), file=out or sys.stderr)
+        if args.profile_folded:
+            profiler.write_folded(args.profile_folded)
+
+    atexit.register(finish)
+    return profiler
@@ -0,0 +1,152 @@
+"""
+Load generator for the Checkers game server.
+
+Opens a number of connections and plays a number of games on each at the
+same time. Every game picks random legal moves and sends them as two
+select requests (the piece, then its destination), waiting for each
+reply. Request latency and completed moves are reported at the end.
+
+Run from the Checkers folder, with the server running:
+    python -m checkers.loadgen --connections 8 --sessions 50 --seconds 10
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from .bitboard import BitBoard, row_col_of
+from .constants import GREY_PIECES, WHITE
+from .measure import percentile
+from .server import DEFAULT_PORT
+
+
+class Client:
+    """One connection to the server, matching replies to requests by id."""
+
+    def __init__(self, reader, writer):
+        """Initialize the Client around an open stream."""
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._waiting = {}
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    @classmethod
+    async def connect(cls, host, port):
+        """Open a connection to the server."""
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, **request):
+        """Send a request and wait for its reply."""
+        request_id = next(self._ids)
+        reply = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = reply
+        self._writer.write(json.dumps(dict(request, id=request_id)).encode() + b"\n")
+        await self._writer.drain()
+        return await reply
+
+    async def _read_loop(self):
+        """Hand every reply to the request waiting for it; pushes are ignored."""
+        try:
+            async for line in self._reader:
+                message = json.loads(line)
+                reply = self._waiting.pop(message.get("id"), None)
+                if reply is not None and not reply.done():
+                    reply.set_result(message)
+        finally:
+            for reply in self._waiting.values():
+                if not reply.done():
+                    reply.set_exception(ConnectionError("server closed the connection"))
+
+    async def close(self):
+        """Close the connection."""
+        self._writer.close()
+        await asyncio.gather(self._read_task, return_exceptions=True)
+
+
+def choose_move(state, rng):
+    """Pick a random legal move from a state message, or None if there is none."""
+    turn = GREY_PIECES if state["turn"] == "GREY" else WHITE
+    moves = BitBoard(state["grey"], state["white"], state["kings"], turn).generate_moves()
+    return rng.choice(moves) if moves else None
+
+
+async def play_games(client, deadline, stats, rng):
+    """Play random games on one session until the deadline, starting a new game as each ends."""
+    state = await client.request(op="new")
+    while time.perf_counter() < deadline:
+        move = choose_move(state, rng) if state["result"] is None else None
+        if move is None or state["moves"] >= 200:
+            await client.request(op="close", session=state["session"])
+            state = await client.request(op="new")
+            stats["games"] += 1
+            continue
+        for square in (move.src, move.dst):
+            row, col = row_col_of(square)
+            start = time.perf_counter()
+            state = await client.request(op="select", session=state["session"], row=row, col=col)
+            stats["latencies"].append(time.perf_counter() - start)
+            if state["type"] != "state":
+                stats["errors"] += 1
+                return
+        if state.get("moved"):
+            stats["moves"] += 1
+        else:
+            stats["errors"] += 1
+
+
+async def run_load(host, port, connections, sessions, seconds, seed=1):
+    """Play games on many connections for some seconds; return the measurements."""
+    rng = random.Random(seed)
+    stats = {"moves": 0, "games": 0, "errors": 0, "latencies": []}
+    clients = [await Client.connect(host, port) for _ in range(connections)]
+    start = time.perf_counter()
+    deadline = start + seconds
+    await asyncio.gather(*(
+        play_games(client, deadline, stats, random.Random(rng.random()))
+        for client in clients for _ in range(sessions)
+    ))
+    elapsed = time.perf_counter() - start
+    server_stats = await clients[0].request(op="stats")
+    for client in clients:
+        await client.close()
+    latencies = stats.pop("latencies")
+    return dict(
+        stats,
+        requests=len(latencies),
+        seconds=elapsed,
+        moves_per_second=stats["moves"] / elapsed,
+        p50_ms=percentile(latencies, 0.50) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        server=server_stats,
+    )
+
+
+def main():
+    """Run the load generator from the command line and print its measurements."""
+    parser = argparse.ArgumentParser(description="Load-test the Checkers game server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=50, help="games per connection")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load(args.host, args.port, args.connections, args.sessions,
+                                  args.seconds, args.seed))
+    server = result["server"]
+    print(f"{args.connections * args.sessions} games on {args.connections} connections "
+          f"for {result['seconds']:.1f}s")
+    print(f"{result['moves']} moves ({result['moves_per_second']:.0f} moves/s), "
+          f"{result['requests']} requests, {result['errors']} errors")
+    print(f"latency p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+    print(f"server: {server['sessions']} sessions, "
+          f"about {server['bytes_per_session']:,} bytes per session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Measuring helpers shared by the game server, its load generator, the
+analysis service and the profiler.
+"""
+
+import gc
+import sys
+import types
+
+
+def deep_size(obj):
+    """Estimate the bytes used by an object and everything only it refers to.
+
+    Classes, modules and functions are shared by every object, and so is
+    anything a module holds as a global (a Variant, key tables, sys.stdout),
+    so none of them is counted or walked into.
+    """
+    shared = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+    seen = {id(value) for module in list(sys.modules.values())
+            for value in list(getattr(module, "__dict__", {}).values())}
+    seen.discard(id(obj))
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, shared):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        stack.extend(gc.get_referents(item))
+    return size
+
+
+def percentile(values, fraction):
+    """Get a percentile of a sequence of numbers, or 0.0 if it is empty."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
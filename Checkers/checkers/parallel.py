@@ -0,0 +1,173 @@
+"""
+Parallel search: several processes searching one position together.
+
+The search is Lazy SMP. Every worker process runs the ordinary
+iterative-deepening Searcher on the same position, and all of them share
+one SharedTranspositionTable. The tree is not split between them; they
+speed each other up through the table, each finding results the others
+have already stored. Odd-numbered workers start a ply deeper so they
+fill the table ahead of the rest.
+
+As soon as one worker finishes, the others are told to stop. The result
+of the deepest completed search is returned, preferring the lowest
+worker number, with the nodes of every worker added up.
+
+Like a Searcher, a search can be given a stop function, checked while
+the workers run, and a progress function, called with a SearchResult
+each time a worker completes a depth none has completed before.
+
+Run from the Checkers folder:
+    python -m benchmarks.parallel --workers 1 2 4
+"""
+
+import multiprocessing
+import queue
+import time
+from .ai import MAX_PLY, SearchResult, Searcher
+from .bitboard import BitBoard
+from .tablebase import Tablebase
+from .transposition import SharedTranspositionTable
+from .variants import VariantBoard
+
+# Seconds between checks of the stop function and the workers' reports
+POLL_SECONDS = 0.01
+
+# State of a worker process, set up by _init_worker
+_worker = {}
+
+
+def _init_worker(table_name, table_mb, stop, reports, tablebase_dir):
+    """Attach a worker process to the shared table, stop flag and report queue."""
+    _worker["table"] = SharedTranspositionTable(table_mb, table_name)
+    _worker["stop"] = stop
+    _worker["reports"] = reports
+    _worker["tablebase"] = Tablebase(tablebase_dir) if tablebase_dir else None
+
+
+def _search_worker(task):
+    """Search one position in a worker; return (worker number, SearchResult)."""
+    search, number, variant, grey, white, kings, turn, time_limit_ms, max_depth = task
+    stop = _worker["stop"]
+    reports = _worker["reports"]
+
+    def report(result):
+        reports.put((search, number, result))
+
+    if variant is None:
+        board = BitBoard(grey, white, kings, turn)
+    else:
+        board = VariantBoard(variant, grey, white, kings, turn)
+    searcher = Searcher(time_limit_ms, max_depth, _worker["table"], _worker["tablebase"],
+                        stop=lambda: stop.value, progress=report)
+    result = searcher.search(board, first_depth=1 + number % 2)
+    # Tell the other workers to stop once one has finished
+    stop.value = 1
+    return number, result
+
+
+class ParallelSearcher:
+    """Searches with a pool of worker processes sharing a transposition table.
+
+    It has the same search() method as a Searcher. The pool and shared
+    memory stay alive between searches; call close() when done.
+    """
+
+    def __init__(self, workers=2, time_limit_ms=1000, max_depth=MAX_PLY, table_mb=16,
+                 tablebase_dir=None):
+        """Start the worker processes and create the shared table of table_mb megabytes."""
+        self._workers = workers
+        self._time_limit_ms = time_limit_ms
+        self._max_depth = min(max_depth, MAX_PLY)
+        self._table = SharedTranspositionTable(table_mb)
+        self._stop = multiprocessing.RawValue("b", 0)
+        self._reports = multiprocessing.Queue()
+        self._pool = multiprocessing.Pool(
+            workers, _init_worker,
+            (self._table.name, self._table.size_mb, self._stop, self._reports, tablebase_dir),
+        )
+        self._searches = 0
+        self._worker_results = []
+
+    def search(self, board, stop=None, progress=None):
+        """Search a BitBoard or VariantBoard with every worker and return the best SearchResult.
+
+        stop and progress work as they do for a Searcher.
+        """
+        start = time.perf_counter()
+        self._stop.value = 0
+        self._searches += 1
+        tasks = [
+            (self._searches, number, getattr(board, "variant", None),
+             board.grey, board.white, board.kings, board.turn,
+             self._time_limit_ms, self._max_depth)
+            for number in range(self._workers)
+        ]
+        pending = self._pool.map_async(_search_worker, tasks)
+        nodes = [0] * self._workers
+        deepest = 0
+        while not pending.ready():
+            pending.wait(POLL_SECONDS)
+            if stop is not None and stop():
+                self._stop.value = 1
+            # Pass on each depth the first time any worker completes it
+            while True:
+                try:
+                    search, number, result = self._reports.get_nowait()
+                except queue.Empty:
+                    break
+                if search != self._searches:
+                    continue  # Left over from an earlier search
+                nodes[number] = result.nodes
+                if result.depth > deepest:
+                    deepest = result.depth
+                    if progress is not None:
+                        elapsed_ms = (time.perf_counter() - start) * 1000
+                        progress(SearchResult(result.move, result.score, result.depth,
+                                              sum(nodes), elapsed_ms))
+        results = sorted(pending.get())
+        self._worker_results = [result for _, result in results]
+        number, best = max(results, key=lambda item: (item[1].depth, -item[0]))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        nodes = sum(result.nodes for result in self._worker_results)
+        return SearchResult(best.move, best.score, best.depth, nodes, elapsed_ms)
+
+    def clear(self):
+        """Empty the shared transposition table."""
+        self._table.clear()
+
+    def close(self):
+        """Stop the worker processes and free the shared table."""
+        self._pool.close()
+        self._pool.join()
+        self._reports.close()
+        self._table.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Getter for workers
+    @property
+    def workers(self):
+        return self._workers
+
+    # Getter for table
+    @property
+    def table(self):
+        return self._table
+
+    # Getter for worker_results: each worker's SearchResult from the last search
+    @property
+    def worker_results(self):
+        return self._worker_results
+
+    # Getter and Setter for time_limit_ms
+    @property
+    def time_limit_ms(self):
+        return self._time_limit_ms
+
+    @time_limit_ms.setter
+    def time_limit_ms(self, value):
+        self._time_limit_ms = value
@@ -0,0 +1,362 @@
+"""
+Reading and writing positions and games in FEN and PDN.
+
+PDN numbers the dark squares 1 to 32 with Black on 1-12 moving first.
+Grey moves first here, so grey is Black, and PDN square n is BitBoard
+square 32 - n (the board seen from the other side). The starting
+position in FEN is "B:W21,...,32:B1,...,12"; kings are marked with a K
+and ranges such as "1-12" are accepted when reading.
+
+Boards can also be given as compact strings of 32 characters, one per
+BitBoard square in order (row by row from the top, left to right):
+
+    .   empty
+    g   grey man        G   grey king
+    w   white man       W   white king
+
+read_games streams a PDN file one game at a time, keeping only the game
+being read in memory, so collections of any size can be processed. Its
+moves are the squares written in the file; PDNGame.replay checks them
+against the legal moves.
+
+Run from the Checkers folder:
+    python -m checkers.pdn info games.pdn
+    python -m checkers.pdn to-archive games.pdn games.ckr
+    python -m checkers.pdn from-archive games.ckr games.pdn
+"""
+
+import argparse
+import re
+from collections import namedtuple
+from .archive import ArchiveReader, ArchiveWriter, GREY_WIN, WHITE_WIN, DRAW, UNKNOWN, replay
+from .bitboard import ALL_DIRECTIONS, NEIGHBOURS, BitBoard, iter_squares
+from .constants import GREY_PIECES, WHITE
+
+# Characters of the compact board string
+SQUARE_CHARS = ".gGwW"
+
+START_FEN = "B:W21,22,23,24,25,26,27,28,29,30,31,32:B1,2,3,4,5,6,7,8,9,10,11,12"
+
+# Result tokens and the archive result codes they stand for
+RESULT_TOKENS = {GREY_WIN: "1-0", WHITE_WIN: "0-1", DRAW: "1/2-1/2", UNKNOWN: "*"}
+RESULTS = {"1-0": GREY_WIN, "2-0": GREY_WIN, "0-1": WHITE_WIN, "0-2": WHITE_WIN,
+           "1/2-1/2": DRAW, "1-1": DRAW, "*": UNKNOWN}
+
+# Longest line of move text written
+LINE_WIDTH = 79
+
+_TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_TOKEN = re.compile(r"""
+    (?P<open>\{) | (?P<close>\}) | (?P<variation>\() | (?P<end>\)) | (?P<rest>;) |
+    (?P<result>(?:1-0|0-1|2-0|0-2|1-1|1/2-1/2|\*)(?![\w/-])) |
+    (?P<number>\d+\.+) |
+    (?P<move>\d+(?:[-x:]\d+)+)
+""", re.VERBOSE)
+_SEPARATOR = re.compile(r"[-x:]")
+
+
+class PDNError(ValueError):
+    """Raised for malformed FEN, board strings or PDN moves."""
+
+
+class PDNGame(namedtuple("PDNGame", "tags moves result")):
+    """A game read from PDN: its tags, its moves as tuples of PDN squares and its result token."""
+    __slots__ = ()
+
+    def start(self):
+        """Get the starting position, from the FEN tag if there is one."""
+        fen = self.tags.get("FEN")
+        return parse_fen(fen) if fen else BitBoard()
+
+    def replay(self):
+        """Replay the moves, yielding the BitBoard and the Move after each one."""
+        board = self.start()
+        for path in self.moves:
+            move = resolve_move(board, path)
+            board.push(move)
+            yield board, move
+
+    def engine_moves(self):
+        """Get the game's moves as BitBoard Moves, checking each is legal."""
+        return [move for _, move in self.replay()]
+
+    def archive_moves(self):
+        """Get the moves as (from-square, to-square, captured mask) triples for an archive."""
+        return [tuple(move) for move in self.engine_moves()]
+
+    # Getter for archive_result: the result as an archive result code
+    @property
+    def archive_result(self):
+        return RESULTS.get(self.result, UNKNOWN)
+
+
+def to_pdn(square):
+    """Turn a BitBoard square into a PDN square number."""
+    return 32 - square
+
+
+def from_pdn(number):
+    """Turn a PDN square number into a BitBoard square."""
+    if not 1 <= number <= 32:
+        raise PDNError(f"square {number} is not between 1 and 32")
+    return 32 - number
+
+
+def board_string(board):
+    """Turn a Board or BitBoard into a compact 32-character string."""
+    engine = getattr(board, "engine", board)
+    chars = []
+    for square in range(32):
+        bit = 1 << square
+        king = bool(engine.kings & bit)
+        if engine.grey & bit:
+            chars.append("G" if king else "g")
+        elif engine.white & bit:
+            chars.append("W" if king else "w")
+        else:
+            chars.append(".")
+    return "".join(chars)
+
+
+def parse_board_string(text, turn=GREY_PIECES):
+    """Turn a compact 32-character string and the side to move into a BitBoard."""
+    if len(text) != 32:
+        raise PDNError(f"expected 32 squares, got {len(text)} in {text!r}")
+    grey = white = kings = 0
+    for square, char in enumerate(text):
+        if char not in SQUARE_CHARS:
+            raise PDNError(f"unknown square {char!r} in {text!r}")
+        bit = 1 << square
+        if char in "gG":
+            grey |= bit
+        elif char in "wW":
+            white |= bit
+        if char in "GW":
+            kings |= bit
+    return BitBoard(grey, white, kings, turn)
+
+
+def format_fen(board):
+    """Turn a Board or BitBoard into a FEN string."""
+    engine = getattr(board, "engine", board)
+    fields = ["B" if engine.turn == GREY_PIECES else "W"]
+    for name, pieces in (("W", engine.white), ("B", engine.grey)):
+        men = sorted(to_pdn(square) for square in iter_squares(pieces & ~engine.kings))
+        kings = sorted(to_pdn(square) for square in iter_squares(pieces & engine.kings))
+        fields.append(name + ",".join([str(number) for number in men]
+                                      + [f"K{number}" for number in kings]))
+    return ":".join(fields)
+
+
+def parse_fen(text):
+    """Turn a FEN string, such as a PDN FEN tag's value, into a BitBoard."""
+    fields = text.strip().strip('"').rstrip(".").split(":")
+    if not fields[0] or fields[0][0].upper() not in "BW":
+        raise PDNError(f"FEN {text!r} does not start with the side to move")
+    turn = GREY_PIECES if fields[0][0].upper() == "B" else WHITE
+    masks = {"B": [0, 0], "W": [0, 0]}
+    for field in fields[1:]:
+        field = field.strip()
+        if not field:
+            continue
+        color = field[0].upper()
+        if color not in masks:
+            raise PDNError(f"FEN {text!r} has a field for an unknown color: {field!r}")
+        for item in field[1:].split(","):
+            item = item.strip()
+            if not item:
+                continue
+            king = item[0].upper() == "K"
+            first, _, last = item.lstrip("Kk").partition("-")
+            try:
+                numbers = range(int(first), int(last.lstrip("Kk") or first) + 1)
+            except ValueError:
+                raise PDNError(f"FEN {text!r} has a bad square {item!r}") from None
+            for number in numbers:
+                masks[color][0] |= 1 << from_pdn(number)
+                if king:
+                    masks[color][1] |= 1 << from_pdn(number)
+    grey, grey_kings = masks["B"]
+    white, white_kings = masks["W"]
+    if grey & white:
+        raise PDNError(f"FEN {text!r} puts two pieces on one square")
+    return BitBoard(grey, white, grey_kings | white_kings, turn)
+
+
+def jump_path(board, move):
+    """Get the squares a capture lands on in order, starting with its from-square."""
+    empty = ~(board.grey | board.white) | 1 << move.src
+    stack = [(move.src, move.captured, (move.src,))]
+    while stack:
+        square, left, path = stack.pop()
+        if not left:
+            if square == move.dst:
+                return list(path)
+            continue
+        for direction in ALL_DIRECTIONS:
+            over = NEIGHBOURS[direction][square]
+            land = NEIGHBOURS[direction][over] if over >= 0 else -1
+            if land >= 0 and left >> over & 1 and empty >> land & 1:
+                stack.append((land, left & ~(1 << over), path + (land,)))
+    return [move.src, move.dst]
+
+
+def resolve_move(board, path):
+    """Find the legal BitBoard Move written as a tuple of PDN squares."""
+    src, dst = from_pdn(path[0]), from_pdn(path[-1])
+    moves = [move for move in board.generate_moves() if move.src == src and move.dst == dst]
+    if not moves:
+        raise PDNError(f"{'-'.join(map(str, path))} is not a legal move in {format_fen(board)}")
+    if len(moves) > 1 and len(path) > 2:
+        squares = [from_pdn(number) for number in path]
+        for move in moves:
+            if jump_path(board, move) == squares:
+                return move
+    return moves[0]
+
+
+def format_move(board, move):
+    """Write a legal BitBoard Move in PDN, with every landing square if that is needed."""
+    if not move.captured:
+        return f"{to_pdn(move.src)}-{to_pdn(move.dst)}"
+    same_squares = [other for other in board.generate_moves()
+                    if other.src == move.src and other.dst == move.dst]
+    squares = jump_path(board, move) if len(same_squares) > 1 else [move.src, move.dst]
+    return "x".join(str(to_pdn(square)) for square in squares)
+
+
+def _scan(lines):
+    """Yield ("tag", name, value), ("move", path) and ("result", token) from PDN lines.
+
+    Comments, variations, move numbers and annotations are skipped.
+    """
+    in_comment = False
+    depth = 0
+    for line in lines:
+        if not in_comment and line.startswith("%"):
+            continue
+        if not in_comment and not depth and line.lstrip().startswith("["):
+            for name, value in _TAG.findall(line):
+                yield "tag", name, value.replace('\\"', '"')
+            continue
+        for token in _TOKEN.finditer(line):
+            kind = token.lastgroup
+            if in_comment:
+                in_comment = kind != "close"
+            elif kind == "open":
+                in_comment = True
+            elif kind == "rest":
+                break
+            elif kind == "variation":
+                depth += 1
+            elif kind == "end":
+                depth = max(0, depth - 1)
+            elif depth:
+                continue
+            elif kind == "move":
+                yield "move", tuple(int(number) for number in _SEPARATOR.split(token.group()))
+            elif kind == "result":
+                yield "result", token.group()
+
+
+def read_games(file):
+    """Yield every game in a PDN file as a PDNGame, one at a time."""
+    tags, moves = {}, []
+    for kind, *value in _scan(file):
+        if kind == "tag":
+            if moves:
+                # A new game started without a result for the last one
+                yield PDNGame(tags, moves, tags.get("Result", "*"))
+                tags, moves = {}, []
+            tags[value[0]] = value[1]
+        elif kind == "move":
+            moves.append(value[0])
+        else:
+            yield PDNGame(tags, moves, value[0])
+            tags, moves = {}, []
+    if tags or moves:
+        yield PDNGame(tags, moves, tags.get("Result", "*"))
+
+
+def write_game(file, moves, result=UNKNOWN, tags=None, start=None):
+    """Write a game of BitBoard Moves as PDN.
+
+    result is an archive result code. tags are written in order before
+    the Result tag, and a FEN tag is added when start is not the
+    standard starting position.
+    """
+    board = start.copy() if start is not None else BitBoard()
+    token = RESULT_TOKENS[result]
+    tags = dict(tags or {})
+    fen = format_fen(board)
+    if fen != START_FEN:
+        tags["SetUp"], tags["FEN"] = "1", fen
+    tags["Result"] = token
+    for name, value in tags.items():
+        escaped = str(value).replace('"', '\\"')
+        file.write(f'[{name} "{escaped}"]\n')
+    words = []
+    number = 1
+    if board.turn == WHITE and moves:
+        words.append("1...")
+    for move in moves:
+        # Keep each move number on the same line as its move
+        if board.turn == GREY_PIECES:
+            words.append(f"{number}. {format_move(board, move)}")
+        else:
+            words.append(format_move(board, move))
+            number += 1
+        board.push(move)
+    words.append(token)
+    line = ""
+    for word in words:
+        if line and len(line) + 1 + len(word) > LINE_WIDTH:
+            file.write(line + "\n")
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    file.write(line + "\n\n")
+
+
+def main():
+    """Inspect and convert PDN files from the command line."""
+    parser = argparse.ArgumentParser(description="Read and write Checkers games in PDN.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="count the games, moves and results in a PDN file")
+    info.add_argument("pdn")
+    to_archive = commands.add_parser("to-archive", help="PDN to binary archive")
+    to_archive.add_argument("pdn")
+    to_archive.add_argument("archive")
+    from_archive = commands.add_parser("from-archive", help="binary archive to PDN")
+    from_archive.add_argument("archive")
+    from_archive.add_argument("pdn")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        games = moves = 0
+        results = dict.fromkeys(RESULT_TOKENS.values(), 0)
+        with open(args.pdn) as file:
+            for game in read_games(file):
+                games += 1
+                moves += len(game.moves)
+                results[RESULT_TOKENS[game.archive_result]] += 1
+        print(f"{games} game(s), {moves} move(s); "
+              + ", ".join(f"{token}: {count}" for token, count in results.items()))
+    elif args.command == "to-archive":
+        skipped = 0
+        with open(args.pdn) as file, ArchiveWriter(args.archive) as writer:
+            for game in read_games(file):
+                if "FEN" in game.tags:
+                    skipped += 1  # Archived games always start from the standard position
+                    continue
+                writer.add_game(game.archive_moves(), game.archive_result)
+        print(f"wrote {args.archive}" + (f", skipped {skipped} set-up game(s)" if skipped else ""))
+    else:
+        with ArchiveReader(args.archive) as reader, open(args.pdn, "w") as file:
+            for number, (result, archived) in enumerate(reader.games(), 1):
+                moves = [move for _, move in replay(archived)]
+                write_game(file, moves, result, {"Event": "archive", "Round": number})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Perft: count the leaf nodes of the move tree to a fixed depth.
+
+Perft exercises move generation, push() and pop() and nothing else, so it
+is both a correctness check (the counts from the starting position are
+known) and a benchmark of the move generator.
+
+Run from the Checkers folder:
+    python -m checkers.perft --depth 7
+    python -m checkers.perft --depth 5 --divide
+    python -m checkers.perft --depth 6 --grey 0x00300000 --white 0x00000C00 --turn white
+    python -m checkers.perft --variant international --depth 6
+"""
+
+import argparse
+import time
+from .bitboard import BitBoard, row_col_of
+from .constants import GREY_PIECES, WHITE
+from .variants import AMERICAN, VARIANTS, VariantBoard, move_generator
+from . import instrument
+
+# Leaf counts from the starting position for depths 0 to 10 (standard
+# 8x8 checkers: compulsory captures, men capture forwards only, a man that
+# is crowned ends its move)
+STARTING_PERFT = (
+    1, 7, 49, 302, 1469, 7361, 36768, 179740, 845931, 3963680, 18391564,
+)
+
+# Leaf counts from the 10x10 international starting position for depths 0 to 9
+INTERNATIONAL_PERFT = (
+    1, 9, 81, 658, 4265, 27117, 167140, 1049442, 6483961, 41022423,
+)
+
+# Known starting position counts by variant name
+REFERENCE_PERFT = {"american": STARTING_PERFT, "international": INTERNATIONAL_PERFT}
+
+
+def perft(board, depth):
+    """Count the leaf nodes depth plies below a BitBoard's or VariantBoard's position."""
+    moves = board.generate_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def divide(board, depth):
+    """Count the leaf nodes below each root move; return a dict of move to count."""
+    counts = {}
+    for move in board.generate_moves():
+        board.push(move)
+        counts[move] = perft(board, depth - 1)
+        board.pop()
+    return counts
+
+
+def move_text(move, row_col=row_col_of):
+    """Format a move with board coordinates, using 'x' for captures."""
+    separator = "x" if move.captured else "-"
+    return f"{row_col(move.src)}{separator}{row_col(move.dst)}"
+
+
+def parse_args():
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(description="Count move-tree leaf nodes (perft).")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--divide", action="store_true",
+                        help="print the count below every root move")
+    parser.add_argument("--variant", choices=VARIANTS, default=AMERICAN.name,
+                        help="rules and board size (american runs on the BitBoard engine)")
+    parser.add_argument("--grey", type=lambda text: int(text, 0),
+                        help="mask of grey pieces (default: starting position)")
+    parser.add_argument("--white", type=lambda text: int(text, 0),
+                        help="mask of white pieces (default: starting position)")
+    parser.add_argument("--kings", type=lambda text: int(text, 0), default=0,
+                        help="mask of kings")
+    parser.add_argument("--turn", choices=("grey", "white"), default="grey")
+    instrument.add_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """Run perft from the command line and print nodes per second."""
+    args = parse_args()
+    instrument.start_from_args(args)
+    turn = GREY_PIECES if args.turn == "grey" else WHITE
+    variant = VARIANTS[args.variant]
+    generator = move_generator(variant)
+    start_grey, start_white = generator.start
+    grey = start_grey if args.grey is None else args.grey
+    white = start_white if args.white is None else args.white
+    if variant == AMERICAN:
+        board = BitBoard(grey, white, args.kings, turn)
+    else:
+        board = VariantBoard(variant, grey, white, args.kings, turn)
+
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(board, args.depth)
+        for move, count in counts.items():
+            print(f"{move_text(move, generator.row_col_of):<20}{count}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(board, args.depth)
+    elapsed = time.perf_counter() - start
+
+    print(f"depth {args.depth}: {nodes} nodes in {elapsed:.2f}s "
+          f"({nodes / elapsed if elapsed else 0:,.0f} nodes/s)")
+    expected = REFERENCE_PERFT.get(variant.name, ())
+    if (grey, white, args.kings, turn) == (start_grey, start_white, 0, GREY_PIECES):
+        if args.depth < len(expected) and nodes != expected[args.depth]:
+            raise SystemExit(f"MISMATCH: expected {expected[args.depth]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,42 +2,49 @@
 Piece and King classes for Checkers game pieces.
 """
 
-import pygame
-from .constants import GREY_BORDER, SQUARE_SIZE, CROWN, WHITE
+from .constants import SQUARE_SIZE
 from .abstract_classes import AbstractPiece
 
 class Piece(AbstractPiece):
-    """Represents a standard Checkers piece."""
+    """Represents a Checkers piece; a king is a piece with its king flag set.
+
+    Pieces use __slots__, so each one holds only its row, column, color
+    and king flag. The screen position is worked out when it is drawn.
+    """
+    __slots__ = ("_row", "_col", "_color", "_king")
+
     PADDING = 15
     OUTLINE = 2
 
-    def __init__(self, row, col, color):
+    def __init__(self, row, col, color, king=False):
         """Initialize the Piece instance."""
         self._row = row
         self._col = col
         self._color = color
-        self._king = False
-
-        self._x = 0
-        self._y = 0
-        self.calculate_position()
+        self._king = king
 
     def calculate_position(self):
         """Calculate the screen position of the piece."""
-        self._x = SQUARE_SIZE * self._col + SQUARE_SIZE // 2
-        self._y = SQUARE_SIZE * self._row + SQUARE_SIZE // 2
+        return (SQUARE_SIZE * self._col + SQUARE_SIZE // 2,
+                SQUARE_SIZE * self._row + SQUARE_SIZE // 2)
 
     def draw(self, win):
-        """Draw the piece on the board."""
+        """Draw the piece on the board, with a crown if it is a king."""
+        from . import render  # Imported lazily so the engine never loads pygame
         radius = SQUARE_SIZE // 2 - self.PADDING
-        pygame.draw.circle(win, GREY_BORDER, (self._x, self._y), radius + self.OUTLINE)
-        pygame.draw.circle(win, self._color, (self._x, self._y), radius)
+        center = self.calculate_position()
+        render.draw_piece(win, self._color, center, radius, self.OUTLINE)
+        if self._king:
+            render.draw_crown(win, center)
 
     def move(self, row, col):
         """Move the piece to a new position."""
         self._row = row
         self._col = col
-        self.calculate_position()
+
+    def promote(self):
+        """Crown the piece in place."""
+        self._king = True
 
     def __repr__(self):
         """Return a string representation of the piece."""
@@ -51,7 +58,6 @@ class Piece(AbstractPiece):
     @row.setter
     def row(self, value):
         self._row = value
-        self.calculate_position()
 
     # Getter and Setter for col
     @property
@@ -61,7 +67,6 @@ class Piece(AbstractPiece):
     @col.setter
     def col(self, value):
         self._col = value
-        self.calculate_position()
 
     # Getter for color
     @property
@@ -79,19 +84,9 @@ class Piece(AbstractPiece):
     
     # inheritance
 class King(Piece):
-    """Represents a king piece in Checkers."""
+    """Represents a king piece in Checkers: a Piece created already crowned."""
+    __slots__ = ()
+
     def __init__(self, row, col, color):
         """Initialize the king piece instance."""
-        self.grey_kings = self.white_kings = 0
-        super().__init__(row, col, color)
-        self.king = True
-        if self.color == WHITE:
-            self.white_kings += 1
-        else:
-            self.grey_kings += 1
-    
-    # polymorphism
-    def draw(self, win):
-        """Draw the king piece on the board."""
-        super().draw(win)
-        win.blit(CROWN, (self._x - CROWN.get_width() // 2, self._y - CROWN.get_height() // 2))
\ No newline at end of file
+        super().__init__(row, col, color, king=True)
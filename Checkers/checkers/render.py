@@ -0,0 +1,183 @@
+"""
+Rendering helpers for the Checkers game.
+
+This is the only module in the package that imports pygame. The board,
+pieces and game import it lazily from their draw methods, so the rules
+engine can be used without pygame or a display.
+"""
+
+import os
+import time
+import pygame
+from .bitboard import row_col_of
+from .constants import BLACK, BLUE, COLS, GREY_BORDER, GREY_PIECES, ROWS, SQUARE_SIZE, WHITE
+from .piece import Piece
+
+# Crown image for kings
+CROWN_PATH = os.path.join(os.path.dirname(__file__), "assets", "crown.png")
+CROWN_SIZE = (62, 50)
+_crown = None
+
+def get_crown():
+    """Load and scale the crown image the first time it is needed."""
+    global _crown
+    if _crown is None:
+        _crown = pygame.transform.scale(pygame.image.load(CROWN_PATH), CROWN_SIZE)
+    return _crown
+
+def draw_squares(win):
+    """Draw the squares of the board."""
+    win.fill(BLACK)
+    for row in range(ROWS):
+        for col in range(row % 2, COLS, 2):
+            pygame.draw.rect(
+                win,
+                WHITE,
+                (row * SQUARE_SIZE, col * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+            )
+
+def draw_piece(win, color, center, radius, outline):
+    """Draw a piece as a filled circle with a grey border."""
+    pygame.draw.circle(win, GREY_BORDER, center, radius + outline)
+    pygame.draw.circle(win, color, center, radius)
+
+def draw_crown(win, center):
+    """Draw the crown of a king centred on a piece."""
+    crown = get_crown()
+    x, y = center
+    win.blit(crown, (x - crown.get_width() // 2, y - crown.get_height() // 2))
+
+def draw_valid_moves(win, moves):
+    """Draw valid moves on the board."""
+    for move in moves:
+        row, col = move
+        pygame.draw.circle(win, BLUE, (col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2), 15)
+
+def update_display():
+    """Show everything drawn since the last update."""
+    pygame.display.update()
+
+class Renderer:
+    """Draws a game from cached surfaces, redrawing only the squares that changed.
+
+    The checkerboard is rendered once into a background surface and every
+    piece, king and valid-move marker once into a sprite. Each frame the
+    position and markers are compared with the last frame drawn: nothing
+    is drawn if they are the same, otherwise only the changed squares are
+    redrawn and passed to pygame.display.update.
+    """
+
+    # Square contents: a piece sprite index plus a flag for a move marker
+    MARKER = 8
+
+    def __init__(self, win):
+        """Initialize the Renderer for a window."""
+        self._win = win
+        self._background = None
+        self._sprites = None
+        self._marker = None
+        self._last_state = None
+        self._last_squares = None
+
+    def _build_surfaces(self):
+        """Pre-render the background, piece sprites and move marker."""
+        self._background = pygame.Surface(self._win.get_size())
+        draw_squares(self._background)
+        center = (SQUARE_SIZE // 2, SQUARE_SIZE // 2)
+        radius = SQUARE_SIZE // 2 - Piece.PADDING
+        self._sprites = [None]
+        for color in (GREY_PIECES, WHITE):
+            for king in (False, True):
+                sprite = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+                draw_piece(sprite, color, center, radius, Piece.OUTLINE)
+                if king:
+                    draw_crown(sprite, center)
+                self._sprites.append(sprite)
+        self._marker = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(self._marker, BLUE, center, 15)
+
+    def invalidate(self):
+        """Force a full redraw on the next frame, e.g. after the window was covered."""
+        self._last_state = None
+        self._last_squares = None
+
+    def render(self, engine, valid_moves):
+        """Draw a BitBoard position and valid-move markers; return the rects updated."""
+        state = (engine.grey, engine.white, engine.kings, frozenset(valid_moves))
+        if state == self._last_state:
+            return []
+        if self._background is None:
+            self._build_surfaces()
+        squares = self._square_contents(engine, valid_moves)
+
+        if self._last_squares is None:
+            self._win.blit(self._background, (0, 0))
+            dirty = [square for square in range(32) if squares[square]]
+        else:
+            last = self._last_squares
+            dirty = [square for square in range(32) if squares[square] != last[square]]
+
+        rects = []
+        for square in dirty:
+            row, col = row_col_of(square)
+            rect = pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+            self._win.blit(self._background, rect, rect)
+            contents = squares[square]
+            if contents & ~self.MARKER:
+                self._win.blit(self._sprites[contents & ~self.MARKER], rect)
+            if contents & self.MARKER:
+                self._win.blit(self._marker, rect)
+            rects.append(rect)
+
+        if self._last_squares is None:
+            pygame.display.update()
+            rects = [self._win.get_rect()]
+        else:
+            pygame.display.update(rects)
+        self._last_state = state
+        self._last_squares = squares
+        return rects
+
+    def _square_contents(self, engine, valid_moves):
+        """Get the sprite index and marker flag of every dark square."""
+        grey, white, kings = engine.grey, engine.white, engine.kings
+        squares = [0] * 32
+        for square in range(32):
+            bit = 1 << square
+            if grey & bit:
+                squares[square] = 2 if kings & bit else 1
+            elif white & bit:
+                squares[square] = 4 if kings & bit else 3
+        for row, col in valid_moves:
+            squares[row * 4 + col // 2] |= self.MARKER
+        return squares
+
+
+class FrameStats:
+    """Collects how long each frame took to draw, and how many were skipped."""
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self._times = []
+        self._skipped = 0
+        self._start = time.perf_counter()
+
+    def record(self, elapsed_ms, drawn=True):
+        """Record one frame's drawing time."""
+        self._times.append(elapsed_ms)
+        if not drawn:
+            self._skipped += 1
+
+    def summary(self):
+        """Get frame counts and draw-time statistics as a dictionary."""
+        times = sorted(self._times)
+        frames = len(times)
+        wall = time.perf_counter() - self._start
+        return {
+            "frames": frames,
+            "skipped": self._skipped,
+            "mean_ms": sum(times) / frames if frames else 0.0,
+            "p99_ms": times[min(frames - 1, int(frames * 0.99))] if frames else 0.0,
+            "max_ms": times[-1] if frames else 0.0,
+            "draw_cpu_share": sum(times) / 1000 / wall if wall else 0.0,
+        }
@@ -0,0 +1,353 @@
+"""
+Asyncio TCP server hosting many independent Checkers games.
+
+Clients send one JSON object per line and get JSON lines back. A request
+may carry an "id", which is echoed in its reply:
+
+    {"op": "new"}                                   start a game
+    {"op": "attach", "session": ID}                 watch an existing game
+    {"op": "select", "session": ID, "row": R, "col": C}
+                                                    Game.select(row, col)
+    {"op": "state", "session": ID}                  get the current state
+    {"op": "close", "session": ID}                  end a game
+    {"op": "stats"}                                 server statistics
+
+A state message's "result" says why the game ended ("no pieces", "no
+moves", "repetition" or "move rule") and is null while it goes on; its
+"winner" is null for a draw. Every change to a game is pushed as a
+"state" message to all other connections attached to it. A slow reader never holds the server up:
+pushes waiting for it are coalesced so only the newest state of each
+game is kept, and the server stops reading a connection's requests until
+it has taken its replies. Games nobody has touched for idle_timeout
+seconds are closed.
+
+Run from the Checkers folder:
+    python -m checkers.server --port 8765
+    python -m checkers.loadgen --port 8765 --connections 8 --sessions 50
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from .constants import GREY_PIECES
+from .game import Game
+from .game_logger import GameLogger
+from .measure import deep_size
+
+DEFAULT_PORT = 8765
+
+# Close games that have been idle this long, in seconds
+IDLE_TIMEOUT = 300
+REAP_INTERVAL = 10
+
+# Stop reading a connection's requests while this many replies wait to be sent
+MAX_PENDING_REPLIES = 256
+
+# Longest request line, in bytes
+MAX_LINE = 4096
+
+# Sessions measured for the per-session memory estimate
+MEMORY_SAMPLE = 20
+
+# Seconds a closing connection may take to send what is still queued
+CLOSE_TIMEOUT = 5
+
+
+def color_name(color):
+    """Get the protocol name of a color."""
+    return "GREY" if color == GREY_PIECES else "WHITE"
+
+
+class Session:
+    """One game on the server and the connections watching it."""
+
+    def __init__(self, session_id):
+        """Initialize the Session with a new Game that does not log to a file."""
+        self.session_id = session_id
+        self.game = Game(None, GameLogger(None))
+        self.watchers = set()
+        self.moves = 0
+        self.last_active = time.monotonic()
+
+    def state(self):
+        """Describe the game as a state message."""
+        game = self.game
+        board = game.board
+        engine = board.engine
+        winner = board.winner()
+        selected = game.selected_piece
+        return {
+            "type": "state",
+            "session": self.session_id,
+            "turn": color_name(engine.turn),
+            "grey": engine.grey,
+            "white": engine.white,
+            "kings": engine.kings,
+            "selected": [selected.row, selected.col] if selected else None,
+            "valid": [list(square) for square in game.valid_moves],
+            "moves": self.moves,
+            "winner": None if winner is None else color_name(winner),
+            "result": board.reason,
+        }
+
+
+class Connection:
+    """Queues the messages for one client and writes them in the background."""
+
+    def __init__(self, writer):
+        """Initialize the Connection around an asyncio StreamWriter."""
+        self._writer = writer
+        self._replies = []
+        self._pushes = {}
+        self._wake = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self._closed = False
+        self.dropped = 0
+
+    def reply(self, message):
+        """Queue a reply; replies are only dropped once the connection has closed."""
+        if self._closed:
+            return
+        self._replies.append(message)
+        if len(self._replies) >= MAX_PENDING_REPLIES:
+            self._room.clear()
+        self._wake.set()
+
+    def push(self, message):
+        """Queue a state push, replacing any older push for the same game."""
+        if self._closed:
+            return
+        if message["session"] in self._pushes:
+            self.dropped += 1
+        self._pushes[message["session"]] = message
+        self._wake.set()
+
+    async def wait_for_room(self):
+        """Wait until the client has taken enough of its replies."""
+        await self._room.wait()
+
+    async def write_loop(self):
+        """Write queued messages, waiting for the socket to drain between batches.
+
+        After close() the messages still queued are written before the loop
+        ends. If a write fails the client has gone: the writer is closed,
+        which ends the connection's read loop, and queued messages are
+        dropped. Either way the reader is never left waiting for room.
+        """
+        try:
+            while not (self._closed and not self._replies and not self._pushes):
+                await self._wake.wait()
+                self._wake.clear()
+                messages = self._replies + list(self._pushes.values())
+                self._replies = []
+                self._pushes = {}
+                self._room.set()
+                if messages:
+                    self._writer.write(b"".join(
+                        json.dumps(message, separators=(",", ":")).encode() + b"\n"
+                        for message in messages
+                    ))
+                    await self._writer.drain()
+        except ConnectionError:
+            pass  # Client gone; the finally below drops the rest
+        finally:
+            self._closed = True
+            self._replies = []
+            self._pushes = {}
+            self._room.set()
+            self._writer.close()
+
+    def close(self):
+        """Stop the write loop once it has written what is queued."""
+        self._closed = True
+        self._wake.set()
+
+
+class GameServer:
+    """Holds the game sessions and answers requests from connections."""
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT):
+        """Initialize an empty GameServer."""
+        self._idle_timeout = idle_timeout
+        self._sessions = {}
+        self._ids = itertools.count(1)
+        self._connections = 0
+        self._requests = 0
+        self._moves = 0
+        self._reaped = 0
+        self._started = time.monotonic()
+        self._reaper = None
+
+    def handle(self, connection, request):
+        """Answer one request, pushing any change to the other watchers; return the reply."""
+        self._requests += 1
+        op = request.get("op")
+        if op == "stats":
+            return {"type": "stats", **self.stats()}
+        if op == "new":
+            session = Session(next(self._ids))
+            self._sessions[session.session_id] = session
+            session.watchers.add(connection)
+            return session.state()
+
+        session = self._sessions.get(request.get("session"))
+        if session is None:
+            return {"type": "error", "message": f"no session {request.get('session')!r}"}
+        session.last_active = time.monotonic()
+        if op == "attach":
+            session.watchers.add(connection)
+            return session.state()
+        if op == "state":
+            return session.state()
+        if op == "close":
+            self.close_session(session, "closed", connection)
+            return {"type": "closed", "session": session.session_id, "reason": "closed"}
+        if op == "select":
+            try:
+                row, col = int(request["row"]), int(request["col"])
+            except (KeyError, TypeError, ValueError):
+                return {"type": "error", "message": "select needs an integer row and col"}
+            if not (0 <= row < 8 and 0 <= col < 8):
+                return {"type": "error", "message": f"({row}, {col}) is off the board"}
+            game = session.game
+            turn = game.turn
+            game.select(row, col)
+            moved = game.turn != turn
+            if moved:
+                session.moves += 1
+                self._moves += 1
+            state = session.state()
+            state["moved"] = moved
+            for watcher in session.watchers:
+                if watcher is not connection:
+                    watcher.push(state)
+            return state
+        return {"type": "error", "message": f"unknown op {op!r}"}
+
+    def close_session(self, session, reason, closed_by=None):
+        """Remove a session and tell its other watchers."""
+        self._sessions.pop(session.session_id, None)
+        message = {"type": "closed", "session": session.session_id, "reason": reason}
+        for watcher in session.watchers:
+            if watcher is not closed_by:
+                watcher.push(message)
+
+    def reap_idle(self, now=None):
+        """Close every session idle for longer than the timeout; return how many."""
+        now = time.monotonic() if now is None else now
+        idle = [session for session in self._sessions.values()
+                if now - session.last_active > self._idle_timeout]
+        for session in idle:
+            self.close_session(session, "idle")
+        self._reaped += len(idle)
+        return len(idle)
+
+    def detach(self, connection):
+        """Forget a connection that has gone away."""
+        for session in self._sessions.values():
+            session.watchers.discard(connection)
+
+    def stats(self):
+        """Get counters and an estimate of the memory used per session."""
+        sample = list(itertools.islice(self._sessions.values(), MEMORY_SAMPLE))
+        per_session = 0
+        if sample:
+            per_session = sum(deep_size(session.game) for session in sample) // len(sample)
+        elapsed = time.monotonic() - self._started
+        return {
+            "sessions": len(self._sessions),
+            "connections": self._connections,
+            "requests": self._requests,
+            "moves": self._moves,
+            "moves_per_second": round(self._moves / elapsed, 1) if elapsed else 0.0,
+            "reaped": self._reaped,
+            "bytes_per_session": per_session,
+        }
+
+    async def serve_connection(self, reader, writer):
+        """Read requests from one client until it disconnects."""
+        connection = Connection(writer)
+        self._connections += 1
+        write_task = asyncio.create_task(connection.write_loop())
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break  # Line too long or connection reset
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                except ValueError:
+                    connection.reply({"type": "error", "message": "requests are JSON objects"})
+                    continue
+                reply = self.handle(connection, request)
+                if "id" in request:
+                    reply = dict(reply, id=request["id"])
+                connection.reply(reply)
+                await connection.wait_for_room()
+        finally:
+            self._connections -= 1
+            self.detach(connection)
+            connection.close()
+            # A client that stopped reading gets a little while to take the rest
+            await asyncio.wait([write_task], timeout=CLOSE_TIMEOUT)
+            write_task.cancel()
+            await asyncio.gather(write_task, return_exceptions=True)
+            writer.close()
+
+    async def reap_loop(self):
+        """Close idle sessions every few seconds."""
+        while True:
+            await asyncio.sleep(REAP_INTERVAL)
+            self.reap_idle()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Start listening; return the asyncio Server."""
+        server = await asyncio.start_server(self.serve_connection, host, port, limit=MAX_LINE)
+        self._reaper = asyncio.create_task(self.reap_loop())
+        return server
+
+    def stop(self):
+        """Stop closing idle sessions; call once the asyncio Server is closed."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+
+    # Getter for sessions
+    @property
+    def sessions(self):
+        return self._sessions
+
+
+async def serve(host, port, idle_timeout):
+    """Run a GameServer until interrupted."""
+    game_server = GameServer(idle_timeout)
+    server = await game_server.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"serving Checkers on {address[0]}:{address[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    """Run the server from the command line."""
+    parser = argparse.ArgumentParser(description="Serve many Checkers games over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="seconds before an untouched game is closed")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.idle_timeout))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,701 @@
+"""
+Endgame tablebases: every position with few pieces solved outright.
+
+Positions are split into slices by material signature, the number of
+(grey men, grey kings, white men, white kings). Each slice is one file
+holding one byte per position, for both sides to move:
+
+    0        draw
+    d + 1    the game ends d plies later with best play; d is odd when
+             the side to move wins and even when it loses
+
+Pieces are ranked over a shared pool of squares, each group among the
+squares the groups before it left free, so every index is a different
+legal position and no space is spent on overlapping pieces.
+
+A slice and its colour-reversed twin (the board turned round and the
+colours swapped) have the same values, so only one of each pair is
+stored.
+
+Slices are solved by retrograde analysis, a whole batch of positions at
+a time with NumPy. Captures and promotions leave the slice, so they are
+looked up in the smaller slices solved before it; the remaining quiet
+moves are resolved backwards from won and lost positions in order of
+distance. Slices that do not depend on each other are solved in
+parallel processes. Probing the tables needs nothing beyond the
+standard library; only building them needs NumPy.
+
+Run from the Checkers folder:
+    python -m checkers.tablebase --pieces 4 --workers 4 --directory tablebases
+"""
+
+import argparse
+import bisect
+import itertools
+import mmap
+import multiprocessing
+import os
+import re
+import struct
+import sys
+import time
+from collections import namedtuple
+from .bitboard import ALL_DIRECTIONS, BOTTOM_ROW, DOWN, FULL, TOP_ROW, step
+from .constants import GREY_PIECES, WHITE
+
+try:
+    import numpy as np
+except ImportError:  # Only build_slice needs NumPy
+    np = None
+
+MAGIC = b"CKTB"
+VERSION = 2
+
+# Header: magic, version, signature, position count
+_HEADER = struct.Struct("<4sB4B3xI")
+
+# Results from the side to move's point of view
+WIN, DRAW, LOSS = 1, 0, -1
+
+# Longest distance a byte can hold
+MAX_DISTANCE = 254
+
+# Squares men can stand on: grey men are crowned on the top row and white
+# men on the bottom row, so neither can stand there
+GREY_MEN_OFFSET = 4
+WHITE_MEN_OFFSET = 0
+MEN_SQUARES = 28
+WHITE_MEN_SQUARES = (1 << MEN_SQUARES) - 1
+
+# Positions handled per batch while building a slice
+BATCH_SIZE = 1 << 16
+
+_TABLE_NAME = re.compile(r"tb_(\d+)-(\d+)-(\d+)-(\d+)\.bin$")
+
+TBResult = namedtuple("TBResult", "result distance")
+
+
+def _binomial_table():
+    """Build Pascal's triangle up to 32 choose 12."""
+    table = [[0] * 13 for _ in range(33)]
+    for n in range(33):
+        table[n][0] = 1
+        for k in range(1, min(n, 12) + 1):
+            table[n][k] = table[n - 1][k - 1] + table[n - 1][k]
+    return tuple(tuple(row) for row in table)
+
+
+# BINOMIAL[n][k] is n choose k
+BINOMIAL = _binomial_table()
+
+
+class TablebaseError(Exception):
+    """Raised for malformed table files or a missing table a slice depends on."""
+
+
+def _rank(bits, offset, excluded=0):
+    """Rank a set of squares among all sets of the same size (colex order).
+
+    Squares are counted from offset, skipping the excluded ones.
+    """
+    rank = 0
+    count = 1
+    while bits:
+        low = bits & -bits
+        position = low.bit_length() - 1 - offset - (excluded & low - 1).bit_count()
+        rank += BINOMIAL[position][count]
+        count += 1
+        bits ^= low
+    return rank
+
+
+def _unrank(rank, count, offset, excluded=0):
+    """Get the set of count squares with a rank; the inverse of _rank."""
+    pool = [square for square in range(offset, 32) if not excluded >> square & 1]
+    bits = 0
+    for size in range(count, 0, -1):
+        position = size - 1
+        while BINOMIAL[position + 1][size] <= rank:
+            position += 1
+        rank -= BINOMIAL[position][size]
+        bits |= 1 << pool[position]
+    return bits
+
+
+def _reverse(bits):
+    """Turn a mask round: square s becomes square 31 - s."""
+    return int(f"{bits:032b}"[::-1], 2)
+
+
+def signature_of(grey, white, kings):
+    """Get the material signature (grey men, grey kings, white men, white kings)."""
+    return (
+        (grey & ~kings).bit_count(), (grey & kings).bit_count(),
+        (white & ~kings).bit_count(), (white & kings).bit_count(),
+    )
+
+
+def is_canonical(signature):
+    """Check whether a signature is the stored one of its colour-reversed pair."""
+    return signature[:2] >= signature[2:]
+
+
+def mirror(grey, white, kings, turn):
+    """Turn the board round and swap the colours; the value is unchanged."""
+    return (
+        _reverse(white), _reverse(grey), _reverse(kings),
+        WHITE if turn == GREY_PIECES else GREY_PIECES,
+    )
+
+
+def slice_signatures(max_pieces):
+    """Get every stored signature with both sides on the board, in build order.
+
+    A slice only depends on slices with fewer pieces or fewer men, so
+    slices with the same (pieces, men) key can be built at the same time.
+    """
+    signatures = []
+    for grey_men, grey_kings, white_men, white_kings in itertools.product(range(13), repeat=4):
+        signature = (grey_men, grey_kings, white_men, white_kings)
+        if (grey_men + grey_kings and white_men + white_kings
+                and sum(signature) <= max_pieces and is_canonical(signature)):
+            signatures.append(signature)
+    signatures.sort(key=build_key)
+    return signatures
+
+
+def build_key(signature):
+    """Get the (pieces, men) key that orders slices by their dependencies."""
+    return sum(signature), signature[0] + signature[2]
+
+
+def table_name(signature):
+    """Get the file name of a slice."""
+    return "tb_{}-{}-{}-{}.bin".format(*signature)
+
+
+class SliceIndex:
+    """Maps the positions of one material signature to table indexes and back.
+
+    The grey men are ranked among their 28 squares, the white men among
+    theirs less the grey men's, then the grey kings among the squares no
+    man holds and the white kings among the rest.
+    """
+
+    def __init__(self, signature):
+        """Initialize the SliceIndex for a signature."""
+        self._signature = signature
+        grey_men, grey_kings, white_men, white_kings = signature
+        # How many white men placements each grey men placement leaves
+        placements = [0] * BINOMIAL[MEN_SQUARES][grey_men]
+        for combination in itertools.combinations(range(GREY_MEN_OFFSET, 32), grey_men):
+            bits = sum(1 << square for square in combination)
+            free = MEN_SQUARES - (bits & WHITE_MEN_SQUARES).bit_count()
+            placements[_rank(bits, GREY_MEN_OFFSET)] = BINOMIAL[free][white_men]
+        # First men index of each grey men placement
+        self._offsets = list(itertools.accumulate(placements, initial=0))
+        men = self._offsets.pop()
+        free = 32 - grey_men - white_men
+        self._counts = (BINOMIAL[free][grey_kings], BINOMIAL[free - grey_kings][white_kings])
+        self._size = 2 * men * self._counts[0] * self._counts[1]
+        self._arrays = None
+
+    def index(self, grey, white, kings, turn):
+        """Get the index of a position with this slice's material."""
+        grey_men = grey & ~kings
+        grey_kings = grey & kings
+        white_men = white & ~kings
+        men = grey_men | white_men
+        index = (self._offsets[_rank(grey_men, GREY_MEN_OFFSET)]
+                 + _rank(white_men, WHITE_MEN_OFFSET, grey_men))
+        index = index * self._counts[0] + _rank(grey_kings, 0, men)
+        index = index * self._counts[1] + _rank(white & kings, 0, men | grey_kings)
+        return index * 2 + (turn == WHITE)
+
+    def position(self, index):
+        """Get (grey, white, kings, turn) at an index."""
+        grey_men, grey_kings, white_men, white_kings = self._signature
+        turn = WHITE if index & 1 else GREY_PIECES
+        index, white_king_rank = divmod(index >> 1, self._counts[1])
+        index, grey_king_rank = divmod(index, self._counts[0])
+        grey_men_rank = bisect.bisect_right(self._offsets, index) - 1
+        grey_man_bits = _unrank(grey_men_rank, grey_men, GREY_MEN_OFFSET)
+        white_man_bits = _unrank(index - self._offsets[grey_men_rank], white_men,
+                                 WHITE_MEN_OFFSET, grey_man_bits)
+        men = grey_man_bits | white_man_bits
+        grey_king_bits = _unrank(grey_king_rank, grey_kings, 0, men)
+        white_king_bits = _unrank(white_king_rank, white_kings, 0, men | grey_king_bits)
+        kings = grey_king_bits | white_king_bits
+        return grey_man_bits | grey_king_bits, white_man_bits | white_king_bits, kings, turn
+
+    def positions(self):
+        """Yield (index, grey, white, kings, turn) for every position."""
+        for index in range(self._size):
+            yield (index, *self.position(index))
+
+    def indexes(self, grey, white, kings, white_to_move):
+        """Get the indexes of arrays of positions at once; needs NumPy."""
+        grey_men, grey_kings, white_men, white_kings = self._signature
+        offsets = self._offset_array()
+        grey_man_bits = grey & ~kings
+        grey_king_bits = grey & kings
+        men = grey_man_bits | white & ~kings
+        index = (offsets[_rank_array(grey_man_bits, grey_men, GREY_MEN_OFFSET)]
+                 + _rank_array(white & ~kings, white_men, WHITE_MEN_OFFSET, grey_man_bits))
+        index = index * self._counts[0] + _rank_array(grey_king_bits, grey_kings, 0, men)
+        index = (index * self._counts[1]
+                 + _rank_array(white & kings, white_kings, 0, men | grey_king_bits))
+        return index * 2 + white_to_move
+
+    def position_arrays(self, indexes):
+        """Get (grey, white, kings, white_to_move) arrays at many indexes; needs NumPy."""
+        grey_men, grey_kings, white_men, white_kings = self._signature
+        offsets = self._offset_array()
+        white_to_move = (indexes & 1).astype(bool)
+        index, white_king_ranks = np.divmod(indexes >> 1, self._counts[1])
+        index, grey_king_ranks = np.divmod(index, self._counts[0])
+        grey_men_ranks = np.searchsorted(offsets, index, side="right") - 1
+        grey_man_bits = _unrank_array(grey_men_ranks, grey_men, GREY_MEN_OFFSET)
+        white_man_bits = _unrank_array(index - offsets[grey_men_ranks], white_men,
+                                       WHITE_MEN_OFFSET, grey_man_bits)
+        men = grey_man_bits | white_man_bits
+        grey_king_bits = _unrank_array(grey_king_ranks, grey_kings, 0, men)
+        white_king_bits = _unrank_array(white_king_ranks, white_kings, 0, men | grey_king_bits)
+        return (grey_man_bits | grey_king_bits, white_man_bits | white_king_bits,
+                grey_king_bits | white_king_bits, white_to_move)
+
+    def _offset_array(self):
+        """Get the men offsets as a NumPy array, made on first use."""
+        if self._arrays is None:
+            self._arrays = np.array(self._offsets, dtype=np.int64)
+        return self._arrays
+
+    # Getter for signature
+    @property
+    def signature(self):
+        return self._signature
+
+    # Getter for size: the number of positions
+    @property
+    def size(self):
+        return self._size
+
+
+class Tablebase:
+    """Answers lookups from memory-mapped table files; use as a context manager."""
+
+    def __init__(self, directory):
+        """Initialize the Tablebase with the folder its files are in."""
+        self._directory = directory
+        self._tables = {}
+        self._signatures = set()
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                match = _TABLE_NAME.match(name)
+                if match:
+                    self._signatures.add(tuple(map(int, match.groups())))
+        self._max_pieces = max((sum(signature) for signature in self._signatures), default=0)
+
+    def _table(self, signature):
+        """Map a slice's file the first time it is needed."""
+        table = self._tables.get(signature)
+        if table is None:
+            path = os.path.join(self._directory, table_name(signature))
+            with open(path, "rb") as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, *stored, size = _HEADER.unpack_from(data, 0)
+            if magic != MAGIC or version != VERSION or tuple(stored) != signature:
+                raise TablebaseError(f"{path} is not a version {VERSION} table of {signature}")
+            table = (data, SliceIndex(signature))
+            self._tables[signature] = table
+        return table
+
+    def value(self, grey, white, kings, turn):
+        """Get the raw table byte of a position, or None if it is not covered."""
+        own = grey if turn == GREY_PIECES else white
+        if not own:
+            return 1  # No pieces left to move: lost now
+        signature = signature_of(grey, white, kings)
+        if not is_canonical(signature):
+            grey, white, kings, turn = mirror(grey, white, kings, turn)
+            signature = signature[2:] + signature[:2]
+        if signature not in self._signatures:
+            return None
+        data, index = self._table(signature)
+        return data[_HEADER.size + index.index(grey, white, kings, turn)]
+
+    def probe(self, board):
+        """Look up a BitBoard position; return a TBResult or None if it is not covered."""
+        value = self.value(board.grey, board.white, board.kings, board.turn)
+        if value is None:
+            return None
+        return decode(value)
+
+    def close(self):
+        """Unmap every table."""
+        for data, _ in self._tables.values():
+            data.close()
+        self._tables.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Getter for directory
+    @property
+    def directory(self):
+        return self._directory
+
+    # Getter for signatures
+    @property
+    def signatures(self):
+        return frozenset(self._signatures)
+
+    # Getter for max_pieces: positions with more pieces are never covered
+    @property
+    def max_pieces(self):
+        return self._max_pieces
+
+
+def decode(value):
+    """Turn a table byte into a TBResult."""
+    if value == 0:
+        return TBResult(DRAW, 0)
+    distance = value - 1
+    return TBResult(WIN if distance % 2 else LOSS, distance)
+
+
+# Batch helpers: masks are uint64 arrays, one position per element
+
+def _popcount(bits):
+    """Count the set bits of every mask."""
+    return np.bitwise_count(bits).astype(np.int64)
+
+
+def _lowest(bits):
+    """Keep only the lowest set bit of every mask."""
+    return bits & (~bits + np.uint64(1))
+
+
+def _rank_array(bits, count, offset, excluded=0):
+    """Rank arrays of count-square sets at once, like _rank."""
+    binomial = _binomial_array()
+    rank = np.zeros(len(bits), dtype=np.int64)
+    for size in range(1, count + 1):
+        low = _lowest(bits)
+        below = low - np.uint64(1)
+        rank += binomial[_popcount(below) - offset - _popcount(excluded & below), size]
+        bits = bits ^ low
+    return rank
+
+
+def _unrank_array(rank, count, offset, excluded=0):
+    """Get arrays of count-square sets from their ranks, like _unrank."""
+    binomial = _binomial_array()
+    bits = np.zeros(len(rank), dtype=np.uint64)
+    for size in range(count, 0, -1):
+        column = binomial[:, size]
+        position = np.searchsorted(column, rank, side="right") - 1
+        rank = rank - column[position]
+        # The square is the position-th one from offset that is not excluded
+        square = position + offset
+        while True:
+            at_or_below = (np.uint64(2) << square.astype(np.uint64)) - np.uint64(1)
+            moved = position + offset + _popcount(excluded & at_or_below)
+            if np.array_equal(moved, square):
+                break
+            square = moved
+        bits |= np.uint64(1) << square.astype(np.uint64)
+    return bits
+
+
+_BINOMIAL_ARRAY = []
+
+
+def _binomial_array():
+    """Get BINOMIAL as a NumPy array, made on first use."""
+    if not _BINOMIAL_ARRAY:
+        _BINOMIAL_ARRAY.append(np.array(BINOMIAL, dtype=np.int64))
+    return _BINOMIAL_ARRAY[0]
+
+
+def _reverse_array(bits):
+    """Turn arrays of masks round, like _reverse."""
+    for shift, mask in ((1, 0x55555555), (2, 0x33333333), (4, 0x0F0F0F0F),
+                        (8, 0x00FF00FF), (16, 0x0000FFFF)):
+        bits = (bits >> shift) & mask | (bits & mask) << shift
+    return bits
+
+
+def _distinct(values):
+    """Sort an array and drop repeats; much quicker than np.unique on big arrays."""
+    values = np.sort(values)
+    return values[np.concatenate(([True], values[1:] != values[:-1]))[:len(values)]]
+
+
+def _pieces(bits):
+    """Yield (rows, bit) for every set bit of an array of masks."""
+    rows = np.arange(len(bits))
+    while len(rows):
+        low = _lowest(bits)
+        yield rows, low
+        bits = bits ^ low
+        rows, bits = rows[bits != 0], bits[bits != 0]
+
+
+def _jumpers(own, opponent, kings, white_to_move):
+    """Get the pieces of the side to move that can capture, like BitBoard.jumpers."""
+    empty = ~(own | opponent) & FULL
+    result = np.zeros(len(own), dtype=np.uint64)
+    for direction in ALL_DIRECTIONS:
+        forward = white_to_move if direction in DOWN else ~white_to_move
+        pieces = np.where(forward, own, own & kings)
+        back = direction ^ 3
+        result |= step(step(empty, back) & opponent, back) & pieces
+    return result
+
+
+def _children(grey, white, kings, white_to_move):
+    """Make every legal move in a batch of positions.
+
+    Returns (rows, grey, white, kings, exits): the position each move was
+    made in, the position it leads to, with the other side to move, and
+    whether the move captured or crowned and so left the slice.
+    """
+    own = np.where(white_to_move, white, grey)
+    opponent = np.where(white_to_move, grey, white)
+    empty = ~(own | opponent) & FULL
+    crown_row = np.where(white_to_move, np.uint64(BOTTOM_ROW), np.uint64(TOP_ROW))
+    capturing = _jumpers(own, opponent, kings, white_to_move) != 0
+    moves = []   # (rows, src, dst, captured)
+
+    starts = []  # Capture sequences as (rows, src, at, captured)
+    for rows, bit in _pieces(own):
+        jumping = capturing[rows]
+        starts.append((rows[jumping], bit[jumping], bit[jumping], np.zeros_like(bit[jumping])))
+        rows, bit = rows[~jumping], bit[~jumping]
+        king = (kings[rows] & bit) != 0
+        for direction in ALL_DIRECTIONS:
+            forward = white_to_move[rows] if direction in DOWN else ~white_to_move[rows]
+            dst = step(bit, direction) & empty[rows]
+            legal = (dst != 0) & (forward | king)
+            moves.append((rows[legal], bit[legal], dst[legal], np.zeros_like(dst[legal])))
+
+    # Extend every capture sequence a jump at a time until none can go on
+    rows, src, at, captured = (np.concatenate(column) for column in zip(*starts))
+    while len(rows):
+        king = (kings[rows] & src) != 0
+        extended = np.zeros(len(rows), dtype=bool)
+        jumps = []
+        for direction in ALL_DIRECTIONS:
+            forward = white_to_move[rows] if direction in DOWN else ~white_to_move[rows]
+            over = step(at, direction) & opponent[rows] & ~captured
+            land = step(over, direction) & (empty[rows] | src)
+            legal = (land != 0) & (forward | king)
+            extended |= legal
+            jumps.append((rows[legal], src[legal], land[legal], captured[legal] | over[legal]))
+        done = ~extended & (captured != 0)
+        moves.append((rows[done], src[done], at[done], captured[done]))
+        rows, src, at, captured = (np.concatenate(column) for column in zip(*jumps))
+        # A man that reaches its crowning row ends its move there
+        crowned = ((kings[rows] & src) == 0) & ((at & crown_row[rows]) != 0)
+        moves.append((rows[crowned], src[crowned], at[crowned], captured[crowned]))
+        rows, src, at, captured = rows[~crowned], src[~crowned], at[~crowned], captured[~crowned]
+
+    rows, src, dst, captured = (np.concatenate(column) for column in zip(*moves))
+    moved_own = own[rows] ^ src ^ dst
+    left = opponent[rows] & ~captured
+    king = (kings[rows] & src) != 0
+    crowned = ~king & ((dst & crown_row[rows]) != 0)
+    child_kings = kings[rows] & ~captured
+    child_kings = np.where(king, child_kings ^ src ^ dst, child_kings | np.where(crowned, dst, 0))
+    white_moved = white_to_move[rows]
+    return (
+        rows, np.where(white_moved, left, moved_own), np.where(white_moved, moved_own, left),
+        child_kings, (captured != 0) | crowned,
+    )
+
+
+def _lookup(tablebase, grey, white, kings, white_to_move):
+    """Get the table bytes of a batch of positions from other slices."""
+    values = np.ones(len(grey), dtype=np.uint8)  # No pieces left to move: lost now
+    counts = [_popcount(grey & ~kings), _popcount(grey & kings),
+              _popcount(white & ~kings), _popcount(white & kings)]
+    keys = ((counts[0] * 13 + counts[1]) * 13 + counts[2]) * 13 + counts[3]
+    alive = np.where(white_to_move, white, grey) != 0
+    for key in _distinct(keys[alive]):
+        rows = np.flatnonzero(alive & (keys == key))
+        signature = tuple(int(count[rows[0]]) for count in counts)
+        position = grey[rows], white[rows], kings[rows], white_to_move[rows]
+        if not is_canonical(signature):
+            grey_bits, white_bits, king_bits, white_moves = position
+            position = (_reverse_array(white_bits), _reverse_array(grey_bits),
+                        _reverse_array(king_bits), ~white_moves)
+            signature = signature[2:] + signature[:2]
+        if signature not in tablebase.signatures:
+            raise TablebaseError(f"a slice needs the table of {signature}")
+        data, slice_index = tablebase._table(signature)
+        table = np.frombuffer(data, dtype=np.uint8, offset=_HEADER.size)
+        values[rows] = table[slice_index.indexes(*position)]
+    return values
+
+
+def _parents(slice_index, indexes):
+    """Get the index of every position with a quiet move to one of these."""
+    grey, white, kings, white_to_move = slice_index.position_arrays(indexes)
+    white_moved = ~white_to_move
+    own = np.where(white_moved, white, grey)
+    opponent = np.where(white_moved, grey, white)
+    occupied = grey | white
+    parents = []
+    for rows, bit in _pieces(own):
+        king = (kings[rows] & bit) != 0
+        for direction in ALL_DIRECTIONS:
+            forward = white_moved[rows] if direction in DOWN else ~white_moved[rows]
+            src = step(bit, direction ^ 3) & ~occupied[rows]
+            legal = (src != 0) & (forward | king)
+            moved_rows, moved_bit, moved_src = rows[legal], bit[legal], src[legal]
+            parent_own = own[moved_rows] ^ moved_bit ^ moved_src
+            parent_kings = np.where(king[legal], kings[moved_rows] ^ moved_bit ^ moved_src,
+                                    kings[moved_rows])
+            mover = white_moved[moved_rows]
+            # Captures are compulsory, so a quiet move needs a position without any
+            quiet = _jumpers(parent_own, opponent[moved_rows], parent_kings, mover) == 0
+            parents.append(slice_index.indexes(
+                np.where(mover, opponent[moved_rows], parent_own)[quiet],
+                np.where(mover, parent_own, opponent[moved_rows])[quiet],
+                parent_kings[quiet], mover[quiet],
+            ))
+    return np.concatenate(parents)
+
+
+def _file_away(buckets, indexes, distances, signature):
+    """Add positions to the buckets of their distances."""
+    if len(distances) and distances.max() > MAX_DISTANCE:
+        raise TablebaseError(f"slice {signature} has a win longer than {MAX_DISTANCE} plies")
+    for distance in _distinct(distances):
+        buckets[distance].append(indexes[distances == distance])
+
+
+def build_slice(signature, directory):
+    """Solve one slice and write its table; return its statistics."""
+    if np is None:
+        raise TablebaseError("building tables needs NumPy")
+    start = time.perf_counter()
+    slice_index = SliceIndex(signature)
+    size = slice_index.size
+    values = np.zeros(size, dtype=np.uint8)
+    pending = np.zeros(size, dtype=np.uint8)    # Quiet moves whose results are still unknown
+    longest = np.zeros(size, dtype=np.uint8)    # Longest win distance + 1 among known children
+    no_loss = np.zeros(size, dtype=bool)        # Set once a drawn child or a winning move is known
+    buckets = [[] for _ in range(MAX_DISTANCE + 2)]
+
+    with Tablebase(directory) as tablebase:
+        for first in range(0, size, BATCH_SIZE):
+            indexes = np.arange(first, min(first + BATCH_SIZE, size))
+            grey, white, kings, white_to_move = slice_index.position_arrays(indexes)
+            rows, grey, white, kings, exits = _children(grey, white, kings, white_to_move)
+            pending[indexes] = np.bincount(rows[~exits], minlength=len(indexes))
+            rows = rows[exits]
+            child_values = _lookup(tablebase, grey[exits], white[exits], kings[exits],
+                                   ~white_to_move[rows])
+            no_loss[indexes[rows[child_values == 0]]] = True
+            best_loss = np.full(len(indexes), MAX_DISTANCE + 1, dtype=np.int64)
+            lost = child_values % 2 == 1  # Child lost in an even number of plies
+            np.minimum.at(best_loss, rows[lost], child_values[lost] - 1)
+            won = (child_values % 2 == 0) & (child_values != 0)
+            np.maximum.at(longest, indexes[rows[won]], child_values[won])
+            winning = best_loss <= MAX_DISTANCE
+            no_loss[indexes[winning]] = True
+            _file_away(buckets, indexes[winning], best_loss[winning] + 1, signature)
+            finished = indexes[~winning & (pending[indexes] == 0) & ~no_loss[indexes]]
+            _file_away(buckets, finished, longest[finished], signature)
+
+        # Resolve positions in order of distance, walking back along quiet moves
+        for distance, bucket in enumerate(buckets):
+            if not bucket:
+                continue
+            solved = _distinct(np.concatenate(bucket))
+            solved = solved[values[solved] == 0]
+            bucket.clear()
+            values[solved] = distance + 1
+            for first in range(0, len(solved), BATCH_SIZE):
+                parents = _parents(slice_index, solved[first:first + BATCH_SIZE])
+                parents = parents[values[parents] == 0]
+                if distance % 2 == 0:
+                    no_loss[parents] = True
+                    parents = _distinct(parents)
+                    _file_away(buckets, parents, np.full(len(parents), distance + 1), signature)
+                    continue
+                np.subtract.at(pending, parents, 1)
+                np.maximum.at(longest, parents, distance + 1)
+                parents = _distinct(parents)
+                parents = parents[(pending[parents] == 0) & ~no_loss[parents]]
+                _file_away(buckets, parents, longest[parents].astype(np.int64), signature)
+
+    path = os.path.join(directory, table_name(signature))
+    with open(path + ".tmp", "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, *signature, size))
+        file.write(values.tobytes())
+    os.replace(path + ".tmp", path)
+
+    # Odd bytes are losses for the side to move, even non-zero bytes wins
+    losses = int(np.count_nonzero(values % 2))
+    wins = int(np.count_nonzero(values)) - losses
+    return {
+        "signature": signature,
+        "positions": size,
+        "wins": wins,
+        "losses": losses,
+        "draws": size - wins - losses,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _build_task(task):
+    """Pool entry point: build one slice."""
+    return build_slice(*task)
+
+
+def generate(directory, max_pieces, workers=1, out=None):
+    """Build every missing slice with up to max_pieces pieces; return their statistics.
+
+    Slices that do not depend on each other are built by a pool of workers.
+    """
+    os.makedirs(directory, exist_ok=True)
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    built = []
+    try:
+        for _, group in itertools.groupby(slice_signatures(max_pieces), key=build_key):
+            tasks = [(signature, directory) for signature in group
+                     if not os.path.exists(os.path.join(directory, table_name(signature)))]
+            results = pool.imap_unordered(_build_task, tasks) if pool else map(_build_task, tasks)
+            for stats in results:
+                built.append(stats)
+                if out is not None:
+                    print("{signature}: {positions} positions, {wins} wins, {losses} losses, "
+                          "{draws} draws in {seconds:.1f}s".format(**stats), file=out, flush=True)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return built
+
+
+def main():
+    """Generate tablebases from the command line."""
+    parser = argparse.ArgumentParser(description="Generate Checkers endgame tablebases.")
+    parser.add_argument("--pieces", type=int, default=4, help="most pieces on the board")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--directory", default="tablebases")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    built = generate(args.directory, args.pieces, args.workers, out=sys.stdout)
+    print(f"built {len(built)} slice(s) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
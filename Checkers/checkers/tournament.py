@@ -0,0 +1,263 @@
+"""
+Headless self-play tournament runner.
+
+Plays games between two players across a pool of worker processes and
+streams one JSON line per finished game to a results file. Games are
+played in pairs from the same randomized opening with colors swapped.
+
+Players are given as specs:
+    random                      random legal moves
+    ai:ms=50,depth=8,hash=4     alpha-beta search (time in ms, max depth,
+                                transposition table in MB, tb=folder of
+                                endgame tables; all optional)
+
+Run from the Checkers folder:
+    python -m checkers.tournament --games 200 --workers 4 \\
+        --player-a ai:ms=50 --player-b ai:ms=20 --results results.jsonl
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import time
+from .ai import AIPlayer, RandomPlayer, MAX_PLY
+from .archive import ArchiveWriter, GREY_WIN, WHITE_WIN, DRAW as DRAW_RESULT
+from .bitboard import BitBoard
+from .board import Board
+from .constants import GREY_PIECES, WHITE
+from . import instrument
+from .tablebase import Tablebase
+
+# Material used to adjudicate games that reach the move limit
+MAN_POINTS = 1
+KING_POINTS = 1.5
+
+# Results from player A's point of view
+WIN, DRAW, LOSS = "win", "draw", "loss"
+
+
+def make_player(spec, color, seed=None):
+    """Build a player from a spec such as 'random' or 'ai:ms=50,depth=8'."""
+    kind, _, options = spec.partition(":")
+    settings = dict(option.split("=", 1) for option in options.split(",") if option)
+    if kind == "random":
+        return RandomPlayer(color, seed)
+    if kind == "ai":
+        return AIPlayer(
+            color,
+            time_limit_ms=float(settings.get("ms", 100)),
+            max_depth=int(settings.get("depth", MAX_PLY)),
+            table_mb=float(settings.get("hash", 4)),
+            tablebase=Tablebase(settings["tb"]) if "tb" in settings else None,
+        )
+    raise ValueError(f"unknown player spec: {spec!r}")
+
+
+def random_opening(plies, seed):
+    """Play random legal moves from the starting position; return (board, moves)."""
+    rng = random.Random(seed)
+    board = BitBoard()
+    played = []
+    for _ in range(plies):
+        moves = board.generate_moves()
+        if not moves:
+            break
+        played.append(rng.choice(moves))
+        board.push(played[-1])
+    return board.copy(), played
+
+
+def material(board, color):
+    """Material balance from a color's point of view, in men."""
+    kings = board.kings
+    grey = (board.grey & ~kings).bit_count() * MAN_POINTS + (board.grey & kings).bit_count() * KING_POINTS
+    white = (board.white & ~kings).bit_count() * MAN_POINTS + (board.white & kings).bit_count() * KING_POINTS
+    return grey - white if color == GREY_PIECES else white - grey
+
+
+def play_game(task):
+    """Play one game described by a task dict and return its result record."""
+    board, played = random_opening(task["opening_plies"], task["opening_seed"])
+    a_color = GREY_PIECES if task["a_is_grey"] else WHITE
+    b_color = WHITE if a_color == GREY_PIECES else GREY_PIECES
+    players = {
+        a_color: make_player(task["player_a"], a_color, task["game"]),
+        b_color: make_player(task["player_b"], b_color, task["game"] + 1),
+    }
+    think_time = {a_color: 0.0, b_color: 0.0}
+    moves_made = {a_color: 0, b_color: 0}
+    # The Board applies the same end-of-game and draw rules as a played game
+    game = Board(board)
+
+    winner, reason = None, None
+    while reason is None:
+        if game.game_over:
+            winner, reason = game.winner(), game.reason
+        elif sum(moves_made.values()) >= task["max_plies"]:
+            reason = "move limit"
+            balance = material(board, a_color)
+            if abs(balance) >= task["adjudicate_margin"]:
+                winner = a_color if balance > 0 else b_color
+                reason = "adjudicated"
+        else:
+            color = board.turn
+            start = time.perf_counter()
+            move = players[color].choose_move(board)
+            think_time[color] += time.perf_counter() - start
+            game.push(move)
+            played.append(move)
+            moves_made[color] += 1
+
+    if winner is None:
+        result = DRAW
+    else:
+        result = WIN if winner == a_color else LOSS
+    record = {
+        "game": task["game"],
+        "a_color": "grey" if a_color == GREY_PIECES else "white",
+        "result": result,
+        "reason": reason,
+        "plies": sum(moves_made.values()),
+        "a_ms_per_move": round(1000 * think_time[a_color] / max(1, moves_made[a_color]), 3),
+        "b_ms_per_move": round(1000 * think_time[b_color] / max(1, moves_made[b_color]), 3),
+    }
+    if task.get("record_moves"):
+        record["moves"] = [tuple(move) for move in played]
+        if winner is None:
+            record["archive_result"] = DRAW_RESULT
+        else:
+            record["archive_result"] = GREY_WIN if winner == GREY_PIECES else WHITE_WIN
+    return record
+
+
+def elo_difference(wins, draws, losses):
+    """Estimate player A's Elo advantage and its 95% error margin.
+
+    A score of 0% or 100% gives an unbounded difference, -inf or +inf,
+    with an infinite margin.
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, math.inf
+    score = (wins + draws / 2) / games
+    if score in (0, 1):
+        return (math.inf if score else -math.inf), math.inf
+    variance = (
+        wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2
+    ) / games
+    margin = 1.96 * math.sqrt(variance / games)
+
+    def to_elo(value):
+        if value <= 0:
+            return -math.inf
+        if value >= 1:
+            return math.inf
+        return -400 * math.log10(1 / value - 1)
+
+    elo = to_elo(score)
+    error = (to_elo(min(score + margin, 1)) - to_elo(max(score - margin, 0))) / 2
+    return elo, error
+
+
+def make_tasks(args):
+    """Build one task per game; pairs of games share an opening with colors swapped."""
+    tasks = []
+    for game in range(args.games):
+        tasks.append({
+            "game": game,
+            "player_a": args.player_a,
+            "player_b": args.player_b,
+            "a_is_grey": game % 2 == 0,
+            "opening_plies": args.opening_plies,
+            "opening_seed": args.seed * 1000003 + game // 2,
+            "max_plies": args.max_plies,
+            "adjudicate_margin": args.adjudicate_margin,
+            "record_moves": bool(getattr(args, "archive", None)),
+        })
+    return tasks
+
+
+def run_tournament(args, out=None, archive=None):
+    """Play every game, write each result as a JSON line and return the tally.
+
+    If an ArchiveWriter (or anything with its add_game method) is given,
+    every game's moves are added to it too.
+    """
+    tasks = make_tasks(args)
+    if archive is not None:
+        for task in tasks:
+            task["record_moves"] = True
+    tally = {WIN: 0, DRAW: 0, LOSS: 0}
+    if args.workers > 0:
+        pool = multiprocessing.Pool(args.workers)
+        results = pool.imap_unordered(play_game, tasks)
+    else:
+        pool = None
+        results = map(play_game, tasks)
+    try:
+        for record in results:
+            tally[record["result"]] += 1
+            if archive is not None:
+                archive.add_game(record.pop("moves"), record.pop("archive_result"))
+            if out is not None:
+                out.write(json.dumps(record, separators=(",", ":")) + "\n")
+                out.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return tally
+
+
+def parse_args(argv=None):
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(description="Run a headless Checkers tournament.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="worker processes (0 plays in this process)")
+    parser.add_argument("--player-a", default="ai:ms=50")
+    parser.add_argument("--player-b", default="random")
+    parser.add_argument("--opening-plies", type=int, default=4,
+                        help="random moves played before the players take over")
+    parser.add_argument("--max-plies", type=int, default=200,
+                        help="plies after the opening before the game is adjudicated")
+    parser.add_argument("--adjudicate-margin", type=float, default=3,
+                        help="material lead in men that wins an adjudicated game")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--results", default="results.jsonl",
+                        help="file to append one JSON line per game to")
+    parser.add_argument("--archive", help="binary archive to write every game's moves to")
+    instrument.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main():
+    """Run a tournament from the command line and print the Elo estimate."""
+    args = parse_args()
+    if instrument.start_from_args(args) is not None:
+        # Games played in worker processes would not be measured
+        args.workers = 0
+    start = time.perf_counter()
+    with open(args.results, "a") as out:
+        if args.archive:
+            with ArchiveWriter(args.archive) as archive:
+                tally = run_tournament(args, out, archive)
+        else:
+            tally = run_tournament(args, out)
+    elapsed = time.perf_counter() - start
+
+    elo, error = elo_difference(tally[WIN], tally[DRAW], tally[LOSS])
+    print(f"{args.player_a} vs {args.player_b}: "
+          f"+{tally[WIN]} ={tally[DRAW]} -{tally[LOSS]}")
+    if math.isfinite(elo):
+        print(f"Elo difference: {elo:+.1f} +/- {error:.1f} (95%)")
+    else:
+        print(f"Elo difference: {elo:+} (unbounded: one player scored every point)")
+    print(f"{args.games} games in {elapsed:.1f}s ({args.games / elapsed:.2f} games/s "
+          f"on {max(1, args.workers)} workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Transposition table for the Checkers search.
+
+The table is a fixed number of two-entry buckets held in flat arrays of
+64-bit words, so its memory use is set up front by a cap in megabytes.
+The first entry of a bucket keeps the deepest search of a position; the
+second entry is always replaced.
+
+A SharedTranspositionTable keeps the same arrays in a block of
+multiprocessing.shared_memory, so processes searching in parallel can
+read and write one table. Entries are written without locks: the key
+word is stored XORed with the data word, so an entry torn by two
+processes writing at once no longer matches its key and is ignored.
+"""
+
+from array import array
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+# Bound types of a stored score
+EXACT, LOWER, UPPER = 1, 2, 3
+
+# Each entry is a 64-bit key and a 64-bit packed data word
+ENTRY_BYTES = 16
+BUCKET_SIZE = 2
+
+# Packed data layout: flag (2 bits), depth (8), score (18), move (13: a
+# flag, then the from- and to-squares in 6 bits each for 10x10 boards)
+_SCORE_OFFSET = 1 << 17
+
+TTEntry = namedtuple("TTEntry", "depth flag score src dst")
+
+
+def _pack(depth, flag, score, move):
+    """Pack an entry's data into one 64-bit word."""
+    data = flag | depth << 2 | (score + _SCORE_OFFSET) << 10
+    if move is not None:
+        data |= (1 | move.src << 1 | move.dst << 7) << 28
+    return data
+
+
+def _unpack(data):
+    """Unpack a data word into a TTEntry; src and dst are -1 without a move."""
+    move = data >> 28
+    if move & 1:
+        src, dst = move >> 1 & 63, move >> 7 & 63
+    else:
+        src = dst = -1
+    return TTEntry(data >> 2 & 0xFF, data & 3, (data >> 10 & 0x3FFFF) - _SCORE_OFFSET, src, dst)
+
+
+def bucket_count(size_mb):
+    """Number of buckets that fit in size_mb megabytes."""
+    return max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+
+
+class TranspositionTable:
+    """A fixed-size hash table of search results keyed by Zobrist hash."""
+
+    def __init__(self, size_mb=16):
+        """Initialize an empty table using at most size_mb megabytes."""
+        self._buckets = bucket_count(size_mb)
+        self._keys = array("Q", bytes(8 * BUCKET_SIZE * self._buckets))
+        self._data = array("Q", bytes(8 * BUCKET_SIZE * self._buckets))
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero the probe, hit, collision and store counters."""
+        self._probes = 0
+        self._hits = 0
+        self._collisions = 0
+        self._stores = 0
+        self._overwrites = 0
+
+    def clear(self):
+        """Empty the table."""
+        self._keys = array("Q", bytes(8 * BUCKET_SIZE * self._buckets))
+        self._data = array("Q", bytes(8 * BUCKET_SIZE * self._buckets))
+        self.reset_stats()
+
+    def probe(self, key):
+        """Look up a position; return a TTEntry or None."""
+        self._probes += 1
+        index = (key % self._buckets) * BUCKET_SIZE
+        keys = self._keys
+        data = self._data
+        for slot in (index, index + 1):
+            packed = data[slot]
+            if packed and keys[slot] ^ packed == key:
+                self._hits += 1
+                return _unpack(packed)
+        if data[index] or data[index + 1]:
+            self._collisions += 1
+        return None
+
+    def store(self, key, depth, flag, score, move=None):
+        """Store a search result, replacing by depth in the first slot."""
+        self._stores += 1
+        index = (key % self._buckets) * BUCKET_SIZE
+        keys = self._keys
+        data = self._data
+        packed = _pack(min(depth, 0xFF), flag, score, move)
+        first = data[index]
+        if not first or keys[index] ^ first == key or depth >= first >> 2 & 0xFF:
+            slot = index
+        else:
+            slot = index + 1
+        if data[slot] and keys[slot] ^ data[slot] != key:
+            self._overwrites += 1
+        keys[slot] = key ^ packed
+        data[slot] = packed
+
+    def stats(self):
+        """Get the table's counters and memory use as a dictionary."""
+        return {
+            "probes": self._probes,
+            "hits": self._hits,
+            "hit_rate": self.hit_rate,
+            "collisions": self._collisions,
+            "stores": self._stores,
+            "overwrites": self._overwrites,
+            "entries": self._buckets * BUCKET_SIZE,
+            "memory_bytes": self.memory_bytes,
+        }
+
+    # Getter for hit_rate
+    @property
+    def hit_rate(self):
+        return self._hits / self._probes if self._probes else 0.0
+
+    # Getter for collisions: probes that found the bucket full of other positions
+    @property
+    def collisions(self):
+        return self._collisions
+
+    # Getter for memory_bytes
+    @property
+    def memory_bytes(self):
+        return self._keys.itemsize * len(self._keys) + self._data.itemsize * len(self._data)
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """A TranspositionTable held in shared memory for processes searching together.
+
+    The process creating the table owns the shared memory block and must
+    unlink() it; other processes attach by name and only close() it. The
+    statistics counters are kept per process.
+    """
+
+    def __init__(self, size_mb=16, name=None):
+        """Create a zeroed table, or attach to the one with the given shared memory name."""
+        self._buckets = bucket_count(size_mb)
+        words = BUCKET_SIZE * self._buckets
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=16 * words)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+        self._owner = name is None
+        view = self._memory.buf.cast("Q")
+        self._keys = view[:words]
+        self._data = view[words:2 * words]
+        self._view = view
+        self.reset_stats()
+
+    def clear(self):
+        """Empty the table in place, for every process sharing it."""
+        self._memory.buf[:16 * len(self._keys)] = bytes(16 * len(self._keys))
+        self.reset_stats()
+
+    def close(self):
+        """Let go of the shared memory in this process."""
+        for view in (self._keys, self._data, self._view):
+            view.release()
+        self._memory.close()
+
+    def unlink(self):
+        """Close the table and free the shared memory; only the creating process may."""
+        self.close()
+        if self._owner:
+            self._memory.unlink()
+
+    # Getter for name: pass it to other processes to attach to the table
+    @property
+    def name(self):
+        return self._memory.name
+
+    # Getter for size_mb, for attaching with the same size
+    @property
+    def size_mb(self):
+        return self._buckets * BUCKET_SIZE * ENTRY_BYTES / (1024 * 1024)
@@ -0,0 +1,460 @@
+"""
+Rules variants of draughts and a bitboard engine that plays any of them.
+
+A Variant is plain data: the board size, the rows of men each side
+starts with, and whether men capture backwards, kings fly (move and
+capture along whole diagonals), the capture taking the most pieces is
+compulsory, and a man crowned in the middle of a capture stops there.
+Three are defined:
+
+* american      - 8x8, the rules BitBoard plays (English draughts)
+* brazilian     - 8x8 with the international rules
+* international - 10x10, men capture backwards, flying kings, the
+                  capture taking the most pieces must be played and a
+                  man is only crowned if its move ends on the far row
+
+A MoveGenerator builds the masks and tables of one variant from its size
+and picks the capture and slide functions for its rules when it is
+built, so generating moves never asks which rules apply. VariantBoard
+shares BitBoard's base class, so it has the same engine interface
+(generate_moves, moves_from, push, pop, jumpers, movers, hash, ...) and
+perft and the search run on it unchanged.
+
+Squares are numbered like BitBoard's, size // 2 to a row from the top
+left, so an 8x8 VariantBoard has the same masks and hash as a BitBoard.
+
+Run from the Checkers folder:
+    python -m checkers.perft --variant international --depth 6
+    python -m benchmarks.variants
+"""
+
+from collections import namedtuple
+from .constants import GREY_PIECES, WHITE
+from .bitboard import ALL_DIRECTIONS, DOWN, UP, BitBoard, BitBoardBase, Move, iter_squares
+from .zobrist import piece_keys
+
+
+class Variant(namedtuple("Variant", "name size rows men_capture_backwards flying_kings "
+                                    "majority_capture crown_ends_capture")):
+    """The rules of a draughts variant."""
+    __slots__ = ()
+
+
+AMERICAN = Variant("american", 8, 3, men_capture_backwards=False, flying_kings=False,
+                   majority_capture=False, crown_ends_capture=True)
+BRAZILIAN = Variant("brazilian", 8, 3, men_capture_backwards=True, flying_kings=True,
+                    majority_capture=True, crown_ends_capture=False)
+INTERNATIONAL = Variant("international", 10, 4, men_capture_backwards=True, flying_kings=True,
+                        majority_capture=True, crown_ends_capture=False)
+
+# Variants by name
+VARIANTS = {variant.name: variant for variant in (AMERICAN, BRAZILIAN, INTERNATIONAL)}
+
+
+def _short_captures(src, jumps, promotion, opponent, empty, moves, complete=True):
+    """Append the capture sequences of a piece jumping one square at a time.
+
+    The sequences are walked depth first with a stack of (square, captured
+    mask, crowned) entries, as in bitboard._jump_moves. A piece landing
+    on the promotion mask is crowned and its move ends. With
+    complete=False every landing square is listed.
+    """
+    stack = [(src, 0, 0)]
+    push = stack.append
+    pop = stack.pop
+    append = moves.append
+    while stack:
+        square, captured, crowned = pop()
+        if crowned:
+            append(Move(src, square, captured))
+            continue
+        if captured and not complete:
+            append(Move(src, square, captured))
+        # Captured pieces stay on the board until the move ends
+        targets = opponent & ~captured
+        extended = False
+        for over, land, land_square in jumps[square]:
+            if over & targets and land & empty:
+                push((land_square, captured | over, land & promotion))
+                extended = True
+        if complete and captured and not extended:
+            append(Move(src, square, captured))
+
+
+def _flying_captures(src, rays, opponent, empty, moves, complete=True):
+    """Append the capture sequences of a flying king.
+
+    A flying king captures the first piece along a diagonal, however far
+    away, and may land on any empty square beyond it. With complete=False
+    every landing square is listed.
+    """
+    stack = [(src, 0)]
+    push = stack.append
+    pop = stack.pop
+    append = moves.append
+    while stack:
+        square, captured = pop()
+        if captured and not complete:
+            append(Move(src, square, captured))
+        targets = opponent & ~captured
+        extended = False
+        for ray in rays[square]:
+            squares = iter(ray)
+            for bit, _ in squares:
+                if not bit & empty:
+                    break
+            else:
+                continue
+            if not bit & targets:
+                continue
+            for land, land_square in squares:
+                if not land & empty:
+                    break
+                push((land_square, captured | bit))
+                extended = True
+        if complete and captured and not extended:
+            append(Move(src, square, captured))
+
+
+class MoveGenerator:
+    """The masks, tables and move generation of one Variant."""
+
+    def __init__(self, variant):
+        """Build the tables for the variant's board and choose its move functions."""
+        size = variant.size
+        half = size // 2
+        self._variant = variant
+        self._squares = size * half
+        self._full = (1 << self._squares) - 1
+        rows = [((1 << half) - 1) << (half * row) for row in range(size)]
+        even = odd = first = last = 0
+        for row, row_mask in enumerate(rows):
+            if row % 2:
+                odd |= row_mask
+            else:
+                even |= row_mask
+            first |= 1 << (half * row)
+            last |= 1 << (half * row + half - 1)
+        top, bottom = rows[0], rows[-1]
+        self._top, self._bottom = top, bottom
+        self._start_white = sum(rows[:variant.rows])
+        self._start_grey = sum(rows[size - variant.rows:])
+
+        # Like bitboard._STEPS, with the row length as the shift
+        self._steps = (
+            (even & ~top, -half, odd & ~first, -half - 1),              # UP_LEFT
+            (even & ~top & ~last, -half + 1, odd, -half),               # UP_RIGHT
+            (even, half, odd & ~bottom & ~first, half - 1),             # DOWN_LEFT
+            (even & ~last, half + 1, odd & ~bottom, half),              # DOWN_RIGHT
+        )
+        self._neighbours = tuple(
+            tuple(self.step(1 << square, direction).bit_length() - 1
+                  for square in range(self._squares))
+            for direction in ALL_DIRECTIONS
+        )
+        jumps = {directions: self._jump_table(directions)
+                 for directions in (UP, DOWN, ALL_DIRECTIONS)}
+
+        # Directions men move and capture in, by color
+        self._forward = {GREY_PIECES: UP, WHITE: DOWN}
+        if variant.men_capture_backwards:
+            self._man_captures = {GREY_PIECES: ALL_DIRECTIONS, WHITE: ALL_DIRECTIONS}
+        else:
+            self._man_captures = self._forward
+        self._man_jumps = {color: jumps[directions]
+                           for color, directions in self._man_captures.items()}
+        self._crowning = {GREY_PIECES: top, WHITE: bottom}
+        if variant.crown_ends_capture:
+            self._capture_crowning = self._crowning
+        else:
+            self._capture_crowning = {GREY_PIECES: 0, WHITE: 0}
+
+        # The rules are settled here, once, rather than for every square
+        if variant.flying_kings:
+            self._rays = tuple(
+                tuple(self._ray(square, direction) for direction in ALL_DIRECTIONS)
+                for square in range(self._squares)
+            )
+            self._king_captures = self._flying_king_captures
+            self._king_jumpers = self._flying_king_jumpers
+            self._king_slides = self._flying_king_slides
+        else:
+            self._king_jumps = jumps[ALL_DIRECTIONS]
+            self._king_captures = self._short_king_captures
+            self._king_jumpers = self._short_king_jumpers
+            self._king_slides = self._short_king_slides
+
+    def _ray(self, square, direction):
+        """List the (bit, square) pairs along a diagonal from a square, nearest first."""
+        ray = []
+        square = self._neighbours[direction][square]
+        while square >= 0:
+            ray.append((1 << square, square))
+            square = self._neighbours[direction][square]
+        return tuple(ray)
+
+    def _jump_table(self, directions):
+        """List the (jumped bit, landing bit, landing square) of every jump from each square."""
+        table = []
+        for square in range(self._squares):
+            jumps = []
+            for direction in reversed(directions):
+                over = self._neighbours[direction][square]
+                land = self._neighbours[direction][over] if over >= 0 else -1
+                if land >= 0:
+                    jumps.append((1 << over, 1 << land, land))
+            table.append(tuple(jumps))
+        return tuple(table)
+
+    def step(self, bits, direction):
+        """Move every set bit one square in the given diagonal direction."""
+        even_mask, even_shift, odd_mask, odd_shift = self._steps[direction]
+        if even_shift > 0:
+            return ((bits & even_mask) << even_shift) | ((bits & odd_mask) << odd_shift)
+        return ((bits & even_mask) >> -even_shift) | ((bits & odd_mask) >> -odd_shift)
+
+    def _shift_jumpers(self, pieces, directions, opponent, empty):
+        """Get the pieces that can jump an adjacent opponent in one of the directions."""
+        step = self.step
+        result = 0
+        for direction in directions:
+            # Walk back from the empty landing squares to the jumping pieces
+            back = direction ^ 3
+            result |= step(step(empty, back) & opponent, back) & pieces
+        return result
+
+    def _short_king_jumpers(self, kings, opponent, empty):
+        """Get the kings that can capture, moving one square at a time."""
+        return self._shift_jumpers(kings, ALL_DIRECTIONS, opponent, empty)
+
+    def _flying_king_jumpers(self, kings, opponent, empty):
+        """Get the flying kings that can capture along one of their diagonals."""
+        result = 0
+        for square in iter_squares(kings):
+            for ray in self._rays[square]:
+                squares = iter(ray)
+                for bit, _ in squares:
+                    if not bit & empty:
+                        break
+                else:
+                    continue
+                if bit & opponent and next(squares, (0, 0))[0] & empty:
+                    result |= 1 << square
+                    break
+        return result
+
+    def jumpers(self, own, opponent, kings, color):
+        """Get a mask of the pieces in own that have a capture available."""
+        empty = ~(own | opponent) & self._full
+        men = own & ~kings
+        return (self._shift_jumpers(men, self._man_captures[color], opponent, empty)
+                | self._king_jumpers(own & kings, opponent, empty))
+
+    def movers(self, own, opponent, kings, color):
+        """Get a mask of the pieces in own that have a simple move available."""
+        empty = ~(own | opponent) & self._full
+        forward = self._forward[color]
+        result = 0
+        for direction in ALL_DIRECTIONS:
+            pieces = own if direction in forward else own & kings
+            result |= self.step(empty, direction ^ 3) & pieces
+        return result
+
+    def _short_king_captures(self, src, opponent, empty, moves, complete=True):
+        """Append the capture sequences of a king that moves one square at a time."""
+        _short_captures(src, self._king_jumps, 0, opponent, empty, moves, complete)
+
+    def _flying_king_captures(self, src, opponent, empty, moves, complete=True):
+        """Append the capture sequences of a flying king."""
+        _flying_captures(src, self._rays, opponent, empty, moves, complete)
+
+    def _short_king_slides(self, kings, empty, moves):
+        """Append every simple move of kings that move one square at a time."""
+        step = self.step
+        for direction in ALL_DIRECTIONS:
+            sources = self._neighbours[direction ^ 3]
+            for dst in iter_squares(step(kings, direction) & empty):
+                moves.append(Move(sources[dst], dst, 0))
+
+    def _flying_king_slides(self, kings, empty, moves):
+        """Append every simple move of flying kings, along whole diagonals."""
+        append = moves.append
+        for src in iter_squares(kings):
+            for ray in self._rays[src]:
+                for bit, dst in ray:
+                    if not bit & empty:
+                        break
+                    append(Move(src, dst, 0))
+
+    def generate(self, own, opponent, kings, color):
+        """Get every legal move for the side owning own.
+
+        Captures are compulsory and only complete sequences are listed;
+        with majority capture only the sequences taking the most pieces.
+        """
+        empty = ~(own | opponent) & self._full
+        men = own & ~kings
+        own_kings = own & kings
+        jumpers = (self._shift_jumpers(men, self._man_captures[color], opponent, empty)
+                   | self._king_jumpers(own_kings, opponent, empty))
+        moves = []
+        if jumpers:
+            man_jumps = self._man_jumps[color]
+            crowning = self._capture_crowning[color]
+            for square in iter_squares(jumpers):
+                bit = 1 << square
+                if own_kings & bit:
+                    self._king_captures(square, opponent, empty | bit, moves)
+                else:
+                    _short_captures(square, man_jumps, crowning, opponent, empty | bit, moves)
+            # A piece can go round a loop of jumps either way
+            moves = list(dict.fromkeys(moves))
+            if self._variant.majority_capture:
+                most = max(move.captured.bit_count() for move in moves)
+                moves = [move for move in moves if move.captured.bit_count() == most]
+            return moves
+        step = self.step
+        for direction in self._forward[color]:
+            sources = self._neighbours[direction ^ 3]
+            for dst in iter_squares(step(men, direction) & empty):
+                moves.append(Move(sources[dst], dst, 0))
+        if own_kings:
+            self._king_slides(own_kings, empty, moves)
+        return moves
+
+    def piece_moves(self, square, own, opponent, kings, color):
+        """Get every move of the piece on a square, stopping on any landing of a capture.
+
+        Unlike generate, the other pieces are not asked whether they must
+        capture, and majority capture is not applied.
+        """
+        bit = 1 << square
+        empty = ~(own | opponent) & self._full
+        moves = []
+        if kings & bit:
+            self._king_slides(bit, empty, moves)
+            if self._king_jumpers(bit, opponent, empty):
+                self._king_captures(square, opponent, empty | bit, moves, complete=False)
+        else:
+            sources = self._neighbours
+            for direction in self._forward[color]:
+                dst = sources[direction][square]
+                if dst >= 0 and empty >> dst & 1:
+                    moves.append(Move(square, dst, 0))
+            if self._shift_jumpers(bit, self._man_captures[color], opponent, empty):
+                _short_captures(square, self._man_jumps[color], self._capture_crowning[color],
+                                opponent, empty | bit, moves, complete=False)
+        # A piece can go round a loop of jumps either way
+        return list(dict.fromkeys(moves))
+
+    def square_of(self, row, col):
+        """Map a dark board square to its bit index."""
+        return row * (self._variant.size // 2) + col // 2
+
+    def row_col_of(self, square):
+        """Map a bit index back to its board row and column."""
+        row = square // (self._variant.size // 2)
+        return row, 2 * (square % (self._variant.size // 2)) + (row + 1) % 2
+
+    # Getter for variant
+    @property
+    def variant(self):
+        return self._variant
+
+    # Getter for squares: the number of playable squares
+    @property
+    def squares(self):
+        return self._squares
+
+    # Getter for start: the (grey, white) masks of the starting position
+    @property
+    def start(self):
+        return self._start_grey, self._start_white
+
+    # Getter for crowning: the row each color's men are crowned on, as a mask
+    @property
+    def crowning(self):
+        return self._crowning
+
+
+# MoveGenerators already built, by variant
+_GENERATORS = {}
+
+
+def move_generator(variant):
+    """Get the MoveGenerator for a variant, building it the first time."""
+    generator = _GENERATORS.get(variant)
+    if generator is None:
+        generator = _GENERATORS[variant] = MoveGenerator(variant)
+    return generator
+
+
+def new_board(variant=AMERICAN):
+    """Get an engine with a variant's starting position: a BitBoard for american."""
+    if variant == AMERICAN:
+        return BitBoard()
+    return VariantBoard(variant)
+
+
+class VariantBoard(BitBoardBase):
+    """Represents a position of any Variant as bitboards, like BitBoard."""
+
+    def __init__(self, variant=AMERICAN, grey=None, white=None, kings=0, turn=GREY_PIECES):
+        """Initialize the VariantBoard, by default with the variant's starting position."""
+        self._generator = move_generator(variant)
+        self._keys = piece_keys(self._generator.squares)
+        self._crowning = self._generator.crowning
+        start_grey, start_white = self._generator.start
+        super().__init__(start_grey if grey is None else grey,
+                         start_white if white is None else white, kings, turn)
+
+    def copy(self):
+        """Return an independent copy of the position without its undo history."""
+        board = super().copy()
+        board._generator = self._generator
+        board._keys = self._keys
+        board._crowning = self._crowning
+        return board
+
+    def _square_of(self, row, col):
+        """Map a dark board square to its bit index."""
+        return self._generator.square_of(row, col)
+
+    def _row_col_of(self, square):
+        """Map a bit index back to its board row and column."""
+        return self._generator.row_col_of(square)
+
+    def jumpers(self, color):
+        """Get a mask of the pieces of a color that have a capture available."""
+        own, opponent = self._masks(color)
+        return self._generator.jumpers(own, opponent, self._kings, color)
+
+    def movers(self, color):
+        """Get a mask of the pieces of a color that have a simple move available."""
+        own, opponent = self._masks(color)
+        return self._generator.movers(own, opponent, self._kings, color)
+
+    def generate_moves(self, color=None):
+        """Get every legal move for a side (by default the side to move)."""
+        if color is None:
+            color = self._turn
+        own, opponent = self._masks(color)
+        return self._generator.generate(own, opponent, self._kings, color)
+
+    def moves_from(self, square):
+        """Get every move of the piece on a square, stopping on any landing of a capture."""
+        color = self.color_at(square)
+        if color is None:
+            return []
+        own, opponent = self._masks(color)
+        return self._generator.piece_moves(square, own, opponent, self._kings, color)
+
+    # Getter for variant
+    @property
+    def variant(self):
+        return self._generator.variant
+
+    # Getter for generator
+    @property
+    def generator(self):
+        return self._generator
@@ -0,0 +1,67 @@
+"""
+Zobrist hashing for Checkers positions.
+
+Every (piece kind, square) pair and the side to move get a fixed random
+64-bit key; a position's hash is the XOR of the keys that apply to it, so
+it can be updated incrementally as pieces move, are captured or crowned.
+"""
+
+import random
+from .constants import GREY_PIECES
+
+# Piece kinds
+GREY_MAN, GREY_KING, WHITE_MAN, WHITE_KING = range(4)
+
+# Fixed seed so hashes are the same in every process and every run
+SEED = 0x0C4EC4E5
+
+_random = random.Random(SEED)
+PIECE_KEYS = tuple(
+    tuple(_random.getrandbits(64) for _ in range(32)) for _ in range(4)
+)
+# XORed in when white is to move
+SIDE_KEY = _random.getrandbits(64)
+del _random
+
+
+def kind_of(color, king):
+    """Get the piece kind for a color and king flag."""
+    if color == GREY_PIECES:
+        return GREY_KING if king else GREY_MAN
+    return WHITE_KING if king else WHITE_MAN
+
+
+def piece_keys(squares):
+    """Get the keys of every piece kind for a board with any number of squares.
+
+    The first 32 keys of each kind are PIECE_KEYS, so 8x8 positions hash
+    the same on every engine.
+    """
+    if squares <= 32:
+        return tuple(keys[:squares] for keys in PIECE_KEYS)
+    extra = random.Random(SEED + squares)
+    return tuple(
+        keys + tuple(extra.getrandbits(64) for _ in range(squares - 32)) for keys in PIECE_KEYS
+    )
+
+
+def mask_key(kind, bits, piece_keys=PIECE_KEYS):
+    """XOR together the keys of a piece kind on every square in a mask."""
+    keys = piece_keys[kind]
+    key = 0
+    while bits:
+        low = bits & -bits
+        key ^= keys[low.bit_length() - 1]
+        bits ^= low
+    return key
+
+
+def hash_position(grey, white, kings, turn, keys=PIECE_KEYS):
+    """Compute the hash of a position from scratch, by default with the 32-square keys."""
+    key = (
+        mask_key(GREY_MAN, grey & ~kings, keys) ^ mask_key(GREY_KING, grey & kings, keys)
+        ^ mask_key(WHITE_MAN, white & ~kings, keys) ^ mask_key(WHITE_KING, white & kings, keys)
+    )
+    if turn != GREY_PIECES:
+        key ^= SIDE_KEY
+    return key
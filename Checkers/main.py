@@ -1,15 +1,34 @@
 """Main module for running the Checkers game."""
 
+import argparse
+import time
 import pygame
-from checkers.constants import WIDTH, HEIGHT, SQUARE_SIZE
+from checkers.constants import WIDTH, HEIGHT, ROWS, SQUARE_SIZE, GREY_PIECES, WHITE
 from checkers.game import Game
+from checkers.background import BackgroundThinker
+from checkers.bitboard import row_col_of
+from checkers.book import OpeningBook
+from checkers.game_logger import GameLogger, DEFAULT_LOG_FILE, FORMATS, JSONL
+from checkers.render import Renderer, FrameStats
+from checkers.variants import AMERICAN, VARIANTS
+from checkers import instrument
 
 # Frames per second
 FPS=60
 
-# Initialize the game window
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Checkers')
+# Event asking the loop to let the computer move
+AI_MOVE = pygame.USEREVENT + 1
+
+# Event posted when a background search has news; its color is the player's
+AI_PROGRESS = pygame.USEREVENT + 2
+
+# Longest the event-driven loop sleeps when nothing happens, in milliseconds;
+# the game log is checked for a due flush each time it wakes
+IDLE_TIMEOUT = 1000
+
+# Events the event-driven loop wakes up for; mouse motion is ignored
+LOOP_EVENTS = (pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.WINDOWEXPOSED,
+               pygame.WINDOWRESTORED, AI_MOVE, AI_PROGRESS)
 
 def get_row_col_from_mouse(pos):
     """Get the row and column from the mouse position."""
@@ -18,33 +37,213 @@ def get_row_col_from_mouse(pos):
     col = x // SQUARE_SIZE
     return row, col
 
-def main():
-    """Main function to run the Checkers game."""
+def parse_args():
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(description="Play Checkers.")
+    parser.add_argument("--grey", choices=("human", "ai"), default="human",
+                        help="who plays the grey pieces (moves first)")
+    parser.add_argument("--white", choices=("human", "ai"), default="human",
+                        help="who plays the white pieces")
+    parser.add_argument("--variant", default=AMERICAN.name,
+                        choices=[name for name, variant in VARIANTS.items() if variant.size == ROWS],
+                        help="rules to play by (the window draws 8x8 boards)")
+    parser.add_argument("--think-ms", type=int, default=1000,
+                        help="time limit per AI move in milliseconds")
+    parser.add_argument("--hash-mb", type=float, default=16,
+                        help="transposition table size per AI player in megabytes")
+    parser.add_argument("--ai-workers", type=int, default=1,
+                        help="processes each AI player searches with, sharing its table")
+    parser.add_argument("--ponder", action="store_true",
+                        help="let AI players think on a human opponent's time")
+    parser.add_argument("--tablebase", metavar="DIRECTORY",
+                        help="folder of endgame tables for the AI players")
+    parser.add_argument("--book", help="opening book the AI players take their first moves from")
+    parser.add_argument("--log", default=DEFAULT_LOG_FILE,
+                        help="file to record the game in")
+    parser.add_argument("--log-format", choices=FORMATS, default=JSONL)
+    parser.add_argument("--no-log", action="store_true", help="do not record the game")
+    parser.add_argument("--render", choices=("dirty", "full"), default="dirty",
+                        help="redraw only changed squares, or the whole board every frame")
+    parser.add_argument("--frame-stats", action="store_true",
+                        help="print frame drawing times when the game ends")
+    parser.add_argument("--loop", choices=("event", "poll"), default="event",
+                        help="sleep until something happens, or redraw at a fixed frame rate")
+    parser.add_argument("--fps", type=int, default=FPS,
+                        help="frame cap of the polling loop, e.g. for animations")
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    if args.variant != AMERICAN.name and (args.tablebase or args.book):
+        parser.error("endgame tables and opening books are for american checkers only")
+    return args
+
+def post_progress(color):
+    """Make a notify function posting an AI_PROGRESS event for a player's thinker."""
+    def notify(message):
+        pygame.event.post(pygame.event.Event(AI_PROGRESS, color=color))
+    return notify
+
+def create_players(args):
+    """Map each color to a BackgroundThinker, or None for a human player.
+
+    Computer players search away from the main loop, in a worker process
+    or on a pool of them, so the window keeps running while they think.
+    """
+    players = {}
+    kinds = {GREY_PIECES: args.grey, WHITE: args.white}
+    for color, kind in kinds.items():
+        other = WHITE if color == GREY_PIECES else GREY_PIECES
+        if kind != "ai":
+            players[color] = None
+        else:
+            # Pondering against another computer would only slow it down
+            ponder = args.ponder and kinds[other] == "human"
+            players[color] = BackgroundThinker(args.think_ms, table_mb=args.hash_mb,
+                                               tablebase_dir=args.tablebase, ponder=ponder,
+                                               notify=post_progress(color),
+                                               workers=args.ai_workers)
+    return players
+
+def start_ai_move(game, player):
+    """Let an AI player move: from the book at once, or by starting its background search."""
+    if not player.thinking:
+        if game.play_book_move():
+            print("AI book move")
+            return
+        player.think(game.board.engine)
+
+def handle_ai_progress(game, color, thinker):
+    """Show a background search's progress and play its move once it is done."""
+    for message in thinker.poll():
+        if message.move is None:
+            continue
+        move = f"{row_col_of(message.move.src)}-{row_col_of(message.move.dst)}"
+        if not message.done:
+            pygame.display.set_caption(
+                f"Checkers - AI depth {message.depth}, best {move}, "
+                f"{message.nodes_per_second} nodes/s"
+            )
+        elif game.turn == color and not game.game_over:
+            pygame.display.set_caption("Checkers")
+            game.play_move(message.move)
+            print(
+                f"AI depth {message.depth}, score {message.score}, "
+                f"{message.nodes} nodes, {message.nodes_per_second} nodes/s"
+            )
+
+def timed_update(game, stats):
+    """Redraw the game and record how long it took."""
+    start = time.perf_counter()
+    drawn = game.update()
+    stats.record((time.perf_counter() - start) * 1000, drawn)
+
+def handle_event(game, players, event):
+    """Handle one event; return False once the window is closed."""
+    if event.type == pygame.QUIT:
+        return False
+
+    # Redraw everything once the window has been uncovered or restored
+    if event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED) and game.renderer is not None:
+        game.renderer.invalidate()
+
+    if event.type == pygame.MOUSEBUTTONDOWN and players[game.turn] is None:
+        row, col = get_row_col_from_mouse(event.pos)
+        game.select(row, col)
+
+    if event.type == AI_MOVE and players[game.turn] is not None:
+        start_ai_move(game, players[game.turn])
+
+    if event.type == AI_PROGRESS:
+        handle_ai_progress(game, event.color, players[event.color])
+    return True
+
+def poll_loop(game, players, stats, fps=FPS):
+    """Check for events and redraw fps times a second until the game ends."""
     run = True
     clock = pygame.time.Clock()
-    game = Game(WIN)
-
     while run:
-        clock.tick(FPS)
+        clock.tick(fps)
 
-        # Check for a winner
-        if game.winner() != None:
-            print(game.winner())
+        # Check for the end of the game
+        if game.game_over:
+            print(game.result())
             run = False
         
         # handle events
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
+            run = handle_event(game, players, event) and run
 
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-                row, col = get_row_col_from_mouse(pos)
-                game.select(row, col)
+        # Let the computer move on its turn
+        if run and players[game.turn] is not None:
+            start_ai_move(game, players[game.turn])
                 
         # Update the game state
-        game.update()
+        timed_update(game, stats)
+        game.logger.tick()
+
+def event_loop(game, players, stats):
+    """Sleep until an event arrives and redraw only after something happened."""
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(LOOP_EVENTS)
+    run = True
+    changed = True
+    while run:
+        if changed:
+            timed_update(game, stats)
+            if game.game_over:
+                print(game.result())
+                break
+            # Draw the human's move before the computer starts thinking
+            player = players[game.turn]
+            if player is not None and not getattr(player, "thinking", False):
+                pygame.event.post(pygame.event.Event(AI_MOVE))
+            changed = False
+
+        # Block until an event arrives; a timeout returns NOEVENT
+        event = pygame.event.wait(IDLE_TIMEOUT)
+        game.logger.tick()
+        if event.type == pygame.NOEVENT:
+            continue
+        for event in [event] + pygame.event.get():
+            run = handle_event(game, players, event) and run
+        changed = True
+    pygame.event.set_allowed(None)
+
+def main():
+    """Main function to run the Checkers game."""
+    args = parse_args()
+    instrument.start_from_args(args)
+    players = create_players(args)
+
+    # Initialize the game window
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('Checkers')
+
+    logger = GameLogger(None if args.no_log else args.log, args.log_format)
+    game = Game(win, logger, VARIANTS[args.variant])
+    if args.render == "dirty":
+        game.renderer = Renderer(win)
+    if args.book:
+        game.book = OpeningBook(args.book)
+    game.thinkers = [player for player in players.values() if player is not None]
+    stats = FrameStats()
+
+    if args.loop == "event":
+        event_loop(game, players, stats)
+    else:
+        poll_loop(game, players, stats, args.fps)
     
+    if args.frame_stats:
+        summary = stats.summary()
+        print(
+            f"{summary['frames']} frames, {summary['skipped']} skipped, "
+            f"mean {summary['mean_ms']:.3f} ms, p99 {summary['p99_ms']:.3f} ms, "
+            f"max {summary['max_ms']:.3f} ms, drawing {summary['draw_cpu_share']:.1%} of the time"
+        )
+    game.close()
+    for player in players.values():
+        if player is not None:
+            player.close()
     pygame.quit()
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,12 +1,126 @@
+import asyncio
+import importlib.util
+import io
+import itertools
+import os
+import json
+import math
+import random
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
-from main import WIN
+from unittest.mock import patch
 from checkers.game import Game
+from checkers.board import Board, DRAW_PLIES
+from checkers.game_logger import GameLogger
+from checkers.analysis import AnalysisCache, AnalysisService, PositionError
+from checkers.analysis import analyse, parse_position, position_string
+from checkers.archive import ArchiveReader, ArchiveWriter, read_log, replay, resolve_move, write_text_log
+from checkers.archive import GREY_WIN, WHITE_WIN, DRAW as DRAW_RESULT, UNKNOWN as UNKNOWN_RESULT
+from checkers.pdn import PDNError, PDNGame, START_FEN, format_fen, format_move, parse_fen
+from checkers.pdn import read_games, write_game
+from checkers.book import BookBuilder, BookMove, OpeningBook, self_play
+from checkers.ai import AIPlayer, Searcher, WIN_BOUND, WIN_SCORE, legal_moves
+from checkers.tablebase import SliceIndex, Tablebase, TablebaseError, build_slice, generate
+from checkers.tablebase import WIN as TB_WIN, DRAW as TB_DRAW, LOSS as TB_LOSS
+from checkers.transposition import SharedTranspositionTable, TranspositionTable
+from checkers.transposition import EXACT, LOWER, UPPER
+from checkers.parallel import ParallelSearcher
+from checkers.background import BackgroundThinker
+from checkers.zobrist import hash_position
+from checkers.perft import INTERNATIONAL_PERFT, STARTING_PERFT, divide, perft
+from checkers.variants import AMERICAN, BRAZILIAN, INTERNATIONAL, VariantBoard
+from checkers.instrument import Profiler
+from checkers.server import Connection, GameServer, MAX_PENDING_REPLIES
+from checkers.measure import deep_size
+from checkers.loadgen import Client, run_load
+from checkers.tournament import elo_difference, make_tasks, play_game, random_opening, run_tournament
+from checkers.tournament import parse_args as parse_tournament_args
+from checkers.bitboard import BitBoard, BitPiece, Move, row_col_of, square_of
+from checkers.bitboard import ALL_DIRECTIONS, BOTTOM_ROW, DOWN, FULL, TOP_ROW, UP, iter_squares, step
 from checkers.constants import WHITE, GREY_PIECES
 
+def mask(*squares):
+    """Build a bitboard mask from (row, col) pairs."""
+    bits = 0
+    for row, col in squares:
+        bits |= 1 << square_of(row, col)
+    return bits
+
+def move_squares(moves):
+    """Map captured pieces of a get_valid_moves result to (row, col) pairs."""
+    return {
+        square: sorted((piece.row, piece.col) for piece in captured)
+        for square, captured in moves.items()
+    }
+
+def _recursive_jumps(src, bit, directions, opponent, empty, captured, moves):
+    """Recursively collect completed jump sequences; return True if any jump was found."""
+    promotion = TOP_ROW if directions == UP else BOTTOM_ROW
+    found = False
+    for direction in directions:
+        over = step(bit, direction) & opponent & ~captured
+        if not over:
+            continue
+        land = step(over, direction) & empty
+        if not land:
+            continue
+        found = True
+        total = captured | over
+        crowned = directions != ALL_DIRECTIONS and land & promotion
+        if crowned or not _recursive_jumps(src, land, directions, opponent, empty, total, moves):
+            moves.append(Move(src, land.bit_length() - 1, total))
+    return found
+
+def recursive_captures(board):
+    """List the side to move's jump sequences with the recursive generator _jump_moves replaced."""
+    color = board.turn
+    own, opponent = (board.grey, board.white) if color == GREY_PIECES else (board.white, board.grey)
+    empty = ~(board.grey | board.white) & FULL
+    forward = UP if color == GREY_PIECES else DOWN
+    moves = []
+    for square in iter_squares(board.jumpers(color)):
+        bit = 1 << square
+        if board.kings & bit:
+            start = len(moves)
+            _recursive_jumps(square, bit, ALL_DIRECTIONS, opponent, empty | bit, 0, moves)
+            moves[start:] = dict.fromkeys(moves[start:])
+        else:
+            _recursive_jumps(square, bit, forward, opponent, empty, 0, moves)
+    return moves
+
+def capture_positions(count, seed=1):
+    """Collect positions where the side to move must capture, a tenth with long chains."""
+    rng = random.Random(seed)
+    positions = []
+    # Grey kings and men scattered among white men, kept when a chain takes three or more
+    while len(positions) < count // 10:
+        squares = rng.sample(range(32), 12)
+        grey = sum(1 << square for square in squares[:3])
+        white = sum(1 << square for square in squares[3:]) & ~0xF0000000
+        board = BitBoard(grey, white, kings=sum(1 << square for square in squares[:2]))
+        if grey & ~board.kings & TOP_ROW:
+            continue
+        moves = board.generate_moves()
+        if moves and max(move.captured.bit_count() for move in moves) >= 3:
+            positions.append(board)
+    board = BitBoard()
+    while len(positions) < count:
+        moves = board.generate_moves()
+        if not moves:
+            board = BitBoard()
+            continue
+        if moves[0].captured:
+            positions.append(board.copy())
+        board.push(rng.choice(moves))
+    return positions
+
 class TestCheckersGame(unittest.TestCase):
     def setUp(self):
         """Set up the game for testing."""
-        self.game = Game(WIN)
+        self.game = Game(None, GameLogger(None))
 
     def test_initialization(self):
         """Test the initial state of the game."""
@@ -32,5 +146,1297 @@ class TestCheckersGame(unittest.TestCase):
         self.assertEqual(moved_piece.col, 1)
         self.assertEqual(moved_piece.color, GREY_PIECES)
 
+    def test_promotion_flips_flag(self):
+        """Test a man reaching the far row is crowned in place, not replaced."""
+        board = Board(BitBoard(grey=mask((1, 2)), white=mask((6, 1))))
+        piece = board.get_piece(1, 2)
+        board.move(piece, 0, 1)
+        self.assertIs(board.get_piece(0, 1), piece)
+        self.assertTrue(piece.king)
+        self.assertFalse(hasattr(piece, "__dict__"))
+
+class TestBitBoard(unittest.TestCase):
+    def test_starting_position(self):
+        """Test the starting position matches the original board setup."""
+        board = BitBoard()
+        self.assertEqual(board.grey_left, 12)
+        self.assertEqual(board.white_left, 12)
+        self.assertEqual(board.get_piece(5, 0), BitPiece(5, 0, GREY_PIECES, False))
+        self.assertEqual(board.get_piece(2, 1), BitPiece(2, 1, WHITE, False))
+        self.assertEqual(board.get_piece(3, 2), 0)
+        self.assertEqual(board.get_piece(0, 0), 0)
+
+    def test_simple_moves(self):
+        """Test simple moves agree with the original board's moves."""
+        board = BitBoard()
+        self.assertEqual(move_squares(board.get_valid_moves(board.get_piece(5, 0))), {(4, 1): []})
+        self.assertEqual(
+            move_squares(board.get_valid_moves(board.get_piece(5, 2))),
+            {(4, 1): [], (4, 3): []}
+        )
+        self.assertEqual(move_squares(board.get_valid_moves(board.get_piece(2, 7))), {(3, 6): []})
+        self.assertEqual(move_squares(board.get_valid_moves(board.get_piece(6, 1))), {})
+
+    def test_double_jump(self):
+        """Test both landings of a double jump are listed with their captures."""
+        board = BitBoard(grey=mask((6, 1)), white=mask((5, 2), (3, 4)))
+        self.assertEqual(
+            move_squares(board.get_valid_moves(board.get_piece(6, 1))),
+            {(5, 0): [], (4, 3): [(5, 2)], (2, 5): [(3, 4), (5, 2)]}
+        )
+
+    def test_men_capture_forward_only(self):
+        """Test a man cannot jump backwards but a king can."""
+        board = BitBoard(grey=mask((4, 3)), white=mask((5, 2)))
+        self.assertEqual(
+            move_squares(board.get_valid_moves(board.get_piece(4, 3))),
+            {(3, 2): [], (3, 4): []}
+        )
+        board = BitBoard(grey=mask((4, 3)), white=mask((5, 2)), kings=mask((4, 3)))
+        self.assertEqual(
+            move_squares(board.get_valid_moves(board.get_piece(4, 3))),
+            {(3, 2): [], (3, 4): [], (5, 4): [], (6, 1): [(5, 2)]}
+        )
+
+    def test_promotion_ends_jump(self):
+        """Test a man reaching the far row is crowned and stops jumping."""
+        board = BitBoard(grey=mask((2, 3)), white=mask((1, 2), (1, 0)))
+        self.assertEqual(
+            move_squares(board.get_valid_moves(board.get_piece(2, 3))),
+            {(1, 4): [], (0, 1): [(1, 2)]}
+        )
+        board.move(board.get_piece(2, 3), 0, 1)
+        self.assertTrue(board.get_piece(0, 1).king)
+
+    def test_move_masks(self):
+        """Test the movers and jumpers masks."""
+        board = BitBoard()
+        self.assertEqual(board.movers(GREY_PIECES), mask((5, 0), (5, 2), (5, 4), (5, 6)))
+        self.assertEqual(board.jumpers(GREY_PIECES), 0)
+        board = BitBoard(grey=mask((5, 2)), white=mask((4, 3), (4, 1)))
+        self.assertEqual(board.jumpers(GREY_PIECES), mask((5, 2)))
+        self.assertEqual(board.jumpers(WHITE), mask((4, 1), (4, 3)))
+
+    def test_board_adapter(self):
+        """Test the Board returns its own pieces for the engine's moves."""
+        board = Game(None, GameLogger(None)).board
+        moves = board.get_valid_moves(board.get_piece(5, 6))
+        self.assertEqual(set(moves), {(4, 5), (4, 7)})
+        self.assertEqual(board.grey_left, board.engine.grey_left)
+
+class TestGenerateMoves(unittest.TestCase):
+    def test_starting_moves(self):
+        """Test both sides have seven opening moves."""
+        board = BitBoard()
+        self.assertEqual(len(board.generate_moves(GREY_PIECES)), 7)
+        self.assertEqual(len(board.generate_moves(WHITE)), 7)
+
+    def test_matches_piece_loop(self):
+        """Test one pass gives the same simple moves as asking every piece."""
+        board = BitBoard(grey=mask((5, 2), (7, 0)), white=mask((2, 1)), kings=mask((7, 0)))
+        per_piece = set()
+        for piece in board.get_all_pieces(GREY_PIECES):
+            per_piece.update(board.moves_from(square_of(piece.row, piece.col)))
+        self.assertEqual(set(board.generate_moves(GREY_PIECES)), per_piece)
+
+    def test_captures_are_compulsory(self):
+        """Test only captures are returned when one exists, and only completed ones."""
+        board = BitBoard(grey=mask((6, 1), (7, 6)), white=mask((5, 2), (3, 4)))
+        moves = board.generate_moves(GREY_PIECES)
+        self.assertEqual(moves, [(square_of(6, 1), square_of(2, 5), mask((5, 2), (3, 4)))])
+
+    def test_game_enforces_captures(self):
+        """Test the Game offers no moves to a piece while another must capture."""
+        game = Game(None, GameLogger(None))
+        for row, col in ((5, 2), (4, 3), (2, 5), (3, 4)):
+            game.select(row, col)
+        self.assertTrue(game.select(5, 0))
+        self.assertEqual(game.valid_moves, {})
+        self.assertTrue(game.select(4, 3))
+        self.assertEqual(list(game.valid_moves), [(2, 5)])
+
+    def test_matches_recursive_generator(self):
+        """Test the explicit-stack jump generator lists the same sequences, in order."""
+        boards = capture_positions(400)
+        self.assertTrue(any(move.captured.bit_count() >= 3
+                            for board in boards for move in board.generate_moves()))
+        for board in boards:
+            self.assertEqual(board.generate_moves(), recursive_captures(board))
+
+    def test_king_chain_turns_back(self):
+        """Test a king's jump chain may change direction back up the board."""
+        board = BitBoard(grey=mask((1, 2)), white=mask((2, 3), (4, 3), (4, 1)), kings=mask((1, 2)))
+        self.assertEqual(
+            board.generate_moves(),
+            [(square_of(1, 2), square_of(3, 0), mask((2, 3), (4, 3), (4, 1)))],
+        )
+
+class TestPerft(unittest.TestCase):
+    def test_starting_position(self):
+        """Test perft from the starting position against the reference counts."""
+        board = Board().engine
+        for depth in range(7):
+            self.assertEqual(perft(board, depth), STARTING_PERFT[depth])
+        self.assertEqual(board.history, [])
+        self.assertEqual(board.hash, BitBoard().hash)
+
+    def test_divide(self):
+        """Test the per-move counts add up to the total."""
+        counts = divide(BitBoard(), 4)
+        self.assertEqual(len(counts), 7)
+        self.assertEqual(sum(counts.values()), STARTING_PERFT[4])
+
+    def test_arbitrary_positions(self):
+        """Test perft from hand-checked positions."""
+        lone_king = BitBoard(grey=mask((4, 3)), white=mask((0, 1)), kings=mask((4, 3)))
+        self.assertEqual(perft(lone_king, 1), 4)
+        # White's only man can step to (1, 0) or (1, 2) after each king move
+        self.assertEqual(perft(lone_king, 2), 8)
+        forced = BitBoard(grey=mask((6, 1), (7, 6)), white=mask((5, 2), (3, 4)))
+        self.assertEqual(perft(forced, 1), 1)
+        self.assertEqual(perft(forced, 2), 0)
+
+class TestVariants(unittest.TestCase):
+    def variant_board(self, variant, grey=(), white=(), kings=()):
+        """Build a VariantBoard from (row, col) pairs, grey to move."""
+        square_of = VariantBoard(variant).generator.square_of
+        def bits(squares):
+            return sum(1 << square_of(row, col) for row, col in squares)
+        return VariantBoard(variant, bits(grey), bits(white), bits(kings))
+
+    def destinations(self, board):
+        """Get the (row, col) every legal move lands on, with the number of pieces it takes."""
+        row_col_of = board.generator.row_col_of
+        return sorted((row_col_of(move.dst), move.captured.bit_count())
+                      for move in board.generate_moves())
+
+    def test_starting_perft(self):
+        """Test perft from the american and international starting positions."""
+        american = VariantBoard(AMERICAN)
+        self.assertEqual(american.hash, BitBoard().hash)
+        for depth in range(6):
+            self.assertEqual(perft(american, depth), STARTING_PERFT[depth])
+        international = VariantBoard(INTERNATIONAL)
+        self.assertEqual(international.grey_left, 20)
+        for depth in range(6):
+            self.assertEqual(perft(international, depth), INTERNATIONAL_PERFT[depth])
+        self.assertEqual(international.history, [])
+
+    def test_moves_from_matches_bitboard(self):
+        """Test moves_from lists every landing of every piece as BitBoard's does."""
+        rng = random.Random(7)
+        board = BitBoard()
+        for _ in range(60):
+            moves = board.generate_moves()
+            if not moves:
+                break
+            variant = VariantBoard(AMERICAN, board.grey, board.white, board.kings, board.turn)
+            for square in range(32):
+                self.assertEqual(set(variant.moves_from(square)), set(board.moves_from(square)))
+            board.push(rng.choice(moves))
+        board = self.variant_board(INTERNATIONAL, grey=[(6, 3)], white=[(5, 2), (3, 2)])
+        landings = {(board.generator.row_col_of(move.dst), move.captured.bit_count())
+                    for move in board.moves_from(board.generator.square_of(6, 3))}
+        self.assertEqual(landings, {((5, 4), 0), ((4, 1), 1), ((2, 3), 2)})
+
+    def test_men_capture_backwards(self):
+        """Test only the brazilian man may capture the piece behind it."""
+        american = self.variant_board(AMERICAN, grey=[(4, 3)], white=[(5, 2)])
+        self.assertEqual(self.destinations(american), [((3, 2), 0), ((3, 4), 0)])
+        brazilian = self.variant_board(BRAZILIAN, grey=[(4, 3)], white=[(5, 2)])
+        self.assertEqual(self.destinations(brazilian), [((6, 1), 1)])
+
+    def test_flying_king(self):
+        """Test a flying king captures from afar and may land anywhere beyond."""
+        board = self.variant_board(INTERNATIONAL, grey=[(9, 0)], white=[(6, 3)], kings=[(9, 0)])
+        self.assertEqual(self.destinations(board),
+                         [((row, 9 - row), 1) for row in range(6)])
+        board.push(board.generate_moves()[0])
+        self.assertEqual(board.white_left, 0)
+        self.assertEqual(board.kings.bit_count(), 1)
+
+    def test_majority_capture_and_crowning(self):
+        """Test the capture taking the most pieces is forced and a man is crowned where it stops."""
+        board = self.variant_board(INTERNATIONAL, grey=[(6, 3)], white=[(5, 2), (5, 4), (3, 6)])
+        self.assertEqual(self.destinations(board), [((2, 7), 2)])
+        board = self.variant_board(INTERNATIONAL, grey=[(2, 3)], white=[(1, 2), (9, 0)])
+        move, = board.generate_moves()
+        board.push(move)
+        self.assertEqual(board.kings, 1 << move.dst)
+        board.pop()
+        self.assertEqual(board.kings, 0)
+
+    def test_search_international(self):
+        """Test the search plays on a 10x10 board."""
+        board = VariantBoard(INTERNATIONAL)
+        result = Searcher(10 ** 6, 3).search(board)
+        self.assertIn(result.move, board.generate_moves())
+        self.assertEqual(result.depth, 3)
+
+    def test_game_plays_variant(self):
+        """Test a Game with brazilian rules lets a man capture backwards."""
+        game = Game(None, GameLogger(None), BRAZILIAN)
+        self.assertIsInstance(game.board.engine, VariantBoard)
+        game.board = Board(self.variant_board(BRAZILIAN, grey=[(4, 3)], white=[(5, 2)]))
+        self.assertTrue(game.select(4, 3))
+        self.assertEqual(list(game.valid_moves), [(6, 1)])
+        game.select(6, 1)
+        self.assertEqual(game.result(), "GREY (no pieces)")
+
+    def test_game_refuses_larger_boards(self):
+        """Test Games and Boards refuse a 10x10 variant rather than misread its squares."""
+        with self.assertRaises(ValueError):
+            Game(None, GameLogger(None), INTERNATIONAL)
+        with self.assertRaises(ValueError):
+            Board(VariantBoard(INTERNATIONAL))
+
+class TestInstrument(unittest.TestCase):
+    def test_counts_calls_and_restores(self):
+        """Test the profiler counts calls while enabled and puts the originals back."""
+        original = BitBoard.push
+        profiler = Profiler()
+        profiler.enable()
+        try:
+            self.assertIsNot(BitBoard.push, original)
+            self.assertEqual(perft(BitBoard(), 3), STARTING_PERFT[3])
+        finally:
+            profiler.disable()
+        self.assertIs(BitBoard.push, original)
+        self.assertFalse(profiler.enabled)
+        stats = profiler.stats
+        self.assertEqual(stats["BitBoard.push"].calls, STARTING_PERFT[1] + STARTING_PERFT[2])
+        self.assertEqual(stats["BitBoard.push"].calls, stats["BitBoard.pop"].calls)
+        self.assertGreater(stats["BitBoard.generate_moves"].percentile(0.99), 0)
+        self.assertIn("BitBoard.generate_moves", profiler.report())
+
+    def test_folded_stacks(self):
+        """Test the folded output nests calls made from instrumented callers."""
+        profiler = Profiler(trace_memory=True)
+        profiler.enable()
+        try:
+            Searcher(10 ** 6, 2).search(BitBoard())
+        finally:
+            profiler.disable()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "search.folded")
+            profiler.write_folded(path)
+            with open(path) as file:
+                lines = file.read().splitlines()
+        stacks = {line.rsplit(" ", 1)[0] for line in lines}
+        self.assertIn("Searcher.search", stacks)
+        self.assertTrue(any(stack.startswith("Searcher.search;Searcher._negamax")
+                            for stack in stacks))
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+        self.assertIn("peak traced memory", profiler.report())
+
+class TestTournament(unittest.TestCase):
+    def test_elo_difference(self):
+        """Test the Elo estimate is zero for an even score and signed otherwise."""
+        elo, error = elo_difference(10, 5, 10)
+        self.assertAlmostEqual(elo, 0)
+        self.assertGreater(error, 0)
+        self.assertGreater(elo_difference(15, 5, 5)[0], 0)
+        self.assertLess(elo_difference(5, 5, 15)[0], 0)
+        self.assertEqual(elo_difference(4, 0, 0), (math.inf, math.inf))
+        self.assertEqual(elo_difference(0, 2, 0)[0], 0)
+        self.assertEqual(elo_difference(0, 0, 3)[0], -math.inf)
+
+    def test_draw_rules_match_board(self):
+        """Test tournament games end by the Board's rules, a move rule draw included."""
+        kings = mask((7, 0), (0, 7))
+        board = BitBoard(grey=mask((7, 0)), white=mask((0, 7)), kings=kings)
+        task = {"game": 0, "player_a": "random", "player_b": "random", "a_is_grey": True,
+                "opening_plies": 0, "opening_seed": 0, "max_plies": 500,
+                "adjudicate_margin": 3}
+        with patch("checkers.tournament.random_opening", return_value=(board, [])):
+            record = play_game(task)
+        self.assertEqual(record["result"], "draw")
+        self.assertIn(record["reason"], ("repetition", "move rule"))
+        self.assertLessEqual(record["plies"], DRAW_PLIES)
+
+    def test_openings_are_paired(self):
+        """Test consecutive games share an opening with the colors swapped."""
+        tasks = make_tasks(parse_tournament_args(["--games", "4", "--seed", "3"]))
+        self.assertEqual(tasks[0]["opening_seed"], tasks[1]["opening_seed"])
+        self.assertNotEqual(tasks[0]["a_is_grey"], tasks[1]["a_is_grey"])
+        self.assertNotEqual(tasks[1]["opening_seed"], tasks[2]["opening_seed"])
+
+    def test_run_in_worker_pool(self):
+        """Test every game is played across the pool and written as one JSON line."""
+        args = parse_tournament_args([
+            "--games", "4", "--workers", "2", "--player-a", "random",
+            "--player-b", "ai:ms=5,depth=2", "--max-plies", "40",
+        ])
+        out = io.StringIO()
+        tally = run_tournament(args, out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(sum(tally.values()), 4)
+        self.assertEqual(sorted(record["game"] for record in records), [0, 1, 2, 3])
+        self.assertTrue(all(record["plies"] <= 40 for record in records))
+
+class TestServer(unittest.TestCase):
+    def run_with_server(self, scenario, **options):
+        """Start a GameServer on a free port, run a coroutine against it and stop it."""
+        async def main():
+            game_server = GameServer(**options)
+            server = await game_server.start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return await scenario(game_server, port)
+            finally:
+                game_server.stop()
+                server.close()
+                await server.wait_closed()
+        return asyncio.run(main())
+
+    def test_select_moves_and_pushes(self):
+        """Test selects are validated like Game.select and pushed to other watchers."""
+        async def scenario(game_server, port):
+            player = await Client.connect("127.0.0.1", port)
+            watcher = await Client.connect("127.0.0.1", port)
+            state = await player.request(op="new")
+            session = state["session"]
+            await watcher.request(op="attach", session=session)
+            rejected = await player.request(op="select", session=session, row=5, col=1)
+            await player.request(op="select", session=session, row=5, col=0)
+            moved = await player.request(op="select", session=session, row=4, col=1)
+            watched = await watcher.request(op="state", session=session)
+            error = await player.request(op="select", session=session, row=9, col=0)
+            await player.close()
+            await watcher.close()
+            return rejected, moved, watched, error
+
+        rejected, moved, watched, error = self.run_with_server(scenario)
+        self.assertFalse(rejected["moved"])
+        self.assertTrue(moved["moved"])
+        self.assertEqual(moved["turn"], "WHITE")
+        self.assertEqual(watched["grey"], moved["grey"])
+        self.assertEqual(error["type"], "error")
+
+    def test_load_generator(self):
+        """Test the load generator plays moves without errors and reports latency."""
+        async def scenario(game_server, port):
+            return await run_load("127.0.0.1", port, connections=2, sessions=3, seconds=0.3)
+
+        result = self.run_with_server(scenario)
+        self.assertEqual(result["errors"], 0)
+        self.assertGreater(result["moves"], 0)
+        self.assertGreaterEqual(result["p99_ms"], result["p50_ms"])
+        self.assertGreater(result["server"]["bytes_per_session"], 0)
+
+    def test_failed_write_frees_reader(self):
+        """Test a write error ends the write loop without leaving the reader waiting for room."""
+        class BrokenWriter:
+            closed = False
+
+            def write(self, data):
+                pass
+
+            async def drain(self):
+                raise ConnectionResetError
+
+            def close(self):
+                self.closed = True
+
+        async def scenario():
+            writer = BrokenWriter()
+            connection = Connection(writer)
+            write_task = asyncio.create_task(connection.write_loop())
+            connection.reply({"type": "state"})
+            await asyncio.wait_for(write_task, 1)
+            for _ in range(MAX_PENDING_REPLIES):
+                connection.reply({"type": "state"})
+            await asyncio.wait_for(connection.wait_for_room(), 1)
+            return writer.closed
+
+        self.assertTrue(asyncio.run(scenario()))
+
+    def test_deep_size_skips_shared_objects(self):
+        """Test module-level objects such as a Variant are not counted."""
+        self.assertEqual(deep_size([AMERICAN]), sys.getsizeof([AMERICAN]))
+        self.assertGreater(deep_size([(1, 2)]), sys.getsizeof([(1, 2)]))
+
+    def test_reaps_idle_sessions(self):
+        """Test sessions untouched for longer than the timeout are closed."""
+        game_server = GameServer(idle_timeout=60)
+        game_server.handle(None, {"op": "new"})
+        self.assertEqual(game_server.reap_idle(time.monotonic() + 30), 0)
+        self.assertEqual(game_server.reap_idle(time.monotonic() + 61), 1)
+        self.assertEqual(game_server.sessions, {})
+
+class TestGameLogger(unittest.TestCase):
+    def play_opening(self, logger):
+        """Play a move, a reply and a capture through a Game."""
+        game = Game(None, logger)
+        for row, col in ((5, 2), (4, 3), (2, 5), (3, 4), (4, 3), (2, 5)):
+            game.select(row, col)
+        return game
+
+    def test_json_lines(self):
+        """Test moves and captures are written as JSON records with a game ID."""
+        out = io.StringIO()
+        game = self.play_opening(GameLogger(out))
+        self.assertEqual(out.getvalue(), "")  # Still buffered
+        game.close()
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([record["event"] for record in records],
+                         ["start", "move", "move", "move", "remove", "end"])
+        self.assertEqual(len({record["game"] for record in records}), 1)
+        self.assertEqual(records[3]["from"], [4, 3])
+        self.assertEqual(records[4], dict(records[4], color="WHITE", at=[3, 4]))
+        self.assertIn("time", records[0])
+
+    def test_flush_on_buffer_size(self):
+        """Test the buffer is written out once it holds buffer_size records."""
+        out = io.StringIO()
+        self.play_opening(GameLogger(out, buffer_size=3, flush_interval=60))
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+    def test_tick_flushes_quiet_buffer(self):
+        """Test tick writes out a buffer nothing was added to once flush_interval has passed."""
+        out = io.StringIO()
+        logger = GameLogger(out, flush_interval=60)
+        logger.start_game()
+        logger.tick()
+        self.assertEqual(out.getvalue(), "")
+        with patch("checkers.game_logger.time.monotonic", return_value=time.monotonic() + 61):
+            logger.tick()
+        self.assertEqual(len(out.getvalue().splitlines()), 1)
+
+    def test_text_format(self):
+        """Test the original text log format is still available."""
+        out = io.StringIO()
+        self.play_opening(GameLogger(out, fmt="text")).close()
+        self.assertEqual(out.getvalue().splitlines()[2:], [
+            "Move: GREY from (5, 2) to (4, 3)",
+            "Move: WHITE from (2, 5) to (3, 4)",
+            "Move: GREY from (4, 3) to (2, 5)",
+            "Removed: WHITE at (3, 4)",
+        ])
+
+
+    def test_appends_to_existing_log(self):
+        """Test a logger opened on an existing file keeps the games already in it."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.jsonl")
+            for _ in range(2):
+                logger = GameLogger(path)
+                logger.start_game()
+                logger.end_game()
+                logger.close()
+            with open(path) as file:
+                games = {json.loads(line)["game"] for line in file}
+        self.assertEqual(len(games), 2)
+    def test_disabled(self):
+        """Test a logger without a target records nothing."""
+        logger = GameLogger(None)
+        self.play_opening(logger).close()
+        self.assertFalse(logger.enabled)
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        """Create a scratch directory for archive files."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.ckr")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def random_game(self, seed, plies=40):
+        """Play random legal moves and return them as archived triples and the final board."""
+        rng = random.Random(seed)
+        board = BitBoard()
+        moves = []
+        for _ in range(plies):
+            legal = board.generate_moves()
+            if not legal:
+                break
+            move = rng.choice(legal)
+            board.push(move)
+            moves.append(tuple(move))
+        return moves, board
+
+    def test_round_trip(self):
+        """Test games written to an archive read back and replay to the same positions."""
+        games = [self.random_game(seed) for seed in range(3)]
+        with ArchiveWriter(self.path) as writer:
+            for number, (moves, _) in enumerate(games):
+                writer.add_game(moves, DRAW_RESULT if number else GREY_WIN)
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(len(reader), 3)
+            self.assertEqual(reader.result(0), GREY_WIN)
+            for number, (moves, board) in enumerate(games):
+                self.assertEqual(reader.moves(number), moves)
+                *_, (final, _) = replay(reader.moves(number))
+                self.assertEqual((final.grey, final.white, final.kings), (board.grey, board.white, board.kings))
+            self.assertEqual(sum(1 for _ in reader.positions()), sum(len(moves) for moves, _ in games))
+        moves = sum(len(moves) for moves, _ in games)
+        masks = sum(captured.bit_count() > 1 for moves, _ in games for _, _, captured in moves)
+        self.assertLess(os.path.getsize(self.path), 8 + moves * 2 + masks * 4 + 3 * (4 + 8) + 16 + 1)
+
+    def test_jumps_with_shared_ends(self):
+        """Test two double jumps with the same ends and capture count stay apart."""
+        board = BitBoard(grey=mask((6, 3)), white=mask((5, 2), (3, 2), (5, 4), (3, 4)))
+        jumps = board.generate_moves()
+        self.assertEqual(len(jumps), 2)
+        self.assertEqual({(move.src, move.dst) for move in jumps}, {(square_of(6, 3), square_of(2, 3))})
+        with ArchiveWriter(self.path) as writer:
+            for move in jumps:
+                writer.add_game([move])
+        with ArchiveReader(self.path) as reader:
+            for number, move in enumerate(jumps):
+                self.assertEqual(resolve_move(board, *reader.moves(number)[0]), move)
+
+        log_path = os.path.join(self.directory.name, "game_log.txt")
+        with open(log_path, "w") as file:
+            file.write("Game Log\n=========\nMove: GREY from (6, 3) to (2, 3)\n"
+                       "Removed: WHITE at (5, 4)\nRemoved: WHITE at (3, 4)\n")
+        [(_, [archived])] = read_log(log_path)
+        self.assertEqual(archived[2], mask((5, 4), (3, 4)))
+        self.assertEqual(resolve_move(board, *archived).captured, mask((5, 4), (3, 4)))
+
+    def test_replay_through_board(self):
+        """Test archived moves replay through the Board adapter as well."""
+        moves, engine = self.random_game(5)
+        board = Board()
+        for _ in replay(moves, board):
+            pass
+        self.assertEqual(board.engine.grey, engine.grey)
+        self.assertEqual(len(board.get_all_pieces(WHITE)), engine.white_left)
+
+    def test_log_results_reach_the_book(self):
+        """Test results in a JSON Lines log survive conversion to an archive and a book."""
+        log_path = os.path.join(self.directory.name, "games.jsonl")
+        logger = GameLogger(log_path)
+        game = Game(None, logger)
+        game.select(5, 2)
+        game.select(4, 3)
+        logger.end_game("WHITE")
+        logger.start_game()
+        logger.end_game()
+        logger.close()
+        games = read_log(log_path)
+        self.assertEqual([result for result, _ in games], [WHITE_WIN, UNKNOWN_RESULT])
+        with ArchiveWriter(self.path) as writer:
+            for result, moves in games:
+                writer.add_game(moves, result)
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual([result for result, _ in reader.games()], [WHITE_WIN, UNKNOWN_RESULT])
+        builder = BookBuilder()
+        builder.add_log(log_path)
+        book_path = os.path.join(self.directory.name, "book.ckb")
+        builder.write(book_path)
+        with OpeningBook(book_path) as book:
+            [entry] = book.lookup(BitBoard())
+        self.assertEqual((entry.games, entry.wins, entry.losses), (1, 0, 1))
+
+    def test_text_log_conversion(self):
+        """Test the original text log converts to an archive and back unchanged."""
+        log_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_log.txt")
+        games = read_log(log_path)
+        self.assertEqual(len(games), 1)
+        out = io.StringIO()
+        write_text_log((moves for _, moves in games), out)
+        with open(log_path) as file:
+            self.assertEqual(out.getvalue(), file.read())
+
+class TestPDN(unittest.TestCase):
+    def test_fen_round_trip(self):
+        """Test FEN strings for the start and a position with kings read back unchanged."""
+        self.assertEqual(Board().to_fen(), START_FEN)
+        self.assertEqual(parse_fen("B:W21-32:B1-12").hash, BitBoard().hash)
+        board = BitBoard(grey=mask((4, 3), (6, 1)), white=mask((0, 7)), kings=mask((4, 3)), turn=WHITE)
+        fen = format_fen(board)
+        self.assertEqual(fen, "W:W29:B8,K15")
+        self.assertEqual(parse_fen(f'"{fen}."').hash, board.hash)
+        with self.assertRaises(PDNError):
+            parse_fen("B:W33:B1")
+
+    def test_board_and_game_positions(self):
+        """Test Boards load and save FEN and board strings, and Games keep the side to move."""
+        board = Board.from_string("w" + "." * 30 + "G", WHITE)
+        self.assertEqual(board.to_string(), "w" + "." * 30 + "G")
+        self.assertTrue(board.get_piece(7, 6).king)
+        self.assertEqual(board.turn, WHITE)
+        game = Game(None, GameLogger(None))
+        game.load_fen("W:W29:B8,K15")
+        self.assertEqual(game.turn, WHITE)
+        self.assertEqual(game.to_fen(), "W:W29:B8,K15")
+
+    def test_standard_notation(self):
+        """Test the opening moves are numbered as in standard checkers notation."""
+        board = BitBoard()
+        self.assertEqual(sorted(format_move(board, move) for move in board.generate_moves()),
+                         ["10-14", "10-15", "11-15", "11-16", "12-16", "9-13", "9-14"])
+
+    def test_games_round_trip(self):
+        """Test games written as PDN stream back with the same moves and results."""
+        rng = random.Random(6)
+        games = []
+        for _ in range(5):
+            board, moves = BitBoard(), []
+            while len(moves) < 80 and board.generate_moves():
+                moves.append(rng.choice(board.generate_moves()))
+                board.push(moves[-1])
+            games.append(moves)
+        start = BitBoard(grey=mask((4, 3)), white=mask((3, 2), (1, 2)), kings=mask((4, 3)))
+        file = io.StringIO()
+        for moves in games:
+            write_game(file, moves, GREY_WIN, {"Event": "test"})
+        write_game(file, [legal_moves(start)[0]], DRAW_RESULT, start=start)
+        read = list(read_games(io.StringIO(file.getvalue())))
+        self.assertEqual(len(read), 6)
+        for game, moves in zip(read, games):
+            self.assertEqual(game.engine_moves(), moves)
+            self.assertEqual(game.archive_result, GREY_WIN)
+            self.assertEqual(game.tags["Event"], "test")
+        self.assertEqual(read[5].engine_moves(), [legal_moves(start)[0]])
+        self.assertEqual(read[5].result, "1/2-1/2")
+
+    def test_skips_comments_and_variations(self):
+        """Test comments, variations, annotations and results in comments are ignored."""
+        text = (
+            '[Event "x"]\n1. 11-15 {a comment with 1-0 in it\n'
+            "over two lines} 23-19 (22-18 15x22) 2. 8-11! $1 ; rest 9-14\n"
+            "22-17 *\n\n1. 9-14 0-1\n"
+        )
+        first, second = read_games(io.StringIO(text))
+        self.assertEqual(first.moves, [(11, 15), (23, 19), (8, 11), (22, 17)])
+        self.assertEqual(first.result, "*")
+        self.assertEqual(len(first.engine_moves()), 4)
+        self.assertEqual(second.moves, [(9, 14)])
+        self.assertEqual(second.archive_result, WHITE_WIN)
+        with self.assertRaises(PDNError):
+            PDNGame({}, [(9, 15)], "*").engine_moves()
+
+class TestOpeningBook(unittest.TestCase):
+    def setUp(self):
+        """Build a book from two games that share their first move."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "book.ckb")
+        board = BitBoard()
+        first = board.generate_moves()[0]
+        board.push(first)
+        reply = board.generate_moves()[0]
+        self.first = first
+        builder = BookBuilder(plies=2)
+        start = (first.src, first.dst, 0)
+        builder.add_game([start, (reply.src, reply.dst, 0)], GREY_WIN)
+        builder.add_game([start], DRAW_RESULT)
+        self.entries = builder.write(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lookup(self):
+        """Test book moves carry their game counts and the mover's results."""
+        self.assertEqual(self.entries, 2)
+        with OpeningBook(self.path) as book:
+            self.assertEqual(book.lookup(BitBoard()), [BookMove(self.first, 2, 1, 1, 0)])
+            self.assertEqual(book.lookup(BitBoard()).pop().win_rate, 0.75)
+            board = BitBoard()
+            board.push(self.first)
+            self.assertEqual(book.lookup(board)[0].losses, 1)
+            board.push(board.generate_moves()[0])
+            self.assertEqual(book.lookup(board), [])
+
+    def test_game_plays_book_moves_until_out_of_book(self):
+        """Test the Game plays book moves, then reports when the book runs out."""
+        game = Game(None, GameLogger(None))
+        with OpeningBook(self.path, seed=1) as book:
+            game.book = book
+            self.assertTrue(game.play_book_move())
+            self.assertTrue(game.play_book_move())
+            self.assertFalse(game.play_book_move())
+            self.assertFalse(game.in_book)
+            game.reset()
+            self.assertTrue(game.in_book)
+
+    def test_self_play(self):
+        """Test self-play games are added to a book builder."""
+        builder = BookBuilder(plies=4)
+        self_play(builder, 2, "random")
+        self.assertEqual(builder.games, 2)
+        self.assertGreater(builder.positions, 1)
+
+class TestBatchEval(unittest.TestCase):
+    def setUp(self):
+        try:
+            from checkers import batch_eval
+        except ImportError:
+            self.skipTest("NumPy is not installed")
+        self.batch_eval = batch_eval
+        rng = random.Random(7)
+        self.boards = [BitBoard(), Board()]
+        board = BitBoard()
+        while len(self.boards) < 300:
+            moves = board.generate_moves()
+            if not moves:
+                board = BitBoard()
+                continue
+            board.push(rng.choice(moves))
+            self.boards.append(board.copy())
+
+    def test_matches_python_loop(self):
+        """Test batch scores equal the square-by-square Python evaluation."""
+        codes, turns = self.batch_eval.encode_boards(self.boards)
+        expected = [self.batch_eval.evaluate_position(board) for board in self.boards]
+        self.assertEqual(self.batch_eval.evaluate_batch(codes, turns).tolist(), expected)
+        words, turns = self.batch_eval.words_from_boards(self.boards)
+        self.assertEqual(self.batch_eval.evaluate_words(words, turns).tolist(), expected)
+
+    def test_encodings_round_trip(self):
+        """Test square codes and bitboard words convert into each other."""
+        codes, _ = self.batch_eval.encode_boards(self.boards)
+        words, _ = self.batch_eval.words_from_boards(self.boards)
+        self.assertEqual(self.batch_eval.codes_from_words(words).tolist(), codes.tolist())
+        self.assertEqual(self.batch_eval.words_from_codes(codes).tolist(), words.tolist())
+
+    def test_starting_position_is_even(self):
+        """Test the symmetric starting position scores zero."""
+        codes, _ = self.batch_eval.encode_boards([BitBoard()])
+        self.assertEqual(self.batch_eval.features(codes).tolist(), [[0] * 6])
+
+class TestGameOver(unittest.TestCase):
+    def king_move(self, start, end):
+        """Build a simple engine move between two (row, col) squares."""
+        return Move(square_of(*start), square_of(*end), 0)
+
+    def test_no_moves_loses(self):
+        """Test a side with pieces but no legal move has lost."""
+        board = Board(BitBoard(grey=mask((1, 0)), white=mask((0, 1))))
+        self.assertTrue(board.game_over)
+        self.assertEqual(board.winner(), WHITE)
+        self.assertEqual(board.reason, "no moves")
+
+    def test_capturing_last_piece_wins(self):
+        """Test taking the last piece ends the game through Game.select."""
+        game = Game(None, GameLogger(None))
+        game.board = Board(BitBoard(grey=mask((5, 2)), white=mask((4, 3))))
+        game.select(5, 2)
+        game.select(3, 4)
+        self.assertEqual(game.winner(), GREY_PIECES)
+        self.assertEqual(game.result(), "GREY (no pieces)")
+        self.assertFalse(game.select(3, 4))
+
+    def test_repetition_draw_and_undo(self):
+        """Test the third occurrence of a position draws and pop() takes it back."""
+        kings = mask((4, 3), (0, 7))
+        board = Board(BitBoard(grey=mask((4, 3)), white=mask((0, 7)), kings=kings))
+        cycle = [((4, 3), (3, 2)), ((0, 7), (1, 6)), ((3, 2), (4, 3)), ((1, 6), (0, 7))]
+        for start, end in cycle * 2:
+            self.assertFalse(board.game_over)
+            board.push(self.king_move(start, end))
+        self.assertTrue(board.game_over)
+        self.assertIsNone(board.winner())
+        self.assertEqual(board.reason, "repetition")
+        board.pop()
+        self.assertFalse(board.game_over)
+        self.assertEqual(board.quiet_plies, 7)
+
+    def test_move_rule(self):
+        """Test the draw after enough plies without a capture or man move."""
+        kings = mask((4, 3), (0, 7))
+        board = Board(BitBoard(grey=mask((5, 0), (4, 3)), white=mask((0, 7)), kings=kings))
+        with patch("checkers.board.DRAW_PLIES", 2):
+            board.push(self.king_move((4, 3), (3, 2)))
+            self.assertFalse(board.game_over)
+            board.push(self.king_move((0, 7), (1, 6)))
+            self.assertEqual(board.reason, "move rule")
+            board.pop()
+            board.pop()
+            board.push(Move(square_of(5, 0), square_of(4, 1), 0))
+            self.assertEqual(board.quiet_plies, 0)
+
+    def test_matches_move_generation(self):
+        """Test the cached result agrees with generating every move, through random games."""
+        rng = random.Random(4)
+        for _ in range(10):
+            game = Game(None, GameLogger(None))
+            while not game.game_over:
+                moves = game.board.engine.generate_moves()
+                self.assertTrue(moves)
+                game.play_move(rng.choice(moves))
+            if game.winner() is not None:
+                self.assertFalse(game.board.engine.generate_moves())
+                self.assertNotEqual(game.winner(), game.turn)
+
+class TestCopyAndUndo(unittest.TestCase):
+    def test_independent_boards(self):
+        """Test boards and games no longer share one instance."""
+        self.assertIsNot(Board(), Board())
+        first, second = Game(None, GameLogger(None)), Game(None, GameLogger(None))
+        first.board.move(first.board.get_piece(5, 0), 4, 1)
+        self.assertEqual(second.board.get_piece(4, 1), 0)
+
+    def test_copy(self):
+        """Test a copied board and game are independent of the original."""
+        game = Game(None, GameLogger(None))
+        game.select(5, 2)
+        clone = game.copy()
+        clone.select(4, 3)
+        self.assertEqual(clone.turn, WHITE)
+        self.assertEqual(game.turn, GREY_PIECES)
+        self.assertEqual(game.board.get_piece(4, 3), 0)
+        self.assertNotEqual(clone.board.get_piece(4, 3), 0)
+
+    def test_copy_does_not_log(self):
+        """Test moves played on a copy are not written to the original's log."""
+        out = io.StringIO()
+        logger = GameLogger(out, buffer_size=1)
+        game = Game(None, logger)
+        clone = game.copy()
+        self.assertIsNot(clone.logger, logger)
+        clone.select(5, 2)
+        clone.select(4, 3)
+        game.close()
+        events = [json.loads(line)["event"] for line in out.getvalue().splitlines()]
+        self.assertEqual(events, ["start", "end"])
+
+    def test_push_pop(self):
+        """Test pop() restores the position and side to move after push()."""
+        board = BitBoard(grey=mask((6, 1)), white=mask((5, 2), (3, 4)))
+        jump = max(board.moves_from(square_of(6, 1)), key=lambda move: move.captured)
+        board.push(jump)
+        self.assertEqual(board.grey, mask((2, 5)))
+        self.assertEqual(board.white, 0)
+        self.assertEqual(board.turn, WHITE)
+        board.pop()
+        self.assertEqual(board.grey, mask((6, 1)))
+        self.assertEqual(board.white, mask((5, 2), (3, 4)))
+        self.assertEqual(board.turn, GREY_PIECES)
+
+    def test_push_promotes(self):
+        """Test a man pushed onto the far row becomes a king until popped."""
+        board = BitBoard(grey=mask((1, 2)), white=mask((6, 1)))
+        board.push(board.moves_from(square_of(1, 2))[0])
+        self.assertEqual(board.kings, board.grey)
+        board.pop()
+        self.assertEqual(board.kings, 0)
+
+class TestSearch(unittest.TestCase):
+    def test_blockade_at_horizon_wins(self):
+        """Test a side left without moves at the horizon is scored as lost, not by material."""
+        board = BitBoard(grey=mask((7, 0), (5, 2), (6, 3)), white=mask((6, 1)), kings=mask((6, 3)))
+        result = Searcher(10 ** 6, 1).search(board)
+        self.assertEqual(result.move.dst, square_of(7, 2))
+        self.assertEqual(result.score, WIN_SCORE - 1)
+
+    def test_takes_free_piece(self):
+        """Test the AI captures a piece that cannot be won back."""
+        board = BitBoard(grey=mask((5, 2), (7, 0)), white=mask((4, 3), (0, 7)))
+        move = AIPlayer(GREY_PIECES, time_limit_ms=200).choose_move(board)
+        self.assertEqual(move.captured, mask((4, 3)))
+
+    def test_time_limit(self):
+        """Test the search stops close to its time limit and reports statistics."""
+        result = Searcher(time_limit_ms=50).search(BitBoard())
+        self.assertLess(result.elapsed_ms, 500)
+        self.assertGreaterEqual(result.depth, 1)
+        self.assertGreater(result.nodes_per_second, 0)
+        self.assertIn(result.move, legal_moves(BitBoard()))
+
+    def test_no_moves(self):
+        """Test the AI returns no move when the side to move is blocked."""
+        board = BitBoard(grey=mask((7, 0)), white=mask((6, 1), (5, 2)))
+        self.assertIsNone(AIPlayer(GREY_PIECES).choose_move(board))
+
+    def test_game_plays_engine_move(self):
+        """Test a Game applies an engine move and passes the turn."""
+        game = Game(None, GameLogger(None))
+        move = Searcher(time_limit_ms=50).search(game.board.engine).move
+        game.play_move(move)
+        self.assertEqual(game.turn, WHITE)
+        self.assertEqual(game.board.engine.grey, BitBoard().grey ^ (1 << move.src) ^ (1 << move.dst))
+
+class TestParallelSearch(unittest.TestCase):
+    def test_shared_table_between_processes(self):
+        """Test an entry stored by another process is found through shared memory."""
+        table = SharedTranspositionTable(1)
+        try:
+            code = (
+                "from checkers.transposition import SharedTranspositionTable, EXACT; "
+                f"table = SharedTranspositionTable({table.size_mb}, {table.name!r}); "
+                "table.store(12345, 5, EXACT, -42); table.close()"
+            )
+            subprocess.run([sys.executable, "-c", code], check=True)
+            self.assertEqual(table.probe(12345), (5, EXACT, -42, -1, -1))
+        finally:
+            table.unlink()
+
+    def test_torn_entry_is_ignored(self):
+        """Test an entry whose key and data words do not belong together never matches."""
+        table = TranspositionTable(1)
+        table.store(12345, 5, EXACT, -42)
+        slot = 12345 % (table.stats()["entries"] // 2) * 2
+        table._data[slot] ^= 1 << 10
+        self.assertIsNone(table.probe(12345))
+
+    def test_matches_single_search(self):
+        """Test parallel workers search to the requested depth and count every worker's nodes."""
+        board = BitBoard()
+        with ParallelSearcher(2, 10 ** 6, 6, 1) as searcher:
+            result = searcher.search(board)
+            self.assertEqual(len(searcher.worker_results), 2)
+        self.assertEqual(result.depth, 6)
+        self.assertIn(result.move, legal_moves(board))
+        self.assertGreaterEqual(result.nodes, max(r.nodes for r in searcher.worker_results))
+
+class TestBackground(unittest.TestCase):
+    def collect(self, thinker, timeout=30):
+        """Wait for the current search's messages until the last one."""
+        messages = []
+        while not messages or not messages[-1].done:
+            message = thinker.wait(timeout)
+            self.assertIsNotNone(message, "no message from the worker")
+            messages.append(message)
+        return messages
+
+    def test_progress_and_move(self):
+        """Test a background search reports every depth and then a legal move."""
+        board = BitBoard()
+        with BackgroundThinker(10 ** 6, max_depth=4, table_mb=1) as thinker:
+            thinker.think(board)
+            self.assertTrue(thinker.thinking)
+            messages = self.collect(thinker)
+            self.assertFalse(thinker.thinking)
+        self.assertEqual([message.depth for message in messages], [1, 2, 3, 4, 4])
+        self.assertIn(messages[-1].move, legal_moves(board))
+        self.assertIs(thinker.last_result, messages[-1])
+
+    def test_cancel_stops_search(self):
+        """Test a cancelled search stops at once and sends nothing more."""
+        board = BitBoard()
+        with BackgroundThinker(10 ** 6, table_mb=1, ponder=True) as thinker:
+            first = thinker.think(board)
+            self.assertEqual(thinker.wait(30).request, first)
+            game = Game(None, GameLogger(None))
+            game.thinkers = [thinker]
+            game.reset()
+            self.assertFalse(thinker.thinking)
+            # The worker only gets to the next request once the first has stopped
+            second = thinker.think(board)
+            message = thinker.wait(30)
+            self.assertEqual(message.request, second)
+            thinker.cancel()
+            self.assertEqual(thinker.poll(), [])
+
+    def test_parallel_progress_and_move(self):
+        """Test a search on several workers streams deeper results and then a legal move."""
+        board = BitBoard()
+        with BackgroundThinker(10 ** 6, max_depth=4, table_mb=1, workers=2) as thinker:
+            thinker.think(board)
+            messages = self.collect(thinker)
+            self.assertFalse(thinker.thinking)
+        depths = [message.depth for message in messages[:-1]]
+        self.assertEqual(depths, sorted(set(depths)))
+        self.assertEqual(messages[-1].depth, 4)
+        self.assertIn(messages[-1].move, legal_moves(board))
+
+    def test_parallel_cancel_stops_search(self):
+        """Test resetting the game stops a search on several workers."""
+        board = BitBoard()
+        with BackgroundThinker(10 ** 6, table_mb=1, workers=2) as thinker:
+            first = thinker.think(board)
+            self.assertEqual(thinker.wait(30).request, first)
+            game = Game(None, GameLogger(None))
+            game.thinkers = [thinker]
+            game.reset()
+            self.assertFalse(thinker.thinking)
+            second = thinker.think(board)
+            self.assertEqual(thinker.wait(30).request, second)
+
+class TestAnalysis(unittest.TestCase):
+    def test_position_string_round_trip(self):
+        """Test compact position strings read back as the same position."""
+        start = "G" + "w" * 12 + "." * 8 + "g" * 12
+        self.assertEqual(position_string(BitBoard()), start)
+        self.assertEqual(parse_position(start).hash, BitBoard().hash)
+        board = BitBoard(grey=mask((4, 3)), white=mask((0, 7), (2, 1)), kings=mask((4, 3), (0, 7)),
+                         turn=WHITE)
+        self.assertEqual(parse_position(position_string(board)).hash, board.hash)
+        with self.assertRaises(PositionError):
+            parse_position("G" + "x" * 32)
+        with self.assertRaises(PositionError):
+            parse_position(start[1:])
+
+    def test_batch_uses_cache(self):
+        """Test repeated positions are searched once and then answered from the cache."""
+        positions = [position_string(BitBoard()), position_string(random_opening(4, 1)[0])]
+        with AnalysisService(depth=3) as service:
+            first = service.analyse_batch(positions + positions[:1])
+            self.assertEqual(len(first), 3)
+            self.assertIs(first[0], first[2])
+            self.assertEqual(service.metrics()["misses"], 3)
+            self.assertEqual(len(service.cache), 2)
+            again = service.analyse(positions[1])
+            self.assertIs(again, first[1])
+            metrics = service.metrics()
+        self.assertEqual(metrics["hits"], 1)
+        self.assertEqual(metrics["hit_rate"], 0.25)
+        self.assertEqual(first[0].moves, legal_moves(BitBoard()))
+        self.assertIn(first[0].best_move, first[0].moves)
+
+    def test_latency_per_request(self):
+        """Test every position asked about gets its own latency, cache hits the quickest."""
+        with AnalysisService(depth=4) as service:
+            service.analyse(BitBoard())
+            service.analyse_batch([BitBoard(), BitBoard()])
+            metrics = service.metrics()
+        self.assertEqual(metrics["requests"], 3)
+        self.assertLess(metrics["p50_ms"], metrics["p99_ms"])
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test the cache stays within its byte budget by dropping the oldest entries."""
+        boards = [random_opening(4, seed)[0] for seed in range(3)]
+        analyses = [analyse(board, depth=1) for board in boards]
+        cache = AnalysisCache(max_bytes=1)
+        cache.put(boards[0], analyses[0])
+        self.assertEqual(len(cache), 0)
+        sizes = [deep_size(analysis) for analysis in analyses]
+        budget = sizes[0] + max(sizes[1], sizes[2])
+        cache = AnalysisCache(max_bytes=budget)
+        cache.put(boards[0], analyses[0])
+        cache.put(boards[1], analyses[1])
+        cache.get(boards[0])
+        cache.put(boards[2], analyses[2])
+        self.assertIsNone(cache.get(boards[1]))
+        self.assertIs(cache.get(boards[0]), analyses[0])
+        self.assertLessEqual(cache.bytes, budget)
+        self.assertGreaterEqual(cache.evictions, 1)
+
+class TestTablebase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if importlib.util.find_spec("numpy") is None:
+            raise unittest.SkipTest("NumPy is not installed")
+        cls.directory = tempfile.TemporaryDirectory()
+        generate(cls.directory.name, 3)
+        cls.tablebase = Tablebase(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebase.close()
+        cls.directory.cleanup()
+
+    def signatures(self, pieces):
+        """Get the signatures with a number of pieces, including the colour-reversed ones."""
+        signatures = {signature for signature in self.tablebase.signatures
+                      if sum(signature) == pieces}
+        return sorted(signatures | {signature[2:] + signature[:2] for signature in signatures})
+
+    def all_positions(self, pieces):
+        """Yield every covered position with a number of pieces."""
+        for signature in self.signatures(pieces):
+            for _, grey, white, kings, turn in SliceIndex(signature).positions():
+                yield BitBoard(grey, white, kings, turn)
+
+    def test_index_has_no_gaps(self):
+        """Test every index is a different legal position that indexes back to it."""
+        for signature in ((1, 0, 1, 0), (0, 1, 1, 1), (2, 0, 1, 0)):
+            index = SliceIndex(signature)
+            positions = set()
+            for number, grey, white, kings, turn in index.positions():
+                self.assertFalse(grey & white)
+                self.assertEqual((grey | white).bit_count(), sum(signature))
+                self.assertEqual(index.index(grey, white, kings, turn), number)
+                positions.add((grey, white, kings, turn))
+            self.assertEqual(len(positions), index.size)
+        # A grey man on 28 squares, a white man on the 27 or 28 left
+        self.assertEqual(SliceIndex((1, 0, 1, 0)).size, 2 * (28 * 28 - 24))
+
+    def test_values_agree_with_moves(self):
+        """Test every stored result follows from the results after each move."""
+        for board in itertools.chain(self.all_positions(1), self.all_positions(2)):
+            children = []
+            for move in board.generate_moves():
+                board.push(move)
+                children.append(self.tablebase.probe(board))
+                board.pop()
+            losses = [child.distance for child in children if child.result == TB_LOSS]
+            if losses:
+                expected = (TB_WIN, 1 + min(losses))
+            elif all(child.result == TB_WIN for child in children):
+                expected = (TB_LOSS, 1 + max((child.distance for child in children), default=-1))
+            else:
+                expected = (TB_DRAW, 0)
+            self.assertEqual(tuple(self.tablebase.probe(board)), expected)
+
+    def test_three_pieces_agree_with_search(self):
+        """Test sampled three-piece results against a plain search to their distance."""
+        rng = random.Random(5)
+        signatures = self.signatures(3)
+        checked = 0
+        while checked < 150:
+            index = SliceIndex(rng.choice(signatures))
+            board = BitBoard(*index.position(rng.randrange(index.size)))
+            result, distance = self.tablebase.probe(board)
+            if distance > 5 or len(legal_moves(board)) < 2:
+                continue
+            depth = distance if result != TB_DRAW else 4
+            score = Searcher(10**6, depth).search(board, first_depth=depth).score
+            if result == TB_WIN:
+                self.assertEqual(score, WIN_SCORE - distance)
+            elif result == TB_LOSS:
+                self.assertEqual(score, -WIN_SCORE + distance)
+            else:
+                self.assertLess(abs(score), WIN_BOUND)
+            checked += 1
+
+    def test_longest_win_is_checked(self):
+        """Test a capture into a loss too long for a byte is reported, not stored."""
+        with tempfile.TemporaryDirectory() as directory:
+            generate(directory, 2)
+            with patch("checkers.tablebase.MAX_DISTANCE", 2):
+                with self.assertRaises(TablebaseError):
+                    build_slice((0, 2, 0, 1), directory)
+
+    def test_uncovered_positions(self):
+        """Test positions with more pieces than the tables hold are not covered."""
+        self.assertEqual(self.tablebase.max_pieces, 3)
+        self.assertIsNone(self.tablebase.probe(BitBoard()))
+
+    def test_search_plays_fastest_win(self):
+        """Test the search scores covered positions from the tables."""
+        board = max((board for board in self.all_positions(2)
+                     if self.tablebase.probe(board).result == TB_WIN
+                     and len(board.generate_moves()) > 1),
+                    key=lambda board: self.tablebase.probe(board).distance)
+        distance = self.tablebase.probe(board).distance
+        result = Searcher(max_depth=1, tablebase=self.tablebase).search(board)
+        self.assertEqual(result.score, WIN_SCORE - distance)
+        board.push(result.move)
+        self.assertEqual(self.tablebase.probe(board), (TB_LOSS, distance - 1))
+
+class TestHashing(unittest.TestCase):
+    def test_incremental_hash(self):
+        """Test the incrementally updated hash matches one computed from scratch."""
+        board = BitBoard()
+        rng = random.Random(7)
+        for _ in range(60):
+            moves = legal_moves(board)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+            self.assertEqual(
+                board.hash,
+                hash_position(board.grey, board.white, board.kings, board.turn)
+            )
+        start = BitBoard().hash
+        while board.history:
+            board.pop()
+        self.assertEqual(board.hash, start)
+
+    def test_game_updates_hash(self):
+        """Test moves, captures and turn changes through the Game keep the hash current."""
+        game = Game(None, GameLogger(None))
+        game.select(5, 2)
+        game.select(4, 3)
+        game.select(2, 5)
+        game.select(3, 4)
+        game.select(4, 3)
+        game.select(2, 5)
+        engine = game.board.engine
+        self.assertEqual(engine.white_left, 11)
+        self.assertEqual(
+            engine.hash,
+            hash_position(engine.grey, engine.white, engine.kings, engine.turn)
+        )
+
+    def test_table_store_and_probe(self):
+        """Test stored entries come back and the depth-preferred slot is kept."""
+        table = TranspositionTable(1)
+        move = legal_moves(BitBoard())[0]
+        table.store(12345, 5, EXACT, -42, move)
+        self.assertEqual(table.probe(12345), (5, EXACT, -42, move.src, move.dst))
+        self.assertIsNone(table.probe(54321))
+        self.assertEqual(table.hit_rate, 0.5)
+        self.assertEqual(table.memory_bytes, 1024 * 1024)
+
+    def test_table_keeps_10x10_moves(self):
+        """Test moves between squares above 31 come back unchanged."""
+        table = TranspositionTable(1)
+        table.store(12345, 3, LOWER, 7, Move(49, 44, 0))
+        self.assertEqual(table.probe(12345), (3, LOWER, 7, 49, 44))
+
+    def test_table_replacement(self):
+        """Test a shallow entry cannot evict a deeper one from the same bucket."""
+        table = TranspositionTable(1)
+        buckets = table.stats()["entries"] // 2
+        table.store(1, 8, LOWER, 10)
+        table.store(1 + buckets, 2, UPPER, 20)
+        table.store(1 + 2 * buckets, 3, EXACT, 30)
+        self.assertEqual(table.probe(1).depth, 8)
+        self.assertIsNone(table.probe(1 + buckets))
+        self.assertEqual(table.probe(1 + 2 * buckets).score, 30)
+        self.assertEqual(table.collisions, 1)
+
+class TestHeadless(unittest.TestCase):
+    def test_engine_imports_without_pygame(self):
+        """Test the rules engine and game logic never import pygame."""
+        code = (
+            "import sys; import checkers.game, checkers.bitboard; "
+            "sys.exit('pygame' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, "-c", code])
+        self.assertEqual(result.returncode, 0)
+
+class TestRenderer(unittest.TestCase):
+    def setUp(self):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        import pygame
+        from checkers.constants import WIDTH, HEIGHT
+        from checkers.render import Renderer
+        pygame.init()
+        self.pygame = pygame
+        self.win = pygame.display.set_mode((WIDTH, HEIGHT))
+        self.game = Game(self.win, GameLogger(None))
+        self.game.renderer = Renderer(self.win)
+
+    def tearDown(self):
+        self.pygame.quit()
+
+    def test_matches_full_redraw(self):
+        """Test dirty-rectangle frames look the same as full redraws."""
+        rng = random.Random(3)
+        reference = self.pygame.Surface(self.win.get_size())
+        full = Game(reference, GameLogger(None))
+        for _ in range(12):
+            move = rng.choice(self.game.board.engine.generate_moves())
+            self.game.play_move(move)
+            full.play_move(move)
+            replies = self.game.board.engine.generate_moves()
+            if not replies:
+                break
+            self.game.select(*row_col_of(replies[0].src))
+            full.select(*row_col_of(replies[0].src))
+            self.game.update()
+            full.board.draw(reference)
+            full.draw_valid_moves(full.valid_moves)
+            self.assertEqual(self.pygame.image.tobytes(self.win, "RGB"),
+                             self.pygame.image.tobytes(reference, "RGB"))
+
+    def test_skips_unchanged_frames(self):
+        """Test only changed squares are redrawn and idle frames are skipped."""
+        self.assertTrue(self.game.update())
+        self.assertFalse(self.game.update())
+        move = self.game.board.engine.generate_moves()[0]
+        self.game.play_move(move)
+        rects = self.game.renderer.render(self.game.board.engine, self.game.valid_moves)
+        self.assertEqual(len(rects), 2)
+        self.game.renderer.invalidate()
+        self.assertTrue(self.game.update())
+
+    def test_event_loop_sleeps_until_events(self):
+        """Test the event-driven loop draws once, then only after events."""
+        import main
+        from checkers.render import FrameStats
+        stats = FrameStats()
+        self.pygame.event.clear()
+        self.pygame.event.post(self.pygame.event.Event(self.pygame.MOUSEMOTION, pos=(0, 0)))
+        self.pygame.time.set_timer(self.pygame.QUIT, 300, loops=1)
+        main.event_loop(self.game, {GREY_PIECES: None, WHITE: None}, stats)
+        self.assertEqual(stats.summary()["frames"], 1)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file